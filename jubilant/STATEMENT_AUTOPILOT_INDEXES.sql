@@ -0,0 +1,68 @@
+-- Statement Autopilot access-path indexes (2026-10)
+-- Run this after STATEMENT_AUTOPILOT_CORE_SCHEMA.sql + LIRAS_INTELLIGENCE_ENHANCEMENTS.sql.
+--
+-- Every parse starts by deleting the previous run's rows with `where version_id = ?`
+-- and every read path filters on version_id first. Without these indexes each of
+-- those statements is a sequential scan of the whole table (and so is the
+-- `on delete cascade` from statement_versions).
+--
+-- On a populated database prefer running each statement separately with
+-- `create index concurrently if not exists ...` to avoid blocking inserts.
+
+-- ====================================================
+-- 1) Per-version child tables (delete + read by version_id)
+-- ====================================================
+
+-- Parse reset + review screens read lines in page/row order.
+create index if not exists raw_statement_lines_version_page_idx
+  on public.raw_statement_lines(version_id, pdf_file_id, page_no, row_no);
+
+-- `on delete cascade` from pdf_files.
+create index if not exists raw_statement_lines_pdf_file_idx
+  on public.raw_statement_lines(pdf_file_id);
+
+-- unique(version_id, transaction_uid) already serves plain version_id deletes;
+-- these cover the ordered fallback read and finance-tag filters.
+create index if not exists transactions_version_date_idx
+  on public.transactions(version_id, txn_date, id);
+
+create index if not exists transactions_version_finance_tag_idx
+  on public.transactions(version_id, finance_tag)
+  where finance_tag is not null;
+
+create index if not exists transactions_version_month_idx
+  on public.transactions(version_id, month_key);
+
+create index if not exists pivots_version_month_idx
+  on public.pivots(version_id, month_key);
+
+create index if not exists pdf_files_version_created_idx
+  on public.pdf_files(version_id, created_at);
+
+-- ====================================================
+-- 2) Strict ledger (statement_tx_ledger_statement_idx leads with statement_id)
+-- ====================================================
+
+create index if not exists statement_tx_ledger_version_row_idx
+  on public.statement_transaction_ledger(version_id, row_index);
+
+create index if not exists statement_tx_ledger_version_finance_tag_idx
+  on public.statement_transaction_ledger(version_id, finance_tag)
+  where finance_tag is not null;
+
+-- ====================================================
+-- 3) Audit lookups (stage-history seeding reads recent PARSE_READY events)
+-- ====================================================
+
+create index if not exists audit_events_action_created_idx
+  on public.audit_events(action, created_at desc);
+
+create index if not exists audit_events_entity_idx
+  on public.audit_events(entity_type, entity_id, created_at desc);
+
+analyze public.raw_statement_lines;
+analyze public.transactions;
+analyze public.pivots;
+analyze public.statement_transaction_ledger;
+
+notify pgrst, 'reload schema';
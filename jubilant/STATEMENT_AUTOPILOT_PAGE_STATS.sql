@@ -0,0 +1,35 @@
+-- Statement Autopilot page-level extraction flight recorder (2026-10)
+-- Run this after STATEMENT_AUTOPILOT_CORE_SCHEMA.sql.
+--
+-- One row per parsed PDF. `pages` holds parallel arrays, one entry per page:
+--   {"v": 1, "page_no": [...], "method": [...], "wall_ms": [...], "table_ms": [...],
+--    "chars": [...], "tables": [...], "lines": [...], "over_budget": [page_no, ...]}
+-- Rows are kept across re-parses (parse_hash tells runs apart); GET /stats/slow_pages
+-- reads the most recent ones.
+
+create table if not exists public.pdf_page_stats (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references public.statement_versions(id) on delete cascade,
+  pdf_file_id uuid references public.pdf_files(id) on delete cascade,
+  parse_hash text,
+  fingerprint text,
+  layout_key text,
+  engine text,
+  start_mode text,
+  page_count int not null default 0,
+  total_ms numeric(12,1) not null default 0,
+  max_page_ms numeric(12,1) not null default 0,
+  pages jsonb not null default '{}'::jsonb,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists pdf_page_stats_created_idx
+  on public.pdf_page_stats(created_at desc);
+
+create index if not exists pdf_page_stats_fingerprint_idx
+  on public.pdf_page_stats(fingerprint, created_at desc);
+
+create index if not exists pdf_page_stats_version_idx
+  on public.pdf_page_stats(version_id);
+
+notify pgrst, 'reload schema';
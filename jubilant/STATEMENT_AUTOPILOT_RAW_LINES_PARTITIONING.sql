@@ -0,0 +1,195 @@
+-- Statement Autopilot: OPTIONAL hash partitioning of raw_statement_lines (2026-10)
+-- Run this after STATEMENT_AUTOPILOT_INDEXES.sql, in a maintenance window.
+--
+-- raw_statement_lines is by far the largest statement table (every captured PDF
+-- row, transaction or not) and is only ever touched by version_id. Hash
+-- partitioning by version_id keeps each partition's btree small and lets the
+-- per-parse `delete ... where version_id = ?` prune to a single partition.
+--
+-- The swap copies all rows under an exclusive lock and is skipped if the table is
+-- already partitioned. Postgres requires the partition key in the primary key, so
+-- the key becomes (version_id, id); ids stay gen_random_uuid() values. Rows with a
+-- null version_id are orphans of deleted versions and are not carried over.
+--
+-- Access rules move with the table: row level security, every policy (e.g. the
+-- "read own or admin" / "insert own or admin" pair) and the table grants (anon,
+-- authenticated, service_role, ...) are copied from the old table, and the
+-- default privileges the new table and its partitions pick up are revoked first.
+-- The partitions get row level security with no policies, so only roles that
+-- bypass RLS can read them directly; everyone else goes through the parent.
+--
+-- Foreign keys that reference raw_statement_lines(id) (pinned_evidence.raw_line_id
+-- in STATEMENT_AUTOPILOT_SETUP.sql) are DROPPED: the new primary key is
+-- (version_id, id), so a foreign key on id alone cannot point at it. The
+-- referencing columns keep their values as plain uuids; they are no longer
+-- checked, and are not nulled when a parse replaces a version's lines.
+
+begin;
+
+do $$
+declare
+  parts int := 16;
+  i int;
+  pol record;
+  acl record;
+  fk record;
+  roles text;
+begin
+  if exists (
+    select 1 from pg_class c
+    join pg_namespace n on n.oid = c.relnamespace
+    where n.nspname = 'public' and c.relname = 'raw_statement_lines' and c.relkind = 'p'
+  ) then
+    raise notice 'raw_statement_lines is already partitioned; nothing to do';
+    return;
+  end if;
+
+  lock table public.raw_statement_lines in access exclusive mode;
+
+  create table public.raw_statement_lines_partitioned (
+    id uuid not null default gen_random_uuid(),
+    version_id uuid not null references public.statement_versions(id) on delete cascade,
+    pdf_file_id uuid references public.pdf_files(id) on delete cascade,
+    page_no int not null,
+    row_no int not null,
+    raw_row_text text not null,
+    raw_date_text text null,
+    raw_narration_text text null,
+    raw_dr_text text null,
+    raw_cr_text text null,
+    raw_balance_text text null,
+    line_type public.raw_line_type not null,
+    extraction_method text not null,
+    bbox_json jsonb null,
+    created_at timestamptz default now(),
+    primary key (version_id, id)
+  ) partition by hash (version_id);
+
+  for i in 0 .. parts - 1 loop
+    execute format(
+      'create table public.raw_statement_lines_p%s partition of public.raw_statement_lines_partitioned '
+      'for values with (modulus %s, remainder %s)',
+      lpad(i::text, 2, '0'), parts, i
+    );
+  end loop;
+
+  insert into public.raw_statement_lines_partitioned (
+    id, version_id, pdf_file_id, page_no, row_no, raw_row_text, raw_date_text,
+    raw_narration_text, raw_dr_text, raw_cr_text, raw_balance_text, line_type,
+    extraction_method, bbox_json, created_at
+  )
+  select
+    id, version_id, pdf_file_id, page_no, row_no, raw_row_text, raw_date_text,
+    raw_narration_text, raw_dr_text, raw_cr_text, raw_balance_text, line_type,
+    extraction_method, bbox_json, created_at
+  from public.raw_statement_lines
+  where version_id is not null;
+
+  -- Start from no privileges on the new table and its partitions: the default
+  -- privileges applied at create time are not the old table's.
+  for acl in
+    select c.oid::regclass as rel, coalesce(quote_ident(r.rolname), 'public') as grantee
+    from pg_class c
+    cross join lateral aclexplode(c.relacl) a
+    left join pg_roles r on r.oid = a.grantee
+    where (c.oid = 'public.raw_statement_lines_partitioned'::regclass
+           or c.oid in (select inhrelid from pg_inherits
+                        where inhparent = 'public.raw_statement_lines_partitioned'::regclass))
+      and a.grantee <> c.relowner
+    group by c.oid, r.rolname
+  loop
+    execute format('revoke all on %s from %s', acl.rel, acl.grantee);
+  end loop;
+
+  for acl in
+    select coalesce(quote_ident(r.rolname), 'public') as grantee, a.privilege_type
+    from pg_class c
+    cross join lateral aclexplode(c.relacl) a
+    left join pg_roles r on r.oid = a.grantee
+    where c.oid = 'public.raw_statement_lines'::regclass and a.grantee <> c.relowner
+  loop
+    execute format(
+      'grant %s on public.raw_statement_lines_partitioned to %s', acl.privilege_type, acl.grantee
+    );
+  end loop;
+
+  if (select relrowsecurity from pg_class where oid = 'public.raw_statement_lines'::regclass) then
+    alter table public.raw_statement_lines_partitioned enable row level security;
+  end if;
+  if (select relforcerowsecurity from pg_class where oid = 'public.raw_statement_lines'::regclass) then
+    alter table public.raw_statement_lines_partitioned force row level security;
+  end if;
+  for i in 0 .. parts - 1 loop
+    execute format(
+      'alter table public.raw_statement_lines_p%s enable row level security', lpad(i::text, 2, '0')
+    );
+  end loop;
+
+  for pol in
+    select
+      p.polname,
+      p.polpermissive,
+      p.polroles,
+      case p.polcmd when 'r' then 'select' when 'a' then 'insert' when 'w' then 'update'
+                    when 'd' then 'delete' else 'all' end as cmd,
+      pg_get_expr(p.polqual, p.polrelid) as qual,
+      pg_get_expr(p.polwithcheck, p.polrelid) as with_check
+    from pg_policy p
+    where p.polrelid = 'public.raw_statement_lines'::regclass
+  loop
+    select string_agg(coalesce(quote_ident(r.rolname), 'public'), ', ')
+    into roles
+    from unnest(pol.polroles) as role_oid
+    left join pg_roles r on r.oid = role_oid;
+
+    execute format(
+      'create policy %I on public.raw_statement_lines_partitioned as %s for %s to %s%s%s',
+      pol.polname,
+      case when pol.polpermissive then 'permissive' else 'restrictive' end,
+      pol.cmd,
+      roles,
+      coalesce(' using (' || pol.qual || ')', ''),
+      coalesce(' with check (' || pol.with_check || ')', '')
+    );
+  end loop;
+
+  for fk in
+    select conrelid::regclass as rel, conname
+    from pg_constraint
+    where contype = 'f' and confrelid = 'public.raw_statement_lines'::regclass
+  loop
+    raise notice 'dropping foreign key % on %: it cannot reference the partitioned raw_statement_lines', fk.conname, fk.rel;
+    execute format('alter table %s drop constraint %I', fk.rel, fk.conname);
+  end loop;
+
+  alter table public.raw_statement_lines rename to raw_statement_lines_unpartitioned;
+  alter table public.raw_statement_lines_partitioned rename to raw_statement_lines;
+
+  -- Index names are global, so drop the old table's copies before recreating them.
+  drop index if exists public.raw_statement_lines_version_page_idx;
+  drop index if exists public.raw_statement_lines_pdf_file_idx;
+end
+$$;
+
+create index if not exists raw_statement_lines_version_page_idx
+  on public.raw_statement_lines(version_id, pdf_file_id, page_no, row_no);
+
+create index if not exists raw_statement_lines_pdf_file_idx
+  on public.raw_statement_lines(pdf_file_id);
+
+do $$
+begin
+  if exists (select 1 from pg_roles where rolname = 'service_role') then
+    grant select, insert, update, delete on public.raw_statement_lines to service_role;
+  end if;
+end
+$$;
+
+commit;
+
+analyze public.raw_statement_lines;
+
+-- Once row counts are verified:
+--   drop table public.raw_statement_lines_unpartitioned;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,30 @@
+-- Statement Autopilot blob storage for raw statement lines (2026-10)
+-- Run this after STATEMENT_AUTOPILOT_CORE_SCHEMA.sql, before setting
+-- STATEMENT_RAW_LINES_STORAGE=blob.
+--
+-- In blob mode each PDF's raw lines are one zstd Parquet object in the statements
+-- bucket (raw_lines/{version_id}/{parse_hash}/{pdf_file_id}.parquet) and
+-- raw_statement_lines gets no rows. raw_line_blobs is the index:
+--   pages = {"page_no": [...], "lines": [...]}   -- lines per page, parallel arrays
+-- Transactions then carry raw_line_ids = '{}' and
+--   raw_line_refs = {"pdf_file_id": "...", "lines": [[page_no, row_no], ...]}
+
+create table if not exists public.raw_line_blobs (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references public.statement_versions(id) on delete cascade,
+  pdf_file_id uuid references public.pdf_files(id) on delete cascade,
+  parse_hash text not null,
+  storage_path text not null,
+  format text not null,
+  line_count int not null default 0,
+  txn_line_count int not null default 0,
+  size_bytes bigint not null default 0,
+  pages jsonb not null default '{}'::jsonb,
+  created_at timestamptz not null default now(),
+  unique (version_id, pdf_file_id)
+);
+
+alter table public.transactions
+  add column if not exists raw_line_refs jsonb null;
+
+notify pgrst, 'reload schema';
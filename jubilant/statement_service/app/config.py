@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import os
+from functools import cached_property
 from pathlib import Path
+from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 
 SERVICE_ROOT = Path(__file__).resolve().parents[2]
@@ -34,18 +36,54 @@ class Settings(BaseModel):
     supabase_url: str
     supabase_service_key: str
     bucket: str = "statements"
-    template_path: str = Field(default_factory=_default_template_path)
+    # "supabase" (default) or "local" for the SQLite/directory stand-in in app/local_backend.py.
+    data_backend: str = "supabase"
 
+    @cached_property
+    def template_path(self) -> str:
+        # Probed on first use rather than at import to keep cold starts cheap.
+        return _default_template_path()
 
-def _required_env(name: str) -> str:
+
+def env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in {"0", "false", "no", "off", ""}
+
+
+def env_float(name: str, default: Optional[float], positive: bool = False) -> Optional[float]:
+    """
+    Number from environment variable `name`; `default` when it is unset, blank or
+    not a number. With positive=True, zero or less means "off" and gives None.
+    """
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        return default
+    return None if positive and value <= 0 else value
+
+
+def env_int(name: str, default: Optional[int], positive: bool = False) -> Optional[int]:
+    value = env_float(name, float(default) if default is not None else None, positive=positive)
+    return int(value) if value is not None else None
+
+
+def _required_env(name: str, required: bool = True) -> str:
     value = os.environ.get(name)
-    if value:
-        return value
+    if value or not required:
+        return value or ""
     raise RuntimeError(f"Missing required environment variable: {name}")
 
 
+_data_backend = (os.environ.get("STATEMENT_DATA_BACKEND") or "supabase").strip().lower()
+
 settings = Settings(
-    supabase_url=_required_env("SUPABASE_URL"),
-    supabase_service_key=_required_env("SUPABASE_SERVICE_ROLE_KEY"),
+    supabase_url=_required_env("SUPABASE_URL", required=_data_backend == "supabase"),
+    supabase_service_key=_required_env("SUPABASE_SERVICE_ROLE_KEY", required=_data_backend == "supabase"),
     bucket=os.environ.get("SUPABASE_BUCKET", "statements"),
+    data_backend=_data_backend,
 )
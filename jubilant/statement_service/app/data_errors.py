@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sys
+
+# Which data-backend failures are worth retrying. Kept free of third-party
+# imports so app.main can classify errors without loading httpx at startup;
+# httpx exceptions are only checked for once something has imported httpx.
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# PostgREST connection/schema-cache errors, and the SQLSTATEs that mean "try again"
+# rather than "this query is wrong": connection exceptions (08), insufficient
+# resources (53), operator intervention (57, except 57014 query_canceled), and
+# serialization failure / deadlock.
+_TRANSIENT_POSTGREST_CODES = frozenset({"PGRST000", "PGRST001", "PGRST002", "PGRST003"})
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "53", "57")
+_TRANSIENT_SQLSTATES = frozenset({"40001", "40P01"})
+_NON_TRANSIENT_SQLSTATES = frozenset({"57014"})
+
+
+class TransientDataError(RuntimeError):
+    """The data backend could not answer (network, overload, timeout); unlike an empty result, retrying may help."""
+
+    def __init__(self, what: str, cause: BaseException) -> None:
+        super().__init__(f"{what}: {type(cause).__name__}: {cause}")
+        self.cause = cause
+
+
+def _is_transient_status(status: int) -> bool:
+    return status in RETRY_STATUSES or status >= 500
+
+
+def _is_transient_code(code: str) -> bool:
+    """PostgREST `code`: a PGRST error code or a Postgres SQLSTATE, never an HTTP status."""
+    if code in _TRANSIENT_POSTGREST_CODES or code in _TRANSIENT_SQLSTATES:
+        return True
+    return len(code) == 5 and code[:2] in _TRANSIENT_SQLSTATE_CLASSES and code not in _NON_TRANSIENT_SQLSTATES
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    if isinstance(exc, TransientDataError):
+        return True
+    # An httpx exception can only exist once httpx has been imported.
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        if isinstance(exc, httpx.TransportError):
+            return True
+        if isinstance(exc, httpx.HTTPStatusError):
+            return _is_transient_status(exc.response.status_code)
+    error = exc.args[0] if exc.args and isinstance(exc.args[0], dict) else {}
+    # Storage errors carry the HTTP status as `statusCode`.
+    status = error.get("statusCode")
+    if status is not None:
+        return str(status).isdigit() and _is_transient_status(int(status))
+    code = getattr(exc, "code", None) or error.get("code")
+    return code is not None and _is_transient_code(str(code))
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import datetime as dt
+import gzip
+import json
+from decimal import Decimal
+from typing import Any, Dict
+
+# Inputs of generate_perfios_excel stored for lazy workbook builds. JSON with
+# tagged dates/decimals so the rebuilt workbook gets the same cell types.
+INPUTS_FORMAT_VERSION = 1
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, dt.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, dt.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in workbook inputs")
+
+
+def _object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "__date__" in obj:
+            return dt.date.fromisoformat(obj["__date__"])
+        if "__datetime__" in obj:
+            return dt.datetime.fromisoformat(obj["__datetime__"])
+        if "__decimal__" in obj:
+            return Decimal(obj["__decimal__"])
+    return obj
+
+
+def encode_workbook_inputs(inputs: Dict[str, Any]) -> bytes:
+    payload = {"format": INPUTS_FORMAT_VERSION, **inputs}
+    return gzip.compress(json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+
+
+def decode_workbook_inputs(blob: bytes) -> Dict[str, Any]:
+    payload = json.loads(gzip.decompress(blob).decode("utf-8"), object_hook=_object_hook)
+    if payload.get("format") != INPUTS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported workbook inputs format: {payload.get('format')}")
+    return payload
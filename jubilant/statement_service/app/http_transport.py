@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from .config import env_float, env_int
+from .data_errors import RETRY_STATUSES
+
+# One pooled HTTP transport shared by the PostgREST and Storage sessions of the
+# Supabase client: bounded keep-alive connections, HTTP/2 (`h2` is a
+# requirement) and retries with full jitter. A request that never reached the
+# server (connect errors) is retried whatever its method. Timeouts, dropped
+# connections and 429/502/503/504 answers are retried only for idempotent
+# requests: GET/HEAD/OPTIONS/PUT/DELETE, and POSTs that are PostgREST upserts
+# (`Prefer: resolution=...`) or storage uploads with `x-upsert: true`.
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_LATENCY_SAMPLES = 512
+
+
+def _is_idempotent(request: httpx.Request) -> bool:
+    if request.method in _IDEMPOTENT_METHODS:
+        return True
+    if request.method == "POST":
+        prefer = request.headers.get("prefer", "")
+        return "resolution=" in prefer or request.headers.get("x-upsert", "").lower() == "true"
+    return False
+
+
+def _service(request: httpx.Request) -> str:
+    path = request.url.path
+    for prefix, name in (("/rest/", "rest"), ("/storage/", "storage"), ("/auth/", "auth")):
+        if path.startswith(prefix):
+            return name
+    return "other"
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.latency_ms: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_LATENCY_SAMPLES))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            latency = {}
+            for key, samples in self.latency_ms.items():
+                ordered = sorted(samples)
+                latency[key] = {
+                    "samples": len(ordered),
+                    "p50_ms": round(ordered[len(ordered) // 2], 1),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+                    "max_ms": round(ordered[-1], 1),
+                }
+            return {
+                "requests": dict(self.requests),
+                "retries": dict(self.retries),
+                "failures": dict(self.failures),
+                "statuses": dict(self.statuses),
+                "latency": latency,
+            }
+
+
+class RetryingTransport(httpx.BaseTransport):
+    def __init__(
+        self,
+        transport: Optional[httpx.BaseTransport] = None,
+        retries: int = 3,
+        backoff_base_s: float = 0.2,
+        backoff_max_s: float = 5.0,
+        sleep: Any = time.sleep,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        self.retries = retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.sleep = sleep
+        self.stats = _Stats()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max_s, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0.0, min(self.backoff_max_s, self.backoff_base_s * (2**attempt)))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = f"{_service(request)} {request.method}"
+        idempotent = _is_idempotent(request)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            reason: Optional[str] = None
+            response: Optional[httpx.Response] = None
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as exc:
+                if attempt >= self.retries or not (idempotent or isinstance(exc, _NOT_SENT_ERRORS)):
+                    self._record(key, started, failed=True)
+                    raise
+                reason = type(exc).__name__
+            else:
+                if response.status_code in RETRY_STATUSES and idempotent and attempt < self.retries:
+                    reason = str(response.status_code)
+                else:
+                    self._record(key, started, status=response.status_code)
+                    return response
+            with self.stats.lock:
+                self.stats.retries[f"{key} {reason}"] += 1
+            delay = self._delay(attempt, response)
+            if response is not None:
+                response.close()
+            self.sleep(delay)
+            attempt += 1
+
+    def _record(self, key: str, started: float, status: Optional[int] = None, failed: bool = False) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self.stats.lock:
+            self.stats.requests[key] += 1
+            self.stats.latency_ms[key].append(elapsed_ms)
+            if failed:
+                self.stats.failures[key] += 1
+            if status is not None:
+                self.stats.statuses[f"{status // 100}xx"] += 1
+
+    def close(self) -> None:
+        # Shared by several httpx clients; closing one of them must not close the pool.
+        pass
+
+    def shutdown(self) -> None:
+        self.transport.close()
+
+
+def pooled_transport_from_env() -> RetryingTransport:
+    http2 = os.environ.get("STATEMENT_HTTP_HTTP2", "true").strip().lower() in ("1", "true", "yes", "on")
+    limits = httpx.Limits(
+        max_connections=env_int("STATEMENT_HTTP_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=env_int("STATEMENT_HTTP_MAX_KEEPALIVE", 10),
+        keepalive_expiry=env_float("STATEMENT_HTTP_KEEPALIVE_S", 30.0),
+    )
+    return RetryingTransport(
+        httpx.HTTPTransport(http2=http2, limits=limits),
+        retries=env_int("STATEMENT_HTTP_RETRIES", 3),
+        backoff_base_s=env_float("STATEMENT_HTTP_RETRY_BASE_S", 0.2),
+        backoff_max_s=env_float("STATEMENT_HTTP_RETRY_MAX_S", 5.0),
+    )
+
+
+_CLIENT_HOOKS = ("_init_postgrest_client", "_init_storage_client")
+
+
+def _route_session(sub_client: Any, transport: RetryingTransport) -> None:
+    session = getattr(sub_client, "session", None)
+    if not isinstance(session, httpx.Client) or not hasattr(session, "_transport"):
+        raise RuntimeError(f"{type(sub_client).__name__} has no httpx session; install_transport needs updating for this supabase-py")
+    session._transport = transport
+
+
+def install_transport(client: Any, transport: RetryingTransport) -> Any:
+    """
+    Route a supabase-py client's PostgREST and Storage sessions through `transport`.
+    supabase-py builds those sessions itself (and rebuilds PostgREST on auth
+    changes), and the pinned 2.6 has no ClientOptions hook for an httpx client,
+    so its two private factories are wrapped on the instance. Anything that
+    no longer looks like that layout raises instead of silently going unpooled.
+    """
+    missing = [name for name in _CLIENT_HOOKS if not callable(getattr(client, name, None))]
+    if missing:
+        raise RuntimeError(f"supabase client has no {', '.join(missing)}; install_transport needs updating for this supabase-py")
+    init_postgrest = client._init_postgrest_client
+    init_storage = client._init_storage_client
+
+    def postgrest(*args: Any, **kwargs: Any) -> Any:
+        rest = init_postgrest(*args, **kwargs)
+        _route_session(rest, transport)
+        return rest
+
+    def storage(*args: Any, **kwargs: Any) -> Any:
+        store = init_storage(*args, **kwargs)
+        _route_session(store, transport)
+        return store
+
+    client._init_postgrest_client = postgrest
+    client._init_storage_client = storage
+    client._postgrest = None
+    client._storage = None
+    client.http_transport = transport
+    return client
+
+
+_active: Optional[RetryingTransport] = None
+
+
+def set_active_transport(transport: Optional[RetryingTransport]) -> None:
+    global _active
+    _active = transport
+
+
+def transport_metrics() -> Dict[str, Any]:
+    if _active is None:
+        return {"enabled": False}
+    inner = _active.transport
+    pool = getattr(inner, "_pool", None)
+    return {
+        "enabled": True,
+        "http2": bool(getattr(pool, "_http2", False)),
+        "connections": len(getattr(pool, "connections", []) or []),
+        **_active.stats.snapshot(),
+    }
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Parse jobs extract PDFs in long-lived worker processes so a stuck page can be
+# killed: on cancel or when the job's wall-clock budget runs out the worker (and
+# any shard/lattice pool it started, via its process group) is SIGKILLed, the slot
+# is released at once and a fresh worker is spawned on its next use.
+
+
+class JobCancelled(Exception):
+    def __init__(self, reason: str, timed_out: bool = False) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.timed_out = timed_out
+
+
+class JobControl:
+    """Cancellation flag and wall-clock deadline of one running parse job."""
+
+    def __init__(self, version_id: str, timeout_s: Optional[float] = None) -> None:
+        self.version_id = version_id
+        self.timeout_s = timeout_s
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout_s if timeout_s else None
+        self.reason: Optional[str] = None
+        self.timed_out = False
+        self.info: Dict[str, Any] = {}
+        self.watchdog: Optional[threading.Timer] = None
+        self._cancelled = threading.Event()
+        self._finalized = False
+        self._lock = threading.Lock()
+        self._slot: Optional["_WorkerSlot"] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str, timed_out: bool = False) -> bool:
+        """Cancel the job; False once it has been finalized (its outcome is being written)."""
+        with self._lock:
+            if self._finalized:
+                return False
+            if not self._cancelled.is_set():
+                self.reason = reason
+                self.timed_out = timed_out
+                self._cancelled.set()
+            slot = self._slot
+        if slot is not None:
+            slot.kill()
+        return True
+
+    def check(self) -> None:
+        """Raise JobCancelled if the job was cancelled or ran past its deadline."""
+        if not self._cancelled.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(f"Parse job timed out after {self.timeout_s:g}s", timed_out=True)
+        if self._cancelled.is_set():
+            raise JobCancelled(self.reason or "Parse job cancelled", timed_out=self.timed_out)
+
+    def finalize(self) -> None:
+        """
+        Last check before the job writes its final status: raises JobCancelled if it
+        was cancelled, otherwise stops the watchdog and refuses later cancels, so a
+        timeout firing now cannot mark the finished job as aborted.
+        """
+        self.check()
+        with self._lock:
+            if self._cancelled.is_set():
+                raise JobCancelled(self.reason or "Parse job cancelled", timed_out=self.timed_out)
+            self._finalized = True
+        if self.watchdog is not None:
+            self.watchdog.cancel()
+
+    def _attach(self, slot: Optional["_WorkerSlot"]) -> None:
+        with self._lock:
+            self._slot = slot
+            cancelled = self._cancelled.is_set()
+        if slot is not None and cancelled:
+            slot.kill()
+
+
+# -- worker processes -------------------------------------------------------------
+
+
+def _worker_main(conn: Any) -> None:
+    if hasattr(os, "setpgrp"):
+        # Own process group: killpg() also reaches pools this worker spawns.
+        os.setpgrp()
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            result = fn(lambda event: conn.send(("event", event)), *args, **kwargs)
+        except BaseException as exc:  # noqa: BLE001 - reported to the parent
+            try:
+                conn.send(("error", exc))
+            except Exception:
+                conn.send(("error", RuntimeError(f"{type(exc).__name__}: {exc}")))
+            continue
+        conn.send(("result", result))
+
+
+class _WorkerSlot:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: Optional[Any] = None
+        self.conn: Optional[Any] = None
+
+    def ensure_started(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            return
+        # spawn: request threads are running, fork() would copy their locks mid-flight.
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        # Not a daemon: daemonic processes may not start the shard/lattice pools.
+        self.process = context.Process(target=_worker_main, args=(child_conn,), name=f"extract-worker-{self.index}")
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def kill(self) -> None:
+        process = self.process
+        if process is None or process.pid is None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:  # pragma: no cover - non-POSIX
+                process.kill()
+        except (ProcessLookupError, PermissionError, OSError):
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+    def reset(self) -> None:
+        from .scratch import sweep_orphans
+
+        self.kill()
+        if self.process is not None:
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+        # A killed worker cannot clean up its own scratch (shard/lattice copies of the PDF).
+        sweep_orphans()
+
+    def shutdown(self) -> None:
+        if self.process is not None and self.process.is_alive() and self.conn is not None:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=2)
+            except Exception:
+                pass
+        self.reset()
+
+
+class KillableWorkerPool:
+    """
+    Fixed set of spawn worker processes. `run(fn, ...)` executes
+    `fn(emit, *args, **kwargs)` in a free worker; `emit(event)` calls are
+    delivered to `on_event` in the calling thread while it waits. fn, its
+    arguments and its result must be picklable.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, size)
+        self._slots = [_WorkerSlot(i) for i in range(self.size)]
+        self._free: "queue.Queue[_WorkerSlot]" = queue.Queue()
+        for slot in self._slots:
+            self._free.put(slot)
+
+    def _acquire(self, control: Optional[JobControl], poll_s: float) -> _WorkerSlot:
+        while True:
+            if control is not None:
+                control.check()
+            try:
+                return self._free.get(timeout=poll_s)
+            except queue.Empty:
+                continue
+
+    def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        control: Optional[JobControl] = None,
+        on_event: Optional[Callable[[Any], None]] = None,
+        poll_s: float = 0.1,
+        **kwargs: Any,
+    ) -> Any:
+        slot = self._acquire(control, poll_s)
+        healthy = False
+        try:
+            slot.ensure_started()
+            if control is not None:
+                control._attach(slot)
+            slot.conn.send((fn, args, kwargs))
+            while True:
+                if control is not None and (control.cancelled or (control.deadline and time.monotonic() >= control.deadline)):
+                    slot.kill()
+                    control.check()
+                if not slot.conn.poll(poll_s):
+                    if not slot.process.is_alive():
+                        raise RuntimeError(f"Extraction worker exited with code {slot.process.exitcode}")
+                    continue
+                try:
+                    kind, payload = slot.conn.recv()
+                except (EOFError, OSError):
+                    if control is not None:
+                        control.check()
+                    raise RuntimeError("Extraction worker died")
+                if kind == "event":
+                    if on_event is not None:
+                        on_event(payload)
+                    continue
+                healthy = True
+                if kind == "error":
+                    raise payload
+                return payload
+        finally:
+            if control is not None:
+                control._attach(None)
+            if not healthy:
+                slot.reset()
+            self._free.put(slot)
+
+    def shutdown(self) -> None:
+        for slot in self._slots:
+            slot.shutdown()
+
+
+_pool: Optional[KillableWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def extraction_pool() -> KillableWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.environ.get("STATEMENT_EXTRACT_WORKERS") or min(4, os.cpu_count() or 1))
+            _pool = KillableWorkerPool(size)
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+_process_pools: Dict[str, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+
+def process_executor(name: str, workers: int) -> ProcessPoolExecutor:
+    """Shared spawn process pool per purpose (shards, lattice pages, isolated stages), sized on first use."""
+    with _process_pools_lock:
+        pool = _process_pools.get(name)
+        if pool is None:
+            # spawn: the service runs request threads, which fork() does not copy safely.
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pools[name] = pool
+        return pool
+
+
+def extract_pdf_task(emit: Callable[[Any], None], source: Any, fingerprint: Any, options: Dict[str, Any]) -> Any:
+    """Extraction of one PDF, run in a worker (or inline); page stats go to `emit` as they are recorded."""
+    from .parser.banks import parser_for
+    from .parser.extract import ExtractionReport
+
+    bank_parser = parser_for(fingerprint)
+    report = ExtractionReport(on_page=emit)
+    raw_lines = bank_parser.extract(source, report=report, **options)
+    report.on_page = None
+    # One pickle: a sharded parser keeps a reference to raw_lines that merge() relies on.
+    return raw_lines, report, bank_parser
+
+
+def reextract_pages_task(
+    emit: Callable[[Any], None],
+    source: Any,
+    bank_parser: Any,
+    engine_name: str,
+    pages: List[int],
+    options: Dict[str, Any],
+) -> Any:
+    """Page-recovery re-extraction of some pages of one PDF through its bank parser, run in a worker (or inline)."""
+    from .parser.extract import ExtractionReport
+
+    report = ExtractionReport(on_page=emit)
+    return bank_parser.extract(source, report, engine_name=engine_name, pages=sorted(set(pages)), **options)
+
+
+# -- running jobs -------------------------------------------------------------------
+
+_running: Dict[str, Set[JobControl]] = {}
+_running_lock = threading.Lock()
+
+
+def register_job(control: JobControl) -> None:
+    with _running_lock:
+        _running.setdefault(control.version_id, set()).add(control)
+
+
+def unregister_job(control: JobControl) -> None:
+    with _running_lock:
+        controls = _running.get(control.version_id)
+        if controls is not None:
+            controls.discard(control)
+            if not controls:
+                _running.pop(control.version_id, None)
+
+
+def running_jobs(version_id: str) -> List[JobControl]:
+    with _running_lock:
+        return list(_running.get(version_id, ()))
@@ -0,0 +1,361 @@
+"""
+In-process stand-in for the Supabase client: PostgREST tables on SQLite and
+storage buckets in a local directory.
+
+It implements the subset the service uses: table().select/insert/upsert/update/
+delete with eq/in_/order/limit/range filters, and storage.from_(bucket).upload/
+download/remove. Rows are stored as JSON documents, so no schema is needed;
+like PostgREST defaults, inserted rows get an `id` and `created_at` when absent.
+Unique constraints other than an upsert's `on_conflict` columns are not enforced.
+
+Enable with STATEMENT_DATA_BACKEND=local (see app/supabase_client.py) or pass a
+LocalClient to `sb.set_client()` in tests and benchmarks.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Columns filtered on by the service; each table gets an expression index per column.
+_INDEXED_COLUMNS = ("id", "version_id")
+
+
+class LocalBackendError(Exception):
+    """Raised where PostgREST/storage would answer with an error."""
+
+
+class LocalResponse:
+    def __init__(self, data: Any, count: Optional[int] = None) -> None:
+        self.data = data
+        self.count = count
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER_RE.match(name):
+        raise LocalBackendError(f"Invalid identifier: {name!r}")
+    return name
+
+
+def _now() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+def _dumps(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, default=str, separators=(",", ":"))
+
+
+class _AnyOf(list):
+    """Value of an `in_` filter."""
+
+
+class LocalQuery:
+    """Chainable query builder mirroring postgrest's SyncRequestBuilder subset."""
+
+    def __init__(self, client: "LocalClient", table: str) -> None:
+        self.client = client
+        self.table = _identifier(table)
+        self._action = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[List[str]] = None
+        self._filters: List[Tuple[str, Any]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "LocalQuery":
+        self._action = "select"
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        self._columns = None if not names or "*" in names else [_identifier(c) for c in names]
+        return self
+
+    def insert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]]) -> "LocalQuery":
+        self._action = "insert"
+        self._payload = rows
+        return self
+
+    def upsert(
+        self, rows: Union[Dict[str, Any], List[Dict[str, Any]]], on_conflict: str = "", **_: Any
+    ) -> "LocalQuery":
+        self._action = "upsert"
+        self._payload = rows
+        self._on_conflict = [_identifier(c.strip()) for c in on_conflict.split(",") if c.strip()] or ["id"]
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "LocalQuery":
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self) -> "LocalQuery":
+        self._action = "delete"
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        self._filters.append((_identifier(column), value))
+        return self
+
+    def in_(self, column: str, values: Iterable[Any]) -> "LocalQuery":
+        self._filters.append((_identifier(column), _AnyOf(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False, **_: Any) -> "LocalQuery":
+        self._order.append((_identifier(column), desc))
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    def execute(self) -> LocalResponse:
+        return self.client._execute(self)
+
+
+class LocalBucket:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, path: str) -> Path:
+        target = (self.root / path.lstrip("/")).resolve()
+        if self.root.resolve() not in target.parents:
+            raise LocalBackendError(f"Invalid storage path: {path!r}")
+        return target
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        target = self._path(path)
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        if target.exists() and not upsert:
+            raise LocalBackendError(f"The resource already exists: {path}")
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            data = bytes(file)
+        elif isinstance(file, (str, Path)):
+            data = Path(file).read_bytes()
+        else:
+            data = file.read()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+        return {"Key": path}
+
+    def download(self, path: str, options: Optional[Dict[str, Any]] = None) -> bytes:
+        target = self._path(path)
+        if not target.is_file():
+            raise LocalBackendError(f"Object not found: {path}")
+        return target.read_bytes()
+
+    def remove(self, paths: Sequence[str]) -> List[Dict[str, Any]]:
+        removed = []
+        for path in paths:
+            target = self._path(path)
+            if target.is_file():
+                target.unlink()
+                removed.append({"name": path})
+        return removed
+
+
+class LocalStorage:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def from_(self, bucket: str) -> LocalBucket:
+        return LocalBucket(self.root / _identifier(bucket))
+
+
+class LocalClient:
+    """SQLite + directory backed client; thread-safe (one connection behind a lock)."""
+
+    def __init__(self, db_path: str = ":memory:", storage_dir: Optional[str] = None) -> None:
+        self.db_path = db_path
+        self.storage_dir = Path(storage_dir or tempfile.mkdtemp(prefix="statement_storage_"))
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.storage = LocalStorage(self.storage_dir)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        if db_path != ":memory:":
+            self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=off")
+        self._lock = threading.RLock()
+        self._tables: set = set()
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- execution ---------------------------------------------------------
+
+    def _ensure_table(self, table: str) -> None:
+        if table in self._tables:
+            return
+        self._conn.execute(f'create table if not exists "{table}" (pk integer primary key, doc text not null)')
+        for column in _INDEXED_COLUMNS:
+            self._conn.execute(
+                f'create index if not exists "{table}_{column}_idx" on "{table}"(json_extract(doc, \'$.{column}\'))'
+            )
+        self._tables.add(table)
+
+    @staticmethod
+    def _where(filters: Iterable[Tuple[str, Any]]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, value in filters:
+            if value is None:
+                clauses.append(f"json_extract(doc, '$.{column}') is null")
+                continue
+            if isinstance(value, _AnyOf):
+                clauses.append(f"json_extract(doc, '$.{column}') in ({', '.join('?' for _ in value)})" if value else "0")
+                params.extend(v if isinstance(v, (int, float, str)) else str(v) for v in value)
+                continue
+            if isinstance(value, bool):
+                value = int(value)
+            clauses.append(f"json_extract(doc, '$.{column}') = ?")
+            params.append(value if isinstance(value, (int, float, str)) else str(value))
+        return (" where " + " and ".join(clauses)) if clauses else "", params
+
+    def _matching(self, query: LocalQuery) -> List[Tuple[int, Dict[str, Any]]]:
+        where, params = self._where(query._filters)
+        sql = f'select pk, doc from "{query.table}"{where}'
+        if query._order:
+            sql += " order by " + ", ".join(
+                f"json_extract(doc, '$.{column}') {'desc' if desc else 'asc'}" for column, desc in query._order
+            ) + ", pk"
+        else:
+            sql += " order by pk"
+        if query._limit is not None or query._offset:
+            sql += " limit ? offset ?"
+            params = params + [query._limit if query._limit is not None else -1, query._offset]
+        return [(pk, json.loads(doc)) for pk, doc in self._conn.execute(sql, params)]
+
+    @staticmethod
+    def _rows(payload: Any) -> List[Dict[str, Any]]:
+        rows = payload if isinstance(payload, list) else [payload]
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _with_defaults(row: Dict[str, Any]) -> Dict[str, Any]:
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        return row
+
+    def _execute(self, query: LocalQuery) -> LocalResponse:
+        with self._lock:
+            self._ensure_table(query.table)
+            if query._action == "select":
+                rows = [doc for _, doc in self._matching(query)]
+                if query._columns is not None:
+                    rows = [{column: row.get(column) for column in query._columns} for row in rows]
+                return LocalResponse(rows, count=len(rows))
+
+            self._conn.execute("begin")
+            try:
+                data = getattr(self, f"_{query._action}")(query)
+            except BaseException:
+                self._conn.execute("rollback")
+                raise
+            self._conn.execute("commit")
+            return LocalResponse(data, count=len(data))
+
+    def _insert(self, query: LocalQuery) -> List[Dict[str, Any]]:
+        rows = [self._with_defaults(row) for row in self._rows(query._payload)]
+        self._conn.executemany(f'insert into "{query.table}"(doc) values (?)', [(_dumps(row),) for row in rows])
+        return rows
+
+    def _upsert(self, query: LocalQuery) -> List[Dict[str, Any]]:
+        out = []
+        keys = query._on_conflict or ["id"]
+        for row in self._rows(query._payload):
+            existing = None
+            if all(key in row for key in keys):
+                probe = LocalQuery(self, query.table)
+                probe._filters = [(key, row[key]) for key in keys]
+                probe._limit = 1
+                existing = next(iter(self._matching(probe)), None)
+            if existing is None:
+                row = self._with_defaults(row)
+                self._conn.execute(f'insert into "{query.table}"(doc) values (?)', (_dumps(row),))
+            else:
+                pk, doc = existing
+                row = {**doc, **row}
+                self._conn.execute(f'update "{query.table}" set doc = ? where pk = ?', (_dumps(row), pk))
+            out.append(row)
+        return out
+
+    def _update(self, query: LocalQuery) -> List[Dict[str, Any]]:
+        out = []
+        for pk, doc in self._matching(query):
+            doc.update(query._payload or {})
+            self._conn.execute(f'update "{query.table}" set doc = ? where pk = ?', (_dumps(doc), pk))
+            out.append(doc)
+        return out
+
+    def _delete(self, query: LocalQuery) -> List[Dict[str, Any]]:
+        matched = self._matching(query)
+        self._conn.executemany(f'delete from "{query.table}" where pk = ?', [(pk,) for pk, _ in matched])
+        return [doc for _, doc in matched]
+
+
+def local_client_from_env() -> LocalClient:
+    root = Path(os.environ.get("STATEMENT_LOCAL_DATA_DIR") or Path(tempfile.gettempdir()) / "statement_local")
+    return LocalClient(db_path=str(root / "db.sqlite3"), storage_dir=str(root / "storage"))
+
+
+def seed_statement(
+    client: Any,
+    pdf_paths: Sequence[str],
+    bucket: str = "statements",
+    lead_id: Optional[str] = None,
+    bank_name: Optional[str] = None,
+) -> str:
+    """Create a statement, a version and its uploaded PDFs the way the app does; returns the version id."""
+    statement_id = str(uuid.uuid4())
+    version_id = str(uuid.uuid4())
+    client.table("statements").insert({"id": statement_id, "lead_id": lead_id, "bank_name": bank_name}).execute()
+    client.table("statement_versions").insert(
+        {"id": version_id, "statement_id": statement_id, "version_no": 1, "status": "UPLOADED"}
+    ).execute()
+    storage = client.storage.from_(bucket)
+    for index, pdf_path in enumerate(pdf_paths):
+        pdf_id = str(uuid.uuid4())
+        name = os.path.basename(pdf_path)
+        storage_path = f"uploads/{statement_id}/{version_id}/{pdf_id}.pdf"
+        with open(pdf_path, "rb") as f:
+            storage.upload(storage_path, f.read(), {"content-type": "application/pdf", "upsert": "true"})
+        client.table("pdf_files").insert(
+            {
+                "id": pdf_id,
+                "version_id": version_id,
+                "storage_path": storage_path,
+                "original_name": name,
+                # Explicit, strictly increasing: pdf_files are read ordered by created_at.
+                "created_at": (dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc) + dt.timedelta(seconds=index)).isoformat(),
+            }
+        ).execute()
+    return version_id
+
+
+def reset_local_data(client: LocalClient) -> None:
+    """Drop every table and stored object (benchmarks start from an empty stand-in)."""
+    with client._lock:
+        for (name,) in client._conn.execute("select name from sqlite_master where type = 'table'").fetchall():
+            client._conn.execute(f'drop table if exists "{name}"')
+        client._tables.clear()
+    shutil.rmtree(client.storage_dir, ignore_errors=True)
+    client.storage_dir.mkdir(parents=True, exist_ok=True)
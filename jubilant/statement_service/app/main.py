@@ -2,24 +2,57 @@ from __future__ import annotations
 
 import datetime as dt
 import hashlib
+import json
 import os
+import random
 import re
-import tempfile
+import threading
+import time
 import uuid
 from collections import Counter, defaultdict
+from contextlib import nullcontext
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from dateutil import parser as date_parser
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from openpyxl import load_workbook
 
-from .config import settings
-from .excel.generate import generate_perfios_excel
-from .parser.extract import extract_raw_lines_pdfplumber, merge_multiline_transactions
-from .parser.reconcile import reconcile_strict
+# pdfplumber, openpyxl, dateutil, supabase and httpx are imported on first use so a
+# scaled-to-zero instance can bind its port before paying for them.
+from .config import env_flag, env_float, env_int, settings
+from .data_errors import TransientDataError, is_transient_error
+from .excel.inputs import decode_workbook_inputs, encode_workbook_inputs
+from .jobs import (
+    JobCancelled,
+    JobControl,
+    extract_pdf_task,
+    extraction_pool,
+    reextract_pages_task,
+    register_job,
+    running_jobs,
+    unregister_job,
+)
+from .metrics import StageClock, predict_parse_seconds, record_stage_metrics, seed_stage_history, stage_metrics_payload
+from .page_stats import page_stats_row, slow_page_report
+from .parser.banks import BankParser
+from .parser.engines import pdf_page_count
+from .parser.extract import ExtractionReport
+from .parser.fingerprint import fingerprint_pdf
+from .parser.inspect import inspect_pdf
+from .parser.reconcile import overlap_duplicates, overlap_key, reconcile_strict, statement_account, unmapped_pages
+from .parser.recovery import splice_pages
+from .parser.source import PdfSource
+from .pipeline import StageGraph
+from .profiling import SamplingProfiler, profile_job, profiling_active
+from .progress import ProgressJob, progress_bus
+from .raw_store import decode_raw_lines, encode_raw_lines, raw_line_index_row, raw_line_refs, raw_lines_path
+from .scheduler import estimate_cost, job_scheduler
+from .scratch import ScratchSpace, scratch_usage, sweep_orphans
+from .query import CursorError, VersionFrameCache, frame_from_rows, query_transactions
+from .snapshot import encode_snapshot, load_snapshot, snapshot_path
 from .supabase_client import sb
 
 
@@ -58,12 +91,6 @@ DEFAULT_PVT_KEYWORDS = {
 }
 
 
-def _env_flag(name: str, default: bool) -> bool:
-    raw = os.environ.get(name)
-    if raw is None:
-        return default
-    return raw.strip().lower() not in {"0", "false", "no", "off", ""}
-
 DEFAULT_BANK_KEYWORDS = {
     "EMI": Decimal("0.95"),
     "ECS": Decimal("0.90"),
@@ -107,20 +134,52 @@ class FinanceTagConfig(Dict[str, Any]):
 
 
 def _safe_table_select(table: str, select: str = "*", **kwargs: Any) -> List[Dict[str, Any]]:
-    """Best-effort select that returns [] if a table is not available in current schema."""
+    """
+    Select that returns [] if a table is not available in current schema. Transient
+    failures (network, timeouts, overload) raise TransientDataError instead, so they
+    are never mistaken for an empty result.
+    """
     try:
-        query = sb.table(table).select(select)
-        if "eq" in kwargs:
-            for col, value in kwargs["eq"].items():
-                query = query.eq(col, value)
-        if "order" in kwargs:
-            order_col, ascending = kwargs["order"]
+        return _select_query(table, select, **kwargs).execute().data or []
+    except Exception as exc:
+        if is_transient_error(exc):
+            raise TransientDataError(f"select {table}", exc) from exc
+        return []
+
+
+def _select_query(table: str, select: str = "*", **kwargs: Any) -> Any:
+    query = sb.table(table).select(select)
+    if "eq" in kwargs:
+        for col, value in kwargs["eq"].items():
+            query = query.eq(col, value)
+    if kwargs.get("in_"):
+        for col, values in kwargs["in_"].items():
+            query = query.in_(col, list(values))
+    if "order" in kwargs:
+        orders = kwargs["order"] if isinstance(kwargs["order"], list) else [kwargs["order"]]
+        for order_col, ascending in orders:
             query = query.order(order_col, desc=not ascending)
-        if "limit" in kwargs:
-            query = query.limit(int(kwargs["limit"]))
-        resp = query.execute()
-        return resp.data or []
-    except Exception:
+    if "limit" in kwargs:
+        query = query.limit(int(kwargs["limit"]))
+    return query
+
+
+def _paged_table_select(table: str, select: str = "*", page_size: int = 1000, **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    `_safe_table_select` over every matching row: PostgREST caps a response at its
+    max-rows (1000 by default), so rows are fetched in `.range()` pages. Pass an
+    `order` that makes pages stable.
+    """
+    rows: List[Dict[str, Any]] = []
+    try:
+        while True:
+            batch = _select_query(table, select, **kwargs).range(len(rows), len(rows) + page_size - 1).execute().data or []
+            rows.extend(batch)
+            if len(batch) < page_size:
+                return rows
+    except Exception as exc:
+        if is_transient_error(exc):
+            raise TransientDataError(f"select {table}", exc) from exc
         return []
 
 
@@ -171,6 +230,8 @@ def _infer_amount_triplet(dr_text: Any, cr_text: Any, bal_text: Any, raw_text: s
 def _parse_date(value: str) -> Optional[dt.date]:
     if not value:
         return None
+    from dateutil import parser as date_parser
+
     try:
         return date_parser.parse(value, dayfirst=True).date()
     except Exception:
@@ -189,9 +250,9 @@ def _to_date_label(value: dt.date) -> str:
     return value.strftime("%d-%b-%Y").upper()
 
 
-def _classify_txn_legacy(narration: str, dr: Decimal, cr: Decimal) -> str:
+def _classify_txn_legacy(narration: str, dr: Decimal, cr: Decimal, upper_text: Optional[str] = None) -> str:
     """Existing category logic remains intact; finance_tag is additive."""
-    text = (narration or "").upper()
+    text = upper_text if upper_text is not None else (narration or "").upper()
     if any(k in text for k in ["RETURN", "RTN", "BOUNCE"]):
         return "RETURN"
     if any(k in text for k in ["EMI", "LOAN", "INTEREST", "OD INTEREST", "BANK CHARGES"]):
@@ -223,15 +284,20 @@ def _hash_uid(parts: Iterable[Any]) -> str:
     return hashlib.sha1(source.encode("utf-8")).hexdigest()
 
 
-def _normalize_text(value: str) -> str:
-    t = str(value or "").upper()
+@lru_cache(maxsize=65536)
+def _normalize_text_cached(value: str) -> str:
+    t = value.upper()
     t = NON_ALNUM_RE.sub(" ", t)
     t = SPACE_RE.sub(" ", t).strip()
     return t
 
 
-def _normalize_counterparty(narration: str) -> str:
-    text = _normalize_text(narration)
+def _normalize_text(value: str) -> str:
+    return _normalize_text_cached(str(value or ""))
+
+
+def _counterparty_from_text(text: str) -> str:
+    """Counterparty key from already-normalized narration text."""
     if not text:
         return "UNKNOWN"
     tokens = [t for t in text.split(" ") if len(t) >= 3]
@@ -240,6 +306,10 @@ def _normalize_counterparty(narration: str) -> str:
     return " ".join(tokens[:3])
 
 
+def _normalize_counterparty(narration: str) -> str:
+    return _counterparty_from_text(_normalize_text(narration))
+
+
 def _build_monthly_aggregates(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
     for row in rows:
@@ -322,6 +392,8 @@ def _continuity_failures(rows: List[Dict[str, Any]]) -> int:
 
 
 def _choose_template_sheets(template_path: str) -> Tuple[List[str], List[str]]:
+    from openpyxl import load_workbook
+
     wb = load_workbook(template_path, read_only=True)
     sheet_names = wb.sheetnames
     wb.close()
@@ -344,6 +416,101 @@ def _upsert_storage_file(path: str, local_file_path: str, content_type: str) ->
         bucket.upload(path, f, {"content-type": content_type, "upsert": "true"})
 
 
+def _upsert_storage_bytes(path: str, data: bytes, content_type: str) -> None:
+    bucket = sb.storage.from_(settings.bucket)
+    try:
+        bucket.remove([path])
+    except Exception:
+        pass
+    bucket.upload(path, data, {"content-type": content_type, "upsert": "true"})
+
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _insert_page_stats(rows: List[Dict[str, Any]]) -> None:
+    try:
+        _batch_insert("pdf_page_stats", rows, size=200)
+    except Exception:
+        # Flight recorder only; pdf_page_stats may not be migrated yet.
+        pass
+
+
+def _raw_lines_storage() -> str:
+    """`rows` writes one raw_statement_lines row per line; `blob` writes a Parquet object per PDF plus a raw_line_blobs row."""
+    mode = os.environ.get("STATEMENT_RAW_LINES_STORAGE", "rows").strip().lower()
+    return mode if mode in ("rows", "blob") else "rows"
+
+
+def _store_raw_lines(
+    version_id: str,
+    parse_hash: str,
+    raw_lines_all: List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]],
+    mode: str,
+) -> None:
+    if mode == "rows":
+        _batch_insert("raw_statement_lines", [row for _, _, raw_rows in raw_lines_all for row in raw_rows], size=1000)
+        return
+    index_rows = []
+    for pdf, _, raw_rows in raw_lines_all:
+        path = raw_lines_path(version_id, parse_hash, pdf["id"])
+        blob = encode_raw_lines(raw_rows)
+        _upsert_storage_bytes(path, blob, "application/vnd.apache.parquet")
+        index_rows.append(raw_line_index_row(version_id, pdf["id"], parse_hash, raw_rows, path, len(blob)))
+    _batch_insert("raw_line_blobs", index_rows)
+
+
+def _workbook_mode() -> str:
+    """`eager` builds the workbook in every parse; `lazy` records its inputs and builds on first download."""
+    mode = os.environ.get("STATEMENT_WORKBOOK_MODE", "eager").strip().lower()
+    return mode if mode in ("eager", "lazy") else "eager"
+
+
+def _workbook_cache_path(version_id: str, parse_hash: str) -> str:
+    return f"workbooks/{version_id}/{parse_hash}/underwriting_workbook.xlsx"
+
+
+def _workbook_inputs_path(version_id: str, parse_hash: str) -> str:
+    return f"workbooks/{version_id}/{parse_hash}/inputs.json.gz"
+
+
+def _record_workbook(
+    lead_id: Optional[str],
+    statement_id: Any,
+    version_id: str,
+    parse_hash: str,
+    storage_path: str,
+    meta_json: Dict[str, Any],
+) -> None:
+    try:
+        _batch_upsert(
+            "statement_underwriting_workbooks",
+            [
+                {
+                    "lead_id": lead_id,
+                    "statement_id": statement_id,
+                    "version_id": version_id,
+                    "parse_hash": parse_hash,
+                    "storage_path": storage_path,
+                    "meta_json": meta_json,
+                }
+            ],
+            on_conflict="version_id,parse_hash",
+            size=100,
+        )
+    except Exception:
+        pass
+
+
+def _write_snapshot(path: str, transactions: List[Dict[str, Any]], metadata: Dict[str, str]) -> Optional[str]:
+    # Analytics artifact only: a missing pyarrow or failed upload must not fail the parse.
+    try:
+        _upsert_storage_bytes(path, encode_snapshot(transactions, metadata), "application/vnd.apache.parquet")
+    except Exception:
+        return None
+    return path
+
+
 def _to_inr_compact(value: Decimal) -> str:
     n = float(value)
     abs_n = abs(n)
@@ -424,6 +591,35 @@ def _load_finance_tag_config() -> FinanceTagConfig:
     return cfg
 
 
+_tag_config_cache: Dict[str, Any] = {"config": None, "loaded_at": 0.0}
+_tag_config_lock = threading.Lock()
+
+
+def _cached_finance_tag_config(max_age_s: Optional[float] = None) -> FinanceTagConfig:
+    """
+    Tag config for a job. Reloaded every time by default, so config edits apply
+    to the next job; STATEMENT_TAG_CONFIG_TTL_S > 0 reuses a loaded copy for that
+    many seconds. The last copy is kept either way, for transient Supabase failures.
+    """
+    if max_age_s is None:
+        max_age_s = float(os.environ.get("STATEMENT_TAG_CONFIG_TTL_S", "0"))
+    with _tag_config_lock:
+        cached = _tag_config_cache["config"]
+        if cached is not None and time.monotonic() - _tag_config_cache["loaded_at"] < max_age_s:
+            return cached
+    try:
+        cfg = _load_finance_tag_config()
+    except TransientDataError:
+        # A stale config beats failing the job; an empty one would mis-tag every transaction.
+        if cached is None:
+            raise
+        return cached
+    with _tag_config_lock:
+        _tag_config_cache["config"] = cfg
+        _tag_config_cache["loaded_at"] = time.monotonic()
+    return cfg
+
+
 def _score_keyword_hits(text: str, keyword_weights: Dict[str, Decimal]) -> Tuple[Decimal, List[str]]:
     score = Decimal("0")
     reasons: List[str] = []
@@ -434,6 +630,33 @@ def _score_keyword_hits(text: str, keyword_weights: Dict[str, Decimal]) -> Tuple
     return score, reasons
 
 
+def _txn_features(narration: str, dr: Decimal, cr: Decimal, config: FinanceTagConfig) -> Dict[str, Any]:
+    """
+    Single pass over a merged narration.
+    Every later stage (category, counterparty, finance tags, risk) reads these
+    instead of re-normalizing and re-scanning the text.
+    """
+    upper = (narration or "").upper()
+    text = _normalize_text(narration)
+    pvt_kw_score, pvt_kw_reasons = _score_keyword_hits(text, config["pvt_keywords"])
+    bank_kw_score, bank_kw_reasons = _score_keyword_hits(text, config["bank_keywords"])
+    return {
+        "text": text,
+        "counterparty": _counterparty_from_text(text),
+        "category": _classify_txn_legacy(narration, dr, cr, upper_text=upper),
+        "false_positive": any(pattern and pattern in text for pattern in config["false_patterns"]),
+        "pvt_entity": any(entity and entity in text for entity in config["pvt_entities"]),
+        "bank_entity": any(entity and entity in text for entity in config["bank_entities"]),
+        "pvt_kw_score": pvt_kw_score,
+        "pvt_kw_reasons": pvt_kw_reasons,
+        "bank_kw_score": bank_kw_score,
+        "bank_kw_reasons": bank_kw_reasons,
+        "emi_pattern": "EMI" in text or "ECS" in text or "NACH" in text or "ACH" in text,
+        "disbursal_kw": "DISBURS" in text or "LOAN" in text,
+        "bounce": "BOUNCE" in text,
+    }
+
+
 def _within_days(a: dt.date, b: dt.date, window: int) -> bool:
     return abs((a - b).days) <= window
 
@@ -463,10 +686,27 @@ def _apply_finance_tags(rows: List[Dict[str, Any]], config: FinanceTagConfig) ->
             if amt > 0 and amt <= small_ticket_max:
                 by_counterparty_small_tickets[cp] += 1
 
+    # Per-counterparty date lists and weekly-gap counts do not depend on the row
+    # being scored, so compute them once instead of once per row.
+    sorted_cp_dates: Dict[str, List[dt.date]] = defaultdict(list)
+    weekly_gap_hits_by_cp: Counter[str] = Counter()
+    for cp, dates in by_counterparty_dates.items():
+        cp_dates = sorted(dates)
+        sorted_cp_dates[cp] = cp_dates
+        for i in range(1, len(cp_dates)):
+            gap = (cp_dates[i] - cp_dates[i - 1]).days
+            if 6 <= gap <= 9 or 13 <= gap <= 16:
+                weekly_gap_hits_by_cp[cp] += 1
+
     sorted_rows = sorted(rows, key=lambda r: (r["txn_date"], r["row_index"]))
 
     for row in sorted_rows:
-        text = _normalize_text(row.get("narration") or "")
+        features = row.get("features")
+        if features is None:
+            dr = _safe_decimal(row.get("dr") or 0)
+            cr = _safe_decimal(row.get("cr") or 0)
+            features = _txn_features(row.get("narration") or "", dr, cr, config)
+            row["features"] = features
         cp = str(row.get("counterparty_norm") or "UNKNOWN")
         amount = _safe_decimal(row.get("amount") or 0)
         txn_date = row.get("txn_date")
@@ -475,43 +715,36 @@ def _apply_finance_tags(rows: List[Dict[str, Any]], config: FinanceTagConfig) ->
         bank_score = Decimal("0")
         reasons: List[str] = []
 
-        if any(pattern and pattern in text for pattern in config["false_patterns"]):
+        if features["false_positive"]:
             row["finance_tag"] = None
             row["tag_confidence"] = 0.0
             row["tag_reason_codes"] = ["FALSE_POSITIVE_PATTERN"]
             continue
 
         # Entity signals
-        if any(entity and entity in text for entity in config["pvt_entities"]):
+        if features["pvt_entity"]:
             pvt_score += Decimal("1.40")
             reasons.append("PVT_ENTITY")
-        if any(entity and entity in text for entity in config["bank_entities"]):
+        if features["bank_entity"]:
             bank_score += Decimal("1.55")
             reasons.append("BANK_ENTITY")
 
         # Keyword scores
-        s, kw_reasons = _score_keyword_hits(text, config["pvt_keywords"])
-        pvt_score += s
-        reasons.extend([f"PVT_{r}" for r in kw_reasons])
+        pvt_score += features["pvt_kw_score"]
+        reasons.extend([f"PVT_{r}" for r in features["pvt_kw_reasons"]])
 
-        s, kw_reasons = _score_keyword_hits(text, config["bank_keywords"])
-        bank_score += s
-        reasons.extend([f"BANK_{r}" for r in kw_reasons])
+        bank_score += features["bank_kw_score"]
+        reasons.extend([f"BANK_{r}" for r in features["bank_kw_reasons"]])
 
         # Cadence/repetition signals for pvt
         if isinstance(txn_date, dt.date):
-            cp_dates = sorted(by_counterparty_dates.get(cp, []))
+            cp_dates = sorted_cp_dates[cp]
             near_hits = sum(1 for d in cp_dates if _within_days(d, txn_date, weekly_window_days))
             if near_hits >= weekly_min_hits:
                 pvt_score += Decimal("0.65")
                 reasons.append("REPEAT_30D")
 
-            weekly_gap_hits = 0
-            for i in range(1, len(cp_dates)):
-                gap = (cp_dates[i] - cp_dates[i - 1]).days
-                if 6 <= gap <= 9 or 13 <= gap <= 16:
-                    weekly_gap_hits += 1
-            if weekly_gap_hits >= max(1, weekly_min_hits - 1):
+            if weekly_gap_hits_by_cp[cp] >= max(1, weekly_min_hits - 1):
                 pvt_score += Decimal("0.70")
                 reasons.append("WEEKLY_CADENCE")
 
@@ -524,12 +757,12 @@ def _apply_finance_tags(rows: List[Dict[str, Any]], config: FinanceTagConfig) ->
             reasons.append("HF_SMALL_TICKET")
 
         # Bank EMI regularity signals
-        if "EMI" in text or "ECS" in text or "NACH" in text or "ACH" in text:
+        if features["emi_pattern"]:
             bank_score += Decimal("0.55")
             reasons.append("EMI_PATTERN")
 
         # Disbursal/inflow patterns for bank financing
-        if row.get("cr", 0) > 0 and ("DISBURS" in text or "LOAN" in text):
+        if row.get("cr", 0) > 0 and features["disbursal_kw"]:
             bank_score += Decimal("0.50")
             reasons.append("BANK_DISBURSAL")
 
@@ -558,6 +791,13 @@ def _apply_finance_tags(rows: List[Dict[str, Any]], config: FinanceTagConfig) ->
     return rows
 
 
+def _row_has_bounce(row: Dict[str, Any]) -> bool:
+    features = row.get("features")
+    if features is not None:
+        return bool(features["bounce"])
+    return "BOUNCE" in _normalize_text(row.get("narration") or "")
+
+
 def _compute_risk_summary(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
     total_debits = sum(_safe_decimal(r.get("dr") or 0) for r in rows)
     pvt_debits = sum(_safe_decimal(r.get("dr") or 0) for r in rows if r.get("finance_tag") == "PVT_FIN")
@@ -578,7 +818,7 @@ def _compute_risk_summary(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
     weekly_repetition = any("WEEKLY_CADENCE" in (r.get("tag_reason_codes") or []) for r in rows)
     emi_miss = any(
         (r.get("finance_tag") == "BANK_FIN")
-        and ("RETURN" in str(r.get("category") or "").upper() or "BOUNCE" in _normalize_text(r.get("narration") or ""))
+        and ("RETURN" in str(r.get("category") or "").upper() or _row_has_bounce(r))
         for r in rows
     )
     bank_emi_counterparties = {
@@ -663,10 +903,353 @@ def _update_version(version_id: str, payload: Dict[str, Any]) -> None:
         sb.table("statement_versions").update(legacy_keys).eq("id", version_id).execute()
 
 
+def _warm_up() -> None:
+    """Preload heavy modules, the template and tag config; failures only cost the warm-up."""
+    try:
+        import pdfplumber  # noqa: F401
+        from dateutil import parser as _date_parser  # noqa: F401
+
+        from .excel import generate  # noqa: F401
+
+        template_path = settings.template_path
+        if env_flag("STATEMENT_WORKBOOK_ENABLED", True) and Path(template_path).exists():
+            _choose_template_sheets(template_path)
+        _cached_finance_tag_config(max_age_s=0)
+    except Exception:
+        pass
+
+
+@app.on_event("startup")
+def _schedule_warm_up() -> None:
+    # Scratch left behind by processes that were killed (e.g. cancelled extraction workers).
+    sweep_orphans()
+    # Runs in a daemon thread so uvicorn binds the port without waiting on it.
+    if env_flag("STATEMENT_WARMUP_ENABLED", False):
+        threading.Thread(target=_warm_up, name="statement-warm-up", daemon=True).start()
+
+
+def _raw_insert_rows(version_id: str, pdf_id: str, raw_lines: List[Any]) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for line in raw_lines:
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "version_id": version_id,
+                "pdf_file_id": pdf_id,
+                "page_no": line.page_no,
+                "row_no": line.row_no,
+                "raw_row_text": line.raw_row_text,
+                "raw_date_text": line.date_text,
+                "raw_narration_text": line.narration_text,
+                "raw_dr_text": line.dr_text,
+                "raw_cr_text": line.cr_text,
+                "raw_balance_text": line.bal_text,
+                "line_type": line.line_type,
+                "extraction_method": line.extraction_method,
+                "bbox_json": None,
+            }
+        )
+    return rows
+
+
+def _build_transactions(
+    version_id: str,
+    statement_id: Any,
+    raw_lines_all: List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]],
+    bank_parsers: Dict[str, BankParser],
+    tag_cfg: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Merge, date-parse and normalize every PDF's raw lines into transaction rows,
+    keeping what strict reconciliation needs: mapped raw indices, raw candidate
+    totals and the pages of merged rows that could not become transactions.
+    """
+    mapped_indices_by_pdf: Dict[str, Set[int]] = defaultdict(set)
+    skipped_pages_by_pdf: Dict[str, Set[int]] = defaultdict(set)
+    transactions_to_insert: List[Dict[str, Any]] = []
+
+    raw_txn_candidate_count = 0
+    raw_dr_total = Decimal("0")
+    raw_cr_total = Decimal("0")
+
+    row_index_global = 0
+
+    for pdf, raw_lines, inserted_rows in raw_lines_all:
+        bank_parser = bank_parsers[pdf["id"]]
+        merged = bank_parser.merge(raw_lines)
+        for merged_row in merged:
+            dr, cr, bal = _infer_amount_triplet(
+                merged_row.get("dr_text"),
+                merged_row.get("cr_text"),
+                merged_row.get("bal_text"),
+                merged_row.get("narration") or merged_row.get("raw_row_text") or "",
+            )
+            raw_txn_candidate_count += 1
+            raw_dr_total += dr
+            raw_cr_total += cr
+
+            date_text = merged_row.get("date_text", "")
+            txn_date = bank_parser.parse_date(date_text) or _parse_date(date_text)
+            raw_indices = merged_row["raw_indices"]
+            raw_ids = [inserted_rows[i]["id"] for i in raw_indices if 0 <= i < len(inserted_rows)]
+            if txn_date is None or not raw_ids:
+                skipped_pages_by_pdf[pdf["id"]].update(
+                    raw_lines[i].page_no for i in raw_indices if 0 <= i < len(raw_lines)
+                )
+                continue
+
+            for index in raw_indices:
+                mapped_indices_by_pdf[pdf["id"]].add(index)
+
+            row_index_global += 1
+            narration = (merged_row.get("narration") or "").strip() or "-"
+            features = _txn_features(narration, dr, cr, tag_cfg)
+            category = features["category"]
+            txn_type = _txn_type(dr, cr)
+            amount = max(abs(dr), abs(cr))
+            counterparty = features["counterparty"]
+
+            dedupe_hash = _hash_uid(
+                [
+                    statement_id,
+                    txn_date.isoformat(),
+                    f"{amount:.2f}",
+                    narration,
+                    f"{(bal if bal is not None else Decimal('0')):.2f}",
+                    row_index_global,
+                ]
+            )
+
+            transaction_uid = _hash_uid([version_id, dedupe_hash])
+            tx_row = {
+                "id": str(uuid.uuid4()),
+                "version_id": version_id,
+                "raw_line_ids": raw_ids,
+                "txn_date": txn_date,
+                "month_key": _month_key(txn_date),
+                "narration": narration,
+                "dr": float(dr),
+                "cr": float(cr),
+                "balance": float(bal) if bal is not None else None,
+                "counterparty_norm": counterparty,
+                "txn_type": txn_type,
+                "category": category,
+                "flags": [],
+                "transaction_uid": transaction_uid,
+                "row_index": row_index_global,
+                "amount": float(amount),
+                "dedupe_hash": dedupe_hash,
+                "pdf_file_id": pdf["id"],
+                "raw_indices": raw_indices,
+                "features": features,
+                "raw_json": {
+                    "pdf_file_id": pdf["id"],
+                    "raw_indices": raw_indices,
+                    "raw_line_refs": raw_line_refs(raw_lines, raw_indices),
+                    "date_text": merged_row.get("date_text"),
+                    "dr_text": merged_row.get("dr_text"),
+                    "cr_text": merged_row.get("cr_text"),
+                    "bal_text": merged_row.get("bal_text"),
+                },
+            }
+            transactions_to_insert.append(tx_row)
+
+    return {
+        "transactions": transactions_to_insert,
+        "mapped_indices_by_pdf": mapped_indices_by_pdf,
+        "skipped_pages_by_pdf": skipped_pages_by_pdf,
+        "raw_txn_candidate_count": raw_txn_candidate_count,
+        "raw_dr_total": raw_dr_total,
+        "raw_cr_total": raw_cr_total,
+    }
+
+
+def _strict_reconcile(
+    build: Dict[str, Any], raw_lines_all: List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]]
+) -> Tuple[List[str], int, Dict[str, Set[int]]]:
+    """Strict reconciliation reasons, unmapped TRANSACTION line count and the pages to blame, per PDF."""
+    transactions = build["transactions"]
+    raw_txn_candidate_count = build["raw_txn_candidate_count"]
+    raw_dr_total = build["raw_dr_total"]
+    raw_cr_total = build["raw_cr_total"]
+    parsed_row_count = len(transactions)
+    parsed_dr_total = sum(_safe_decimal(tx.get("dr") or 0) for tx in transactions)
+    parsed_cr_total = sum(_safe_decimal(tx.get("cr") or 0) for tx in transactions)
+
+    unmapped_total = 0
+    suspect_pages: Dict[str, Set[int]] = {}
+    for pdf, raw_lines, _ in raw_lines_all:
+        mapped = build["mapped_indices_by_pdf"][pdf["id"]]
+        unmapped_total += reconcile_strict(raw_lines, mapped)
+        pages = unmapped_pages(raw_lines, mapped) | build["skipped_pages_by_pdf"][pdf["id"]]
+        if pages:
+            suspect_pages[pdf["id"]] = pages
+
+    strict_error_reasons: List[str] = []
+    if unmapped_total > 0:
+        strict_error_reasons.append(f"UNMAPPED_TRANSACTION_LINES:{unmapped_total}")
+    if raw_txn_candidate_count != parsed_row_count:
+        strict_error_reasons.append(
+            f"ROW_COUNT_MISMATCH:raw={raw_txn_candidate_count},parsed={parsed_row_count}"
+        )
+    if abs(raw_dr_total - parsed_dr_total) > Decimal("0.01") or abs(raw_cr_total - parsed_cr_total) > Decimal("0.01"):
+        strict_error_reasons.append(
+            f"TOTAL_MISMATCH:raw_dr={raw_dr_total},parsed_dr={parsed_dr_total},raw_cr={raw_cr_total},parsed_cr={parsed_cr_total}"
+        )
+    return strict_error_reasons, unmapped_total, suspect_pages
+
+
+def _recover_pages(
+    version_id: str,
+    statement_id: Any,
+    raw_lines_all: List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]],
+    bank_parsers: Dict[str, BankParser],
+    extraction_reports: Dict[str, ExtractionReport],
+    local_pdfs: Dict[str, PdfSource],
+    suspect_pages: Dict[str, Set[int]],
+    tag_cfg: Dict[str, Any],
+    control: Optional[JobControl] = None,
+    **engine_options: Any,
+) -> Optional[Tuple[List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]], Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+    """
+    Re-extract only the pages that failed strict reconciliation with each of the
+    PDF's recovery engines in turn (through its own bank parser, so row formats
+    never mix), splice them into the PDF's lines and reconcile again. A PDF whose
+    engines are exhausted keeps its last attempt for the remaining rounds.
+    Re-extraction runs through `_run_extraction`, so cancel and the job timeout
+    reach it. Returns the recovered lines, build and per-PDF recovery details
+    once reconciliation passes, or None if no alternate fixes it.
+    """
+    attempts = {
+        pdf_id: list(bank_parsers[pdf_id].recovery_engines(extraction_reports[pdf_id].engine)) for pdf_id in suspect_pages
+    }
+    candidate = list(raw_lines_all)
+    recovered: Dict[str, Dict[str, Any]] = {}
+    for round_no in range(max((len(engines) for engines in attempts.values()), default=0)):
+        attempted = False
+        for position, (pdf, raw_lines, raw_rows) in enumerate(candidate):
+            engines = attempts.get(pdf["id"]) or []
+            if round_no >= len(engines):
+                continue
+            engine = engines[round_no]
+            pages = sorted(suspect_pages[pdf["id"]])
+            try:
+                replacement = _run_extraction(
+                    reextract_pages_task,
+                    local_pdfs[pdf["id"]],
+                    bank_parsers[pdf["id"]],
+                    engine,
+                    pages,
+                    engine_options,
+                    control=control,
+                )
+            except JobCancelled:
+                raise
+            except Exception:
+                continue
+            spliced = splice_pages(raw_lines, replacement, pages)
+            candidate[position] = (pdf, spliced, _raw_insert_rows(version_id, pdf["id"], spliced))
+            recovered[pdf["id"]] = {"engine": engine, "pages": pages}
+            attempted = True
+        if not attempted:
+            continue
+        build = _build_transactions(version_id, statement_id, candidate, bank_parsers, tag_cfg)
+        reasons, _, _ = _strict_reconcile(build, candidate)
+        if not reasons:
+            return candidate, build, dict(recovered)
+    return None
+
+
+def _statement_accounts(raw_lines_all: List[Tuple[Dict[str, Any], List[Any], Any]]) -> Dict[str, Optional[str]]:
+    """Account identifier per PDF, read from the lines above its first transaction row."""
+    accounts: Dict[str, Optional[str]] = {}
+    for pdf, raw_lines, _ in raw_lines_all:
+        header: List[str] = []
+        for line in raw_lines:
+            if line.line_type == "TRANSACTION":
+                break
+            header.append(line.raw_row_text)
+        accounts[pdf["id"]] = statement_account(header)
+    return accounts
+
+
+def _drop_overlaps(
+    transactions: List[Dict[str, Any]], accounts: Dict[str, Optional[str]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Drop rows that an earlier PDF of the version already holds (overlapping
+    statement periods for the same account), keyed on the account printed in
+    the statement header (see _statement_accounts), date, amount, balance and
+    normalized narration. PDFs with no detected account are never deduped.
+    Returns the kept rows and the reconciliation report of what was dropped.
+    """
+    keyed = [
+        (
+            tx["pdf_file_id"],
+            overlap_key(
+                accounts[tx["pdf_file_id"]],
+                tx["txn_date"],
+                tx["amount"],
+                tx["balance"],
+                _normalize_text(tx["narration"]),
+            )
+            if accounts.get(tx["pdf_file_id"])
+            else None,
+        )
+        for tx in transactions
+    ]
+    dropped_positions = set(overlap_duplicates(keyed))
+    kept = [tx for position, tx in enumerate(transactions) if position not in dropped_positions]
+    dropped = [transactions[position] for position in sorted(dropped_positions)]
+    by_pdf: Dict[str, int] = defaultdict(int)
+    for tx in dropped:
+        by_pdf[tx["pdf_file_id"]] += 1
+    report = {
+        "rows": len(dropped),
+        "dr_total": float(sum(_safe_decimal(tx["dr"]) for tx in dropped)),
+        "cr_total": float(sum(_safe_decimal(tx["cr"]) for tx in dropped)),
+        "by_pdf": dict(by_pdf),
+        "dropped": [
+            {
+                "pdf_file_id": tx["pdf_file_id"],
+                "txn_date": tx["txn_date"].isoformat(),
+                "narration": tx["narration"],
+                "dr": tx["dr"],
+                "cr": tx["cr"],
+                "balance": tx["balance"],
+                "raw_line_refs": tx["raw_json"]["raw_line_refs"],
+            }
+            for tx in dropped
+        ],
+    }
+    return kept, report
+
+
+_stage_history_lock = threading.Lock()
+_stage_history_seeded = False
+
+
+def _seed_stage_history() -> None:
+    """Load stage timings of recent parses from audit_events once per process, so predictions survive restarts."""
+    global _stage_history_seeded
+    with _stage_history_lock:
+        if _stage_history_seeded:
+            return
+        _stage_history_seeded = True
+    rows = _safe_table_select(
+        "audit_events",
+        select="id,payload",
+        eq={"action": "PARSE_READY"},
+        order=("created_at", False),
+        limit=200,
+    )
+    seed_stage_history((str(r.get("id")), (r.get("payload") or {}).get("stage_metrics")) for r in rows)
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
     template_exists = Path(settings.template_path).exists()
-    workbook_enabled = _env_flag("STATEMENT_WORKBOOK_ENABLED", True)
+    workbook_enabled = env_flag("STATEMENT_WORKBOOK_ENABLED", True)
     workbook_active = workbook_enabled and template_exists
     return {
         "ok": True,
@@ -674,17 +1257,299 @@ def health() -> Dict[str, Any]:
         "template_exists": template_exists,
         "workbook_enabled": workbook_enabled,
         "workbook_active": workbook_active,
+        "workbook_mode": _workbook_mode(),
         "bucket": settings.bucket,
+        "scratch": scratch_usage(),
+    }
+
+
+@app.exception_handler(TransientDataError)
+def _transient_data_error(request: Any, exc: TransientDataError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+
+@app.get("/stats/http")
+def http_stats() -> Dict[str, Any]:
+    """Pooled Supabase transport: requests, retries and failures per service/method, latency percentiles."""
+    from .http_transport import transport_metrics
+
+    return transport_metrics()
+
+
+@app.get("/stats/slow_pages")
+def slow_pages(
+    limit: int = 200,
+    top: int = 20,
+    fingerprint: Optional[str] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Slowest pages and per-layout page cost over the `limit` most recently parsed PDFs."""
+    eq = {key: value for key, value in (("fingerprint", fingerprint), ("engine", engine)) if value}
+    rows = _safe_table_select(
+        "pdf_page_stats",
+        select="*",
+        eq=eq,
+        order=("created_at", False),
+        limit=max(1, min(limit, 2000)),
+    )
+    return slow_page_report(rows, top=max(1, min(top, 500)))
+
+
+@app.post("/jobs/inspect/{version_id}")
+def inspect_statement(version_id: str) -> Dict[str, Any]:
+    """Pre-flight check: page counts, text layer, ruling density, fingerprint and predicted parse time."""
+    version_rows = _safe_table_select("statement_versions", select="id", eq={"id": version_id}, limit=1)
+    if not version_rows:
+        raise HTTPException(status_code=404, detail="Statement version not found")
+
+    pdf_resp = sb.table("pdf_files").select("*").eq("version_id", version_id).order("created_at").execute()
+    pdfs = pdf_resp.data or []
+    if not pdfs:
+        raise HTTPException(status_code=404, detail="No PDFs found for this version")
+
+    _seed_stage_history()
+    engine_name = os.environ.get("STATEMENT_EXTRACTION_ENGINE", "auto").strip() or "auto"
+    pages_by_engine: Dict[str, int] = defaultdict(int)
+    results: List[Dict[str, Any]] = []
+    for pdf in pdfs:
+        storage_path = pdf.get("storage_path")
+        if not storage_path:
+            results.append({"pdf_file_id": pdf.get("id"), "error": "missing storage_path"})
+            continue
+        binary = sb.storage.from_(settings.bucket).download(storage_path)
+        try:
+            inspection = inspect_pdf(binary, engine_name=engine_name)
+        except Exception as exc:
+            # One bad PDF is reported in its own entry; the rest of the version is still inspected.
+            error = f"{type(exc).__name__}: {exc}"
+            results.append({"pdf_file_id": pdf.get("id"), "storage_path": storage_path, "error": error})
+            continue
+        pages_by_engine[inspection.engine] += inspection.page_count
+        results.append({"pdf_file_id": pdf.get("id"), "storage_path": storage_path, **inspection.to_dict()})
+
+    prediction = predict_parse_seconds(dict(pages_by_engine))
+    return {
+        "version_id": version_id,
+        "pdf_count": len(pdfs),
+        "page_count": sum(r.get("page_count") or 0 for r in results),
+        "text_pages": sum(r.get("text_pages") or 0 for r in results),
+        "scanned_pages": sum(len(r.get("scanned_pages") or []) for r in results),
+        "encrypted_pdfs": [r["pdf_file_id"] for r in results if r.get("encrypted")],
+        "unreadable_pdfs": [r["pdf_file_id"] for r in results if r.get("error")],
+        "predicted_parse_seconds": prediction["seconds"],
+        "prediction": prediction,
+        "pdfs": results,
     }
 
 
+def _run_extraction(task: Any, *args: Any, control: Optional[JobControl] = None, on_event: Any = None) -> Any:
+    """
+    Run an extraction task (`jobs.extract_pdf_task`, `jobs.reextract_pages_task`) in a
+    killable worker process, or inline for STATEMENT_EXTRACT_ISOLATION=thread and
+    profiled jobs (so the sampler sees the extraction stacks). Inline runs cannot
+    be killed; they check for cancel/timeout after every page instead.
+    """
+    isolation = os.environ.get("STATEMENT_EXTRACT_ISOLATION", "process").strip().lower()
+    if isolation == "thread" or profiling_active():
+
+        def checked(event: Any) -> None:
+            if control is not None:
+                control.check()
+            if on_event is not None:
+                on_event(event)
+
+        return task(checked, *args)
+    # Bytes sources cross the worker pipe once; spilled PDFs go as their scratch path.
+    return extraction_pool().run(task, *args, control=control, on_event=on_event)
+
+
+def _extract_pdf(
+    source: PdfSource,
+    fingerprint: Any,
+    options: Dict[str, Any],
+    control: JobControl,
+    on_page: Any,
+) -> Tuple[List[Any], ExtractionReport, BankParser]:
+    """Extract one PDF with `_run_extraction`."""
+    return _run_extraction(extract_pdf_task, source, fingerprint, options, control=control, on_event=on_page)
+
+
+def _abort_job(control: JobControl, reason: str, timed_out: bool = False) -> None:
+    """Cancel a running job (killing its extraction worker) and mark the version failed right away."""
+    if not control.cancel(reason, timed_out=timed_out):
+        return  # already finished: its final status stands
+    now_iso = dt.datetime.now(dt.timezone.utc).isoformat()
+    try:
+        _update_version(
+            control.version_id,
+            {
+                "status": "PARSE_FAILED",
+                "parse_status": "FAILED",
+                "error_reason": control.reason,
+                "parse_completed_at": now_iso,
+                "run_at": now_iso,
+            },
+        )
+    except Exception:
+        pass
+
+
+def _page_count_or_none(pdf_path: str) -> Optional[int]:
+    try:
+        return pdf_page_count(pdf_path)
+    except Exception:
+        return None
+
+
+def _profile_requested(profile: bool) -> bool:
+    if profile:
+        return True
+    rate = env_float("STATEMENT_PROFILE_SAMPLE_RATE", None, positive=True)
+    return rate is not None and random.random() < rate
+
+
+def _record_profile(version_id: str, profiler: Optional[SamplingProfiler], **info: Any) -> Optional[str]:
+    """Upload the job's profile next to the version's exports and log it in audit_events; best-effort."""
+    if profiler is None:
+        return None
+    fmt = os.environ.get("STATEMENT_PROFILE_FORMAT", "speedscope").strip().lower()
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    if fmt == "collapsed":
+        path = f"exports/{version_id}/profiles/parse_{stamp}.collapsed.txt"
+        data, content_type = profiler.to_collapsed().encode("utf-8"), "text/plain"
+    else:
+        path = f"exports/{version_id}/profiles/parse_{stamp}.speedscope.json"
+        data = json.dumps(profiler.to_speedscope(f"parse_statement {version_id}")).encode("utf-8")
+        content_type = "application/json"
+    try:
+        _upsert_storage_bytes(path, data, content_type)
+    except Exception:
+        return None
+    try:
+        sb.table("audit_events").insert(
+            {
+                "entity_type": "statement_version",
+                "entity_id": version_id,
+                "action": "PARSE_PROFILED",
+                "actor_user_id": None,
+                "payload": {"profile_path": path, "format": fmt, **profiler.summary(), **info},
+            }
+        ).execute()
+    except Exception:
+        pass
+    return path
+
+
 @app.post("/jobs/parse_statement/{version_id}")
-def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
+def parse_statement(version_id: str, force: bool = False, profile: bool = False) -> Dict[str, Any]:
+    job = progress_bus.start(version_id, version_id=version_id, force=force)
+    profiler: Optional[SamplingProfiler] = None
+    interval_s = (env_float("STATEMENT_PROFILE_INTERVAL_MS", 5.0, positive=True) or 5.0) / 1000.0
+    timeout_s = env_float("STATEMENT_JOB_TIMEOUT_S", 1800.0, positive=True)
+    control = JobControl(version_id, timeout_s=timeout_s)
+    register_job(control)
+    # Fires even while the job is blocked outside extraction (e.g. a hung DB call).
+    watchdog = threading.Timer(timeout_s, _abort_job, (control, f"Parse job timed out after {timeout_s:g}s", True)) if timeout_s else None
+    if watchdog is not None:
+        watchdog.daemon = True
+        control.watchdog = watchdog
+        watchdog.start()
+    try:
+        profiling = profile_job(interval_s) if _profile_requested(profile) else nullcontext()
+        with ScratchSpace("parse") as scratch, profiling as profiler:
+            result = _parse_statement(version_id, force, job, control, scratch)
+    except HTTPException as exc:
+        profile_path = _record_profile(version_id, profiler, status_code=exc.status_code)
+        job.finish("failed", status_code=exc.status_code, detail=exc.detail, profile_path=profile_path)
+        raise
+    except Exception as exc:
+        profile_path = _record_profile(version_id, profiler, status_code=500)
+        job.finish("failed", status_code=500, detail=str(exc), profile_path=profile_path)
+        raise
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        unregister_job(control)
+    profile_path = _record_profile(version_id, profiler, status=result.get("status"))
+    if profile_path:
+        result["profile_path"] = profile_path
+    job.finish(
+        "done" if result.get("status") == "READY" else "failed",
+        status=result.get("status"),
+        idempotent=bool(result.get("idempotent")),
+        reasons=result.get("reasons"),
+        transactions=result.get("parsed_row_count"),
+        profile_path=profile_path,
+    )
+    return result
+
+
+@app.get("/jobs/parse_statement/{version_id}/events")
+async def parse_statement_events(
+    version_id: str,
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of a parse job: `started`, `stage` (StageClock laps
+    with running totals), `pdf`, `page` (pages done/total, rows so far),
+    `tail_stage`, then `done` or `failed`. Finished jobs replay and close; the
+    stream may be opened before the POST that starts the job.
+    """
+    try:
+        after = int(last_event_id or 0)
+    except ValueError:
+        after = 0
+    heartbeat_s = env_float("STATEMENT_PROGRESS_HEARTBEAT_S", 15.0, positive=True) or 15.0
+    idle_timeout_s = env_float("STATEMENT_PROGRESS_IDLE_TIMEOUT_S", 600.0, positive=True)
+
+    # An async generator: open streams wait on the event loop, not on threadpool threads.
+    async def stream() -> AsyncIterator[str]:
+        yield f"retry: {int(heartbeat_s * 1000)}\n\n"
+        async for event in progress_bus.subscribe_async(
+            version_id, after, heartbeat_s=heartbeat_s, idle_timeout_s=idle_timeout_s
+        ):
+            yield event.to_sse() if event is not None else ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/jobs/{version_id}")
+def parse_job_status(version_id: str) -> Dict[str, Any]:
+    """Scheduling state of the parse running on this instance: lane, cost, queue position or time waited."""
+    status = job_scheduler().status(version_id)
+    if status is None:
+        controls = running_jobs(version_id)
+        if not controls:
+            raise HTTPException(status_code=404, detail="No running parse job for this version on this instance")
+        # Past extraction: the slot is released but the job is still finishing.
+        status = {"version_id": version_id, "state": "running", **controls[0].info}
+    return status
+
+
+@app.delete("/jobs/{version_id}")
+def cancel_parse_job(version_id: str) -> Dict[str, Any]:
+    """Cancel the parse of `version_id` running on this instance: its worker is killed and the version marked PARSE_FAILED."""
+    controls = running_jobs(version_id)
+    if not controls:
+        raise HTTPException(status_code=404, detail="No running parse job for this version on this instance")
+    for control in controls:
+        _abort_job(control, "Parse job cancelled by request")
+    return {"version_id": version_id, "status": "PARSE_FAILED", "cancelled": len(controls), "reason": controls[0].reason}
+
+
+def _parse_statement(
+    version_id: str, force: bool, job: ProgressJob, control: JobControl, scratch: ScratchSpace
+) -> Dict[str, Any]:
     now = dt.datetime.now(dt.timezone.utc)
     now_iso = now.isoformat()
     template_exists = Path(settings.template_path).exists()
-    workbook_enabled = _env_flag("STATEMENT_WORKBOOK_ENABLED", True)
+    workbook_enabled = env_flag("STATEMENT_WORKBOOK_ENABLED", True)
     workbook_active = workbook_enabled and template_exists
+    workbook_lazy = workbook_active and _workbook_mode() == "lazy"
     workbook_skip_reason: Optional[str] = None
     if not workbook_enabled:
         workbook_skip_reason = "Workbook generation disabled by STATEMENT_WORKBOOK_ENABLED"
@@ -719,9 +1584,11 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
         and str(version_row.get("parse_status") or "").upper() == "SUCCESS"
         and (
             not workbook_active
+            or workbook_lazy
             or (version_row.get("underwriting_workbook_url") or version_row.get("excel_url"))
         )
     ):
+        control.finalize()
         return {
             "status": "READY",
             "idempotent": True,
@@ -751,10 +1618,16 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
         },
     )
 
+    def on_lap(name: str, seconds: float) -> None:
+        job.stage(name, seconds)
+        control.check()
+
+    clock = StageClock(on_lap=on_lap)
     try:
         # Keep re-runs deterministic and idempotent.
         for table in [
             "raw_statement_lines",
+            "raw_line_blobs",
             "transactions",
             "aggregates_monthly",
             "pivots",
@@ -765,177 +1638,114 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
             except Exception:
                 pass
 
-        tmp_dir = tempfile.mkdtemp(prefix=f"stmt_{version_id}_")
-        tag_cfg = _load_finance_tag_config()
+        clock.lap("reset")
+        tag_cfg = _cached_finance_tag_config()
 
         raw_lines_all: List[Tuple[Dict[str, Any], List[Any], List[Dict[str, Any]]]] = []
-        all_raw_insert_rows: List[Dict[str, Any]] = []
-
+        local_pdfs: Dict[str, PdfSource] = {}
+        extraction_reports: Dict[str, ExtractionReport] = {}
+        bank_parsers: Dict[str, BankParser] = {}
+        extract_metrics: List[Dict[str, Any]] = []
+        page_budget_s = env_float("STATEMENT_PAGE_TABLE_BUDGET_S", 8.0, positive=True)
+        max_page_edges = env_int("STATEMENT_PAGE_MAX_EDGES", 5000, positive=True)
+        engine_name = os.environ.get("STATEMENT_EXTRACTION_ENGINE", "auto").strip() or "auto"
+        shard_pages = env_int("STATEMENT_SHARD_PAGES", None, positive=True)
+        shard_min_pages = env_int("STATEMENT_SHARD_MIN_PAGES", 200, positive=True)
+
+        # Download everything first: page counts and sizes price the job for the scheduler.
+        # PDFs are parsed from the downloaded bytes; only very large ones are spilled to scratch.
+        spill_bytes = int((env_float("STATEMENT_PDF_SPILL_MB", 64.0, positive=True) or 0.0) * 1024 * 1024)
+        page_counts: List[Optional[int]] = []
+        sizes: List[int] = []
         for pdf in pdfs:
             storage_path = pdf.get("storage_path")
             if not storage_path:
                 raise HTTPException(status_code=400, detail=f"PDF {pdf.get('id')} missing storage_path")
 
             binary = sb.storage.from_(settings.bucket).download(storage_path)
-            local_pdf = os.path.join(tmp_dir, f"{pdf['id']}.pdf")
-            with open(local_pdf, "wb") as f:
-                f.write(binary)
-
-            raw_lines = extract_raw_lines_pdfplumber(local_pdf)
-            raw_insert_rows: List[Dict[str, Any]] = []
-            for line in raw_lines:
-                raw_id = str(uuid.uuid4())
-                row = {
-                    "id": raw_id,
-                    "version_id": version_id,
-                    "pdf_file_id": pdf["id"],
-                    "page_no": line.page_no,
-                    "row_no": line.row_no,
-                    "raw_row_text": line.raw_row_text,
-                    "raw_date_text": line.date_text,
-                    "raw_narration_text": line.narration_text,
-                    "raw_dr_text": line.dr_text,
-                    "raw_cr_text": line.cr_text,
-                    "raw_balance_text": line.bal_text,
-                    "line_type": line.line_type,
-                    "extraction_method": line.extraction_method,
-                    "bbox_json": None,
-                }
-                raw_insert_rows.append(row)
-                all_raw_insert_rows.append(row)
-
-            raw_lines_all.append((pdf, raw_lines, raw_insert_rows))
-
-        _batch_insert("raw_statement_lines", all_raw_insert_rows, size=1000)
-
-        mapped_indices_by_pdf: Dict[str, Set[int]] = defaultdict(set)
-        transactions_to_insert: List[Dict[str, Any]] = []
-        excel_txns_by_pdf: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-
-        raw_txn_candidate_count = 0
-        raw_dr_total = Decimal("0")
-        raw_cr_total = Decimal("0")
-
-        row_index_global = 0
+            source: PdfSource = binary
+            if spill_bytes and len(binary) > spill_bytes:
+                source = scratch.write(f"{pdf['id']}.pdf", binary)
+            local_pdfs[pdf["id"]] = source
+            page_counts.append(_page_count_or_none(source))
+            sizes.append(len(binary))
+            del binary
+        clock.lap("download")
+
+        scheduler = job_scheduler()
+        cost = estimate_cost(page_counts, sizes)
+        job.publish("queued", lane=scheduler.lane_for(cost), cost_pages=cost)
+        ticket = scheduler.acquire(version_id, cost, lead_id=statement_row.get("lead_id"), control=control)
+        scheduling = {"lane": ticket.lane, "cost_pages": cost, "waited_s": round(ticket.waited_s(), 3)}
+        control.info.update(scheduling)
+        job.publish("admitted", **scheduling)
+        clock.lap("queue")
+        try:
+            for index, pdf in enumerate(pdfs):
+                source = local_pdfs[pdf["id"]]
+                job.pdf_started(pdf["id"], index, len(pdfs), page_counts[index])
 
-        for pdf, raw_lines, inserted_rows in raw_lines_all:
-            merged = merge_multiline_transactions(raw_lines)
-            for merged_row in merged:
-                dr, cr, bal = _infer_amount_triplet(
-                    merged_row.get("dr_text"),
-                    merged_row.get("cr_text"),
-                    merged_row.get("bal_text"),
-                    merged_row.get("narration") or merged_row.get("raw_row_text") or "",
+                fingerprint = fingerprint_pdf(source)
+                raw_lines, report, bank_parser = _extract_pdf(
+                    source,
+                    fingerprint,
+                    {
+                        "engine_name": engine_name,
+                        "page_budget_s": page_budget_s,
+                        "max_page_edges": max_page_edges,
+                        "shard_pages": shard_pages,
+                        "shard_min_pages": shard_min_pages,
+                    },
+                    control,
+                    partial(job.page, pdf["id"]),
                 )
-                raw_txn_candidate_count += 1
-                raw_dr_total += dr
-                raw_cr_total += cr
-
-                txn_date = _parse_date(merged_row.get("date_text", ""))
-                if txn_date is None:
-                    continue
-
-                raw_indices = merged_row["raw_indices"]
-                raw_ids = [inserted_rows[i]["id"] for i in raw_indices if 0 <= i < len(inserted_rows)]
-                if not raw_ids:
-                    continue
-
-                for index in raw_indices:
-                    mapped_indices_by_pdf[pdf["id"]].add(index)
-
-                row_index_global += 1
-                narration = (merged_row.get("narration") or "").strip() or "-"
-                category = _classify_txn_legacy(narration, dr, cr)
-                txn_type = _txn_type(dr, cr)
-                amount = max(abs(dr), abs(cr))
-                counterparty = _normalize_counterparty(narration)
-
-                dedupe_hash = _hash_uid(
-                    [
-                        statement_id,
-                        txn_date.isoformat(),
-                        f"{amount:.2f}",
-                        narration,
-                        f"{(bal if bal is not None else Decimal('0')):.2f}",
-                        row_index_global,
-                    ]
+                bank_parsers[pdf["id"]] = bank_parser
+                extraction_reports[pdf["id"]] = report
+                extract_metrics.append(
+                    {"engine": report.engine, "pages": len(report.pages), "seconds": round(clock.lap("extract"), 4)}
                 )
-
-                transaction_uid = _hash_uid([version_id, dedupe_hash])
-                tx_row = {
-                    "id": str(uuid.uuid4()),
-                    "version_id": version_id,
-                    "raw_line_ids": raw_ids,
-                    "txn_date": txn_date,
-                    "month_key": _month_key(txn_date),
-                    "narration": narration,
-                    "dr": float(dr),
-                    "cr": float(cr),
-                    "balance": float(bal) if bal is not None else None,
-                    "counterparty_norm": counterparty,
-                    "txn_type": txn_type,
-                    "category": category,
-                    "flags": [],
-                    "transaction_uid": transaction_uid,
-                    "row_index": row_index_global,
-                    "amount": float(amount),
-                    "dedupe_hash": dedupe_hash,
-                    "pdf_file_id": pdf["id"],
-                    "raw_indices": raw_indices,
-                    "raw_json": {
-                        "pdf_file_id": pdf["id"],
-                        "raw_indices": raw_indices,
-                        "date_text": merged_row.get("date_text"),
-                        "dr_text": merged_row.get("dr_text"),
-                        "cr_text": merged_row.get("cr_text"),
-                        "bal_text": merged_row.get("bal_text"),
-                    },
-                }
-                transactions_to_insert.append(tx_row)
-
-        transactions_to_insert = _apply_finance_tags(transactions_to_insert, tag_cfg)
-
-        for tx in transactions_to_insert:
-            txn_date = tx["txn_date"]
-            excel_txns_by_pdf[tx["pdf_file_id"]].append(
-                {
-                    "date": txn_date,
-                    "date_label": _to_date_label(txn_date),
-                    "month_label": _month_label(txn_date),
-                    "txn_type": tx.get("txn_type", ""),
-                    "ref_no": "",
-                    "category": tx.get("category", ""),
-                    "narration": tx.get("narration", ""),
-                    "dr": float(tx.get("dr") or 0),
-                    "cr": float(tx.get("cr") or 0),
-                    "balance": float(tx.get("balance") or 0),
-                    "finance_tag": tx.get("finance_tag"),
-                    "tag_confidence": tx.get("tag_confidence") or 0.0,
-                    "reason_codes": ", ".join(tx.get("tag_reason_codes") or []),
-                }
+                raw_lines_all.append((pdf, raw_lines, _raw_insert_rows(version_id, pdf["id"], raw_lines)))
+        finally:
+            scheduler.release(ticket)
+
+        build = _build_transactions(version_id, statement_id, raw_lines_all, bank_parsers, tag_cfg)
+        strict_error_reasons, unmapped_total, suspect_pages = _strict_reconcile(build, raw_lines_all)
+        recovered_pages: Dict[str, Dict[str, Any]] = {}
+        if strict_error_reasons and suspect_pages and env_flag("STATEMENT_PAGE_RECOVERY_ENABLED", True):
+            recovery = _recover_pages(
+                version_id,
+                statement_id,
+                raw_lines_all,
+                bank_parsers,
+                extraction_reports,
+                local_pdfs,
+                suspect_pages,
+                tag_cfg,
+                control,
+                page_budget_s=page_budget_s,
+                max_page_edges=max_page_edges,
             )
-
+            if recovery is not None:
+                raw_lines_all, build, recovered_pages = recovery
+                strict_error_reasons, unmapped_total = [], 0
+        clock.lap("transactions")
+
+        raw_lines_mode = _raw_lines_storage()
+        _store_raw_lines(version_id, parse_hash, raw_lines_all, raw_lines_mode)
+        clock.lap("raw_insert")
+
+        page_stats_rows = [
+            page_stats_row(version_id, pdf_id, parse_hash, report, bank_parsers[pdf_id].fingerprint.key)
+            for pdf_id, report in extraction_reports.items()
+        ]
+        raw_txn_candidate_count = build["raw_txn_candidate_count"]
+        transactions_to_insert = build["transactions"]
         parsed_row_count = len(transactions_to_insert)
         parsed_dr_total = sum(_safe_decimal(tx.get("dr") or 0) for tx in transactions_to_insert)
         parsed_cr_total = sum(_safe_decimal(tx.get("cr") or 0) for tx in transactions_to_insert)
-
-        unmapped_total = 0
-        for pdf, raw_lines, _ in raw_lines_all:
-            unmapped_total += reconcile_strict(raw_lines, mapped_indices_by_pdf[pdf["id"]])
-
-        strict_error_reasons: List[str] = []
-        if unmapped_total > 0:
-            strict_error_reasons.append(f"UNMAPPED_TRANSACTION_LINES:{unmapped_total}")
-        if raw_txn_candidate_count != parsed_row_count:
-            strict_error_reasons.append(
-                f"ROW_COUNT_MISMATCH:raw={raw_txn_candidate_count},parsed={parsed_row_count}"
-            )
-        if abs(raw_dr_total - parsed_dr_total) > Decimal("0.01") or abs(raw_cr_total - parsed_cr_total) > Decimal("0.01"):
-            strict_error_reasons.append(
-                f"TOTAL_MISMATCH:raw_dr={raw_dr_total},parsed_dr={parsed_dr_total},raw_cr={raw_cr_total},parsed_cr={parsed_cr_total}"
-            )
-
         if strict_error_reasons:
+            control.finalize()
+            _insert_page_stats(page_stats_rows)
             _update_version(
                 version_id,
                 {
@@ -957,34 +1767,74 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
                 "unmapped": unmapped_total,
                 "raw_row_count": raw_txn_candidate_count,
                 "parsed_row_count": parsed_row_count,
+                "suspect_pages": {pdf_id: sorted(pages) for pdf_id, pages in suspect_pages.items()},
             }
 
-        _batch_insert(
-            "transactions",
-            [
+        # Strict checks ran on every merged row; overlaps are dropped after them, and
+        # raw_row_count - parsed_row_count is exactly the overlap report's row count.
+        overlap = {"rows": 0, "dr_total": 0.0, "cr_total": 0.0, "by_pdf": {}, "dropped": []}
+        if len(raw_lines_all) > 1 and env_flag("STATEMENT_OVERLAP_DEDUPE", True):
+            transactions_to_insert, overlap = _drop_overlaps(transactions_to_insert, _statement_accounts(raw_lines_all))
+            parsed_row_count = len(transactions_to_insert)
+            parsed_dr_total = sum(_safe_decimal(tx.get("dr") or 0) for tx in transactions_to_insert)
+            parsed_cr_total = sum(_safe_decimal(tx.get("cr") or 0) for tx in transactions_to_insert)
+        reconciliation = {
+            "raw_row_count": raw_txn_candidate_count,
+            "overlap_dropped": overlap,
+            "parsed_row_count": parsed_row_count,
+        }
+        clock.lap("dedupe")
+
+        excel_txns_by_pdf: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        transactions_to_insert = _apply_finance_tags(transactions_to_insert, tag_cfg)
+
+        for tx in transactions_to_insert:
+            txn_date = tx["txn_date"]
+            excel_txns_by_pdf[tx["pdf_file_id"]].append(
                 {
-                    "id": tx["id"],
-                    "version_id": version_id,
-                    "raw_line_ids": tx["raw_line_ids"],
-                    "txn_date": tx["txn_date"].isoformat(),
-                    "month_key": tx["month_key"],
-                    "narration": tx["narration"],
-                    "dr": tx["dr"],
-                    "cr": tx["cr"],
-                    "balance": tx["balance"],
-                    "counterparty_norm": tx["counterparty_norm"],
-                    "txn_type": tx["txn_type"],
-                    "category": tx["category"],
-                    "flags": tx["flags"],
-                    "transaction_uid": tx["transaction_uid"],
+                    "date": txn_date,
+                    "date_label": _to_date_label(txn_date),
+                    "month_label": _month_label(txn_date),
+                    "txn_type": tx.get("txn_type", ""),
+                    "ref_no": "",
+                    "category": tx.get("category", ""),
+                    "narration": tx.get("narration", ""),
+                    "dr": float(tx.get("dr") or 0),
+                    "cr": float(tx.get("cr") or 0),
+                    "balance": float(tx.get("balance") or 0),
                     "finance_tag": tx.get("finance_tag"),
-                    "tag_confidence": tx.get("tag_confidence"),
-                    "tag_reason_codes": tx.get("tag_reason_codes") or [],
+                    "tag_confidence": tx.get("tag_confidence") or 0.0,
+                    "reason_codes": ", ".join(tx.get("tag_reason_codes") or []),
                 }
-                for tx in transactions_to_insert
-            ],
-            size=500,
-        )
+            )
+
+        transaction_rows = [
+            {
+                "id": tx["id"],
+                "version_id": version_id,
+                # Blob mode has no per-line rows to point at; lines are addressed by (pdf, page, row).
+                **(
+                    {"raw_line_ids": [], "raw_line_refs": {"pdf_file_id": tx["pdf_file_id"], "lines": tx["raw_json"]["raw_line_refs"]}}
+                    if raw_lines_mode == "blob"
+                    else {"raw_line_ids": tx["raw_line_ids"]}
+                ),
+                "txn_date": tx["txn_date"].isoformat(),
+                "month_key": tx["month_key"],
+                "narration": tx["narration"],
+                "dr": tx["dr"],
+                "cr": tx["cr"],
+                "balance": tx["balance"],
+                "counterparty_norm": tx["counterparty_norm"],
+                "txn_type": tx["txn_type"],
+                "category": tx["category"],
+                "flags": tx["flags"],
+                "transaction_uid": tx["transaction_uid"],
+                "finance_tag": tx.get("finance_tag"),
+                "tag_confidence": tx.get("tag_confidence"),
+                "tag_reason_codes": tx.get("tag_reason_codes") or [],
+            }
+            for tx in transactions_to_insert
+        ]
 
         # Source-of-truth ledger (strict dedupe + raw row capture)
         ledger_rows = [
@@ -1008,49 +1858,41 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
             }
             for tx in transactions_to_insert
         ]
-        try:
-            _batch_insert("statement_transaction_ledger", ledger_rows, size=500)
-        except Exception:
-            # Keep service backwards-compatible when ledger table not yet migrated.
-            pass
 
         monthly_aggregates = _build_monthly_aggregates(transactions_to_insert)
-        _batch_insert(
-            "aggregates_monthly",
-            [
-                {
-                    "id": str(uuid.uuid4()),
-                    "version_id": version_id,
-                    "month_key": agg["month_key"],
-                    "kpis": agg["kpis"],
-                }
-                for agg in monthly_aggregates
-            ],
-            size=200,
-        )
+        aggregate_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "version_id": version_id,
+                "month_key": agg["month_key"],
+                "kpis": agg["kpis"],
+            }
+            for agg in monthly_aggregates
+        ]
 
         pivot_rows = _build_pivot_rows(transactions_to_insert)
-        _batch_insert(
-            "pivots",
-            [
-                {
-                    "id": str(uuid.uuid4()),
-                    "version_id": version_id,
-                    "month_key": p["month_key"],
-                    "category": p["category"],
-                    "txn_type": p["txn_type"],
-                    "sum_dr": p["sum_dr"],
-                    "sum_cr": p["sum_cr"],
-                    "count_dr": p["count_dr"],
-                    "count_cr": p["count_cr"],
-                }
-                for p in pivot_rows
-            ],
-            size=500,
-        )
+        pivot_insert_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "version_id": version_id,
+                "month_key": p["month_key"],
+                "category": p["category"],
+                "txn_type": p["txn_type"],
+                "sum_dr": p["sum_dr"],
+                "sum_cr": p["sum_cr"],
+                "count_dr": p["count_dr"],
+                "count_cr": p["count_cr"],
+            }
+            for p in pivot_rows
+        ]
 
         continuity_failures = _continuity_failures(transactions_to_insert)
         risk = _compute_risk_summary(transactions_to_insert)
+        slow_pages = {pdf_id: r.slow_pages for pdf_id, r in extraction_reports.items() if r.slow_pages}
+        fingerprints = {
+            pdf_id: {"key": p.fingerprint.key, "confidence": p.fingerprint.confidence, "parser": type(p).__name__}
+            for pdf_id, p in bank_parsers.items()
+        }
 
         pvt_fin_rows = [
             {
@@ -1106,6 +1948,7 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
         analysis_rows = [
             ["Parse Hash", parse_hash],
             ["Raw Transaction Rows", raw_txn_candidate_count],
+            ["Overlap Rows Dropped", overlap["rows"]],
             ["Parsed Transaction Rows", parsed_row_count],
             ["Total Debits", float(parsed_dr_total)],
             ["Total Credits", float(parsed_cr_total)],
@@ -1128,6 +1971,33 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
         workbook_path: Optional[str] = None
         workbook_generated_at: Optional[str] = None
 
+        def insert_ledger() -> None:
+            try:
+                _batch_insert("statement_transaction_ledger", ledger_rows, size=500)
+            except Exception:
+                # Keep service backwards-compatible when ledger table not yet migrated.
+                pass
+
+        # DB writes are network-bound and the workbook is CPU-bound: run them as
+        # one stage graph so they overlap. READY is only written after every stage.
+        tail = StageGraph(
+            max_workers=env_int("STATEMENT_TAIL_WORKERS", 4, positive=True) or 1,
+            on_done=lambda name, seconds: job.publish("tail_stage", stage=name, seconds=seconds),
+        )
+        tail.add("insert_transactions", _batch_insert, "transactions", transaction_rows, size=500)
+        tail.add("insert_ledger", insert_ledger)
+        tail.add("insert_aggregates", _batch_insert, "aggregates_monthly", aggregate_rows, size=200)
+        tail.add("insert_pivots", _batch_insert, "pivots", pivot_insert_rows, size=500)
+        tail.add("insert_page_stats", _insert_page_stats, page_stats_rows)
+        if env_flag("STATEMENT_SNAPSHOT_ENABLED", True):
+            tail.add(
+                "snapshot",
+                _write_snapshot,
+                snapshot_path(version_id, parse_hash),
+                transactions_to_insert,
+                {"version_id": version_id, "statement_id": str(statement_id), "parse_hash": parse_hash},
+            )
+
         if workbook_active:
             xns_templates, pivot_templates = _choose_template_sheets(settings.template_path)
             accounts = []
@@ -1150,62 +2020,74 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
                     }
                 )
 
-            out_xlsx = os.path.join(tmp_dir, "underwriting_workbook.xlsx")
-            generate_perfios_excel(
-                template_path=settings.template_path,
-                output_path=out_xlsx,
-                context={
-                    "accounts": accounts,
-                    "analysis_rows": analysis_rows,
-                    "analysis_start_row": 2,
-                    "cons_rows": cons_rows,
-                    "pvt_fin_rows": pvt_fin_rows,
-                    "bank_fin_rows": bank_fin_rows,
-                    "final_rows": final_rows,
-                },
-            )
-
+            out_xlsx = scratch.file("underwriting_workbook.xlsx")
             legacy_excel_path = f"exports/{version_id}/perfios_output.xlsx"
-            _upsert_storage_file(
-                legacy_excel_path,
-                out_xlsx,
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-
             lead_id = statement_row.get("lead_id") or "unknown"
             workbook_path = f"underwriting/{lead_id}/{statement_id}/underwriting_workbook.xlsx"
-            _upsert_storage_file(
+
+            workbook_meta = {
+                "raw_row_count": raw_txn_candidate_count,
+                "parsed_row_count": parsed_row_count,
+                "risk_score": risk["risk_score"],
+                "risk_band": risk["risk_band"],
+            }
+            workbook_context = {
+                "accounts": accounts,
+                "analysis_rows": analysis_rows,
+                "analysis_start_row": 2,
+                "cons_rows": cons_rows,
+                "pvt_fin_rows": pvt_fin_rows,
+                "bank_fin_rows": bank_fin_rows,
+                "final_rows": final_rows,
+            }
+
+        if workbook_lazy:
+            # Only the inputs are stored; GET /versions/{id}/workbook builds and caches the file.
+            legacy_excel_path = workbook_path = None
+            inputs_blob = encode_workbook_inputs(
+                {
+                    "lead_id": statement_row.get("lead_id"),
+                    "statement_id": statement_id,
+                    "parse_hash": parse_hash,
+                    "meta": workbook_meta,
+                    "context": workbook_context,
+                }
+            )
+            tail.add("record_workbook_inputs", _record_workbook_inputs, version_id, parse_hash, inputs_blob)
+        elif workbook_active:
+            from .excel.generate import generate_perfios_excel
+
+            isolation = "process" if os.environ.get("STATEMENT_WORKBOOK_ISOLATION", "").strip().lower() == "process" else "thread"
+            tail.add(
+                "workbook",
+                generate_perfios_excel,
+                isolation=isolation,
+                template_path=settings.template_path,
+                output_path=out_xlsx,
+                context=workbook_context,
+            )
+            tail.add("upload_excel", _upsert_storage_file, legacy_excel_path, out_xlsx, XLSX_CONTENT_TYPE, deps=("workbook",))
+            tail.add("upload_workbook", _upsert_storage_file, workbook_path, out_xlsx, XLSX_CONTENT_TYPE, deps=("workbook",))
+            tail.add(
+                "record_workbook",
+                _record_workbook,
+                statement_row.get("lead_id"),
+                statement_id,
+                version_id,
+                parse_hash,
                 workbook_path,
-                out_xlsx,
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                workbook_meta,
+                deps=("upload_excel", "upload_workbook"),
             )
 
-            try:
-                _batch_upsert(
-                    "statement_underwriting_workbooks",
-                    [
-                        {
-                            "lead_id": statement_row.get("lead_id"),
-                            "statement_id": statement_id,
-                            "version_id": version_id,
-                            "parse_hash": parse_hash,
-                            "storage_path": workbook_path,
-                            "meta_json": {
-                                "raw_row_count": raw_txn_candidate_count,
-                                "parsed_row_count": parsed_row_count,
-                                "risk_score": risk["risk_score"],
-                                "risk_band": risk["risk_band"],
-                            },
-                        }
-                    ],
-                    on_conflict="version_id,parse_hash",
-                    size=100,
-                )
-            except Exception:
-                pass
-
+        tail.run()
+        clock.lap("tail")
+        snapshot_storage_path = tail.results.get("snapshot")
+        if workbook_active and not workbook_lazy:
             workbook_generated_at = now_iso
 
+        # From here on the watchdog and DELETE /jobs can no longer abort the job.
+        control.finalize()
         _update_version(
             version_id,
             {
@@ -1224,11 +2106,20 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
                 "parse_hash": parse_hash,
             },
         )
+        _txn_frames.invalidate(version_id)
+        clock.lap("finalize")
+        stage_metrics = stage_metrics_payload(clock, extract_metrics, concurrent=tail.durations)
+        stage_metrics["scratch"] = {
+            **scratch.usage(),
+            "engine_bytes_written": sum(report.scratch_bytes for report in extraction_reports.values()),
+        }
+        audit_id = str(uuid.uuid4())
+        record_stage_metrics(stage_metrics, job_id=audit_id)
 
         try:
             sb.table("audit_events").insert(
                 {
-                    "id": str(uuid.uuid4()),
+                    "id": audit_id,
                     "entity_type": "statement_version",
                     "entity_id": version_id,
                     "action": "PARSE_READY",
@@ -1241,10 +2132,18 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
                         "workbook_url": workbook_path,
                         "workbook_enabled": workbook_enabled,
                         "workbook_active": workbook_active,
+                        "workbook_lazy": workbook_lazy,
                         "workbook_skip_reason": workbook_skip_reason,
                         "parse_hash": parse_hash,
                         "risk_score": risk["risk_score"],
                         "risk_band": risk["risk_band"],
+                        "slow_pages": slow_pages,
+                        "fingerprints": fingerprints,
+                        "recovered_pages": recovered_pages,
+                        "reconciliation": reconciliation,
+                        "snapshot_path": snapshot_storage_path,
+                        "stage_metrics": stage_metrics,
+                        "scheduling": scheduling,
                     },
                 }
             ).execute()
@@ -1259,15 +2158,35 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
             "workbook_path": workbook_path,
             "workbook_enabled": workbook_enabled,
             "workbook_active": workbook_active,
+            "workbook_lazy": workbook_lazy,
             "workbook_skip_reason": workbook_skip_reason,
             "transactions": parsed_row_count,
             "raw_row_count": raw_txn_candidate_count,
             "parsed_row_count": parsed_row_count,
             "continuity_failures": continuity_failures,
             "risk": risk,
+            "slow_pages": slow_pages,
+            "fingerprints": fingerprints,
+            "recovered_pages": recovered_pages,
+            "reconciliation": reconciliation,
+            "snapshot_path": snapshot_storage_path,
+            "stage_metrics": stage_metrics,
+            "scheduling": scheduling,
         }
     except HTTPException:
         raise
+    except JobCancelled as exc:
+        _update_version(
+            version_id,
+            {
+                "status": "PARSE_FAILED",
+                "parse_status": "FAILED",
+                "error_reason": exc.reason,
+                "parse_completed_at": now_iso,
+                "run_at": now_iso,
+            },
+        )
+        raise HTTPException(status_code=504 if exc.timed_out else 409, detail=exc.reason) from exc
     except Exception as exc:  # pragma: no cover
         _update_version(
             version_id,
@@ -1280,3 +2199,205 @@ def parse_statement(version_id: str, force: bool = False) -> Dict[str, Any]:
             },
         )
         raise HTTPException(status_code=500, detail=f"parse_statement failed: {exc}") from exc
+
+
+# Striped: a fixed set of locks, so the table does not grow with every version served.
+_workbook_build_locks = tuple(threading.Lock() for _ in range(64))
+
+
+def _workbook_build_lock(version_id: str) -> threading.Lock:
+    digest = hashlib.sha1(version_id.encode("utf-8")).digest()
+    return _workbook_build_locks[int.from_bytes(digest[:4], "big") % len(_workbook_build_locks)]
+
+
+def _record_workbook_inputs(version_id: str, parse_hash: str, inputs_blob: bytes) -> None:
+    """
+    Store a lazy parse's workbook inputs and drop any workbook cached for them.
+    A forced re-parse keeps its parse_hash, so the old file would otherwise be served.
+    """
+    with _workbook_build_lock(version_id):
+        try:
+            sb.storage.from_(settings.bucket).remove([_workbook_cache_path(version_id, parse_hash)])
+        except Exception:
+            pass
+        _upsert_storage_bytes(_workbook_inputs_path(version_id, parse_hash), inputs_blob, "application/gzip")
+
+
+def _download_storage_file(path: Optional[str]) -> Optional[bytes]:
+    if not path:
+        return None
+    try:
+        return sb.storage.from_(settings.bucket).download(path)
+    except Exception:
+        return None
+
+
+def _build_cached_workbook(version_id: str, parse_hash: str) -> Tuple[bytes, str]:
+    """Build the workbook from the inputs recorded by a lazy parse and cache it in storage under parse_hash."""
+    cache_path = _workbook_cache_path(version_id, parse_hash)
+    with _workbook_build_lock(version_id):
+        cached = _download_storage_file(cache_path)
+        if cached is not None:
+            return cached, cache_path
+
+        blob = _download_storage_file(_workbook_inputs_path(version_id, parse_hash))
+        if blob is None:
+            raise HTTPException(status_code=404, detail="No workbook recorded for this version")
+        if not Path(settings.template_path).exists():
+            raise HTTPException(status_code=503, detail=f"Workbook template not found: {settings.template_path}")
+        inputs = decode_workbook_inputs(blob)
+
+        from .excel.generate import generate_perfios_excel
+
+        with ScratchSpace("workbook") as scratch:
+            out_xlsx = scratch.file("underwriting_workbook.xlsx")
+            generate_perfios_excel(template_path=settings.template_path, output_path=out_xlsx, context=inputs["context"])
+            with open(out_xlsx, "rb") as f:
+                data = f.read()
+
+        _upsert_storage_bytes(cache_path, data, XLSX_CONTENT_TYPE)
+        _record_workbook(
+            inputs.get("lead_id"), inputs.get("statement_id"), version_id, parse_hash, cache_path, inputs.get("meta") or {}
+        )
+        _update_version(
+            version_id,
+            {
+                "excel_url": cache_path,
+                "underwriting_workbook_url": cache_path,
+                "underwriting_workbook_generated_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+            },
+        )
+        return data, cache_path
+
+
+@app.get("/versions/{version_id}/workbook")
+def download_workbook(version_id: str) -> Response:
+    """
+    Underwriting workbook for a parsed version. Serves the cached/eager file when
+    there is one, otherwise builds it from the inputs recorded by a lazy parse.
+    """
+    version_rows = _safe_table_select("statement_versions", select="*", eq={"id": version_id}, limit=1)
+    if not version_rows:
+        raise HTTPException(status_code=404, detail="Statement version not found")
+    version_row = version_rows[0]
+    if str(version_row.get("parse_status") or "").upper() != "SUCCESS":
+        raise HTTPException(status_code=409, detail="Statement version has not been parsed successfully")
+    parse_hash = str(version_row.get("parse_hash") or "")
+
+    data = _download_storage_file(version_row.get("underwriting_workbook_url") or version_row.get("excel_url"))
+    if data is None:
+        data, _ = _build_cached_workbook(version_id, parse_hash)
+    return Response(
+        content=data,
+        media_type=XLSX_CONTENT_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="underwriting_workbook.xlsx"'},
+    )
+
+
+def _lookup_parse(version_id: str) -> Optional[Tuple[str, str]]:
+    rows = _safe_table_select(
+        "statement_versions", select="parse_hash,parse_status,parse_completed_at", eq={"id": version_id}, limit=1
+    )
+    if not rows or str(rows[0].get("parse_status") or "").upper() != "SUCCESS" or not rows[0].get("parse_hash"):
+        return None
+    return str(rows[0]["parse_hash"]), str(rows[0].get("parse_completed_at") or "")
+
+
+def _load_transaction_frame(version_id: str, parse_hash: str, revision: str = ""):
+    try:
+        return load_snapshot(
+            version_id, parse_hash, download=sb.storage.from_(settings.bucket).download, revision=revision
+        )
+    except Exception:
+        pass
+    # Versions parsed before snapshots existed: page the transactions table once.
+    rows: List[Dict[str, Any]] = []
+    page_size = 1000
+    while True:
+        resp = (
+            sb.table("transactions")
+            .select("*")
+            .eq("version_id", version_id)
+            .order("txn_date")
+            .order("id")
+            .range(len(rows), len(rows) + page_size - 1)
+            .execute()
+        )
+        batch = resp.data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            break
+    return frame_from_rows(rows)
+
+
+_txn_frames = VersionFrameCache(
+    _load_transaction_frame,
+    _lookup_parse,
+    max_versions=env_int("STATEMENT_TXN_CACHE_VERSIONS", 32, positive=True) or 32,
+    hash_ttl_s=env_float("STATEMENT_TXN_CACHE_TTL_S", 30.0, positive=True) or 0.0,
+)
+
+
+@app.get("/versions/{version_id}/raw_lines")
+def list_raw_lines(version_id: str, pdf_file_id: str, page: Optional[List[int]] = Query(default=None)) -> Dict[str, Any]:
+    """Raw extracted lines of one PDF (optionally only some pages), from its blob or from raw_statement_lines."""
+    index_rows = _safe_table_select(
+        "raw_line_blobs", select="*", eq={"version_id": version_id, "pdf_file_id": pdf_file_id}, limit=1
+    )
+    if index_rows:
+        blob = sb.storage.from_(settings.bucket).download(index_rows[0]["storage_path"])
+        lines = decode_raw_lines(blob, pages=page)
+        storage = "blob"
+    else:
+        lines = _paged_table_select(
+            "raw_statement_lines",
+            select="*",
+            eq={"version_id": version_id, "pdf_file_id": pdf_file_id},
+            in_={"page_no": sorted(set(page))} if page else None,
+            order=[("page_no", True), ("row_no", True), ("id", True)],
+        )
+        storage = "rows"
+    if not lines and not index_rows:
+        raise HTTPException(status_code=404, detail="No raw lines stored for this PDF")
+    return {"version_id": version_id, "pdf_file_id": pdf_file_id, "storage": storage, "lines": lines}
+
+
+@app.get("/versions/{version_id}/transactions")
+def list_transactions(
+    version_id: str,
+    tag: Optional[str] = None,
+    month: Optional[str] = None,
+    counterparty: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    text: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    fields: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Filtered, cursor-paginated transactions of the version's current parse, served
+    from an in-process frame cache (loaded from the Parquet snapshot).
+    """
+    current = _txn_frames.current(version_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="No successful parse for this version")
+    parse_hash, revision = current
+    frame = _txn_frames.frame(version_id, parse_hash, revision)
+    try:
+        result = query_transactions(
+            frame,
+            parse_hash,
+            tag=tag,
+            month=month,
+            counterparty=counterparty,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            text=text,
+            cursor=cursor,
+            limit=limit,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except (CursorError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"version_id": version_id, "parse_hash": parse_hash, **result}
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Seconds per page used until real parses have been recorded (measured on the
+# synthetic corpus and the TMB fixtures, single core).
+DEFAULT_EXTRACT_S_PER_PAGE: Dict[str, float] = {
+    "pdfplumber": 0.35,
+    "pdfium_text": 0.06,
+    "lattice": 1.6,
+    "tmb_positional": 0.02,
+}
+DEFAULT_OTHER_S_PER_PAGE = 0.05
+DEFAULT_FIXED_S = 2.0
+
+_HISTORY_SIZE = 200
+# Stages whose cost does not scale with page count.
+FIXED_STAGES = ("reset", "download")
+# Time spent waiting for a scheduler slot depends on load, not on the job.
+WAIT_STAGES = ("queue",)
+
+
+class StageClock:
+    """Lap timer for the stages of one parse job: `lap(name)` charges the time since the previous lap to `name`."""
+
+    def __init__(self, on_lap: Optional[Callable[[str, float], None]] = None) -> None:
+        self.stages: Dict[str, float] = {}
+        self.on_lap = on_lap
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        if self.on_lap is not None:
+            self.on_lap(name, elapsed)
+        return elapsed
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+
+_lock = threading.Lock()
+_extract_samples: Dict[str, Deque[float]] = {}
+_other_samples: Deque[float] = deque(maxlen=_HISTORY_SIZE)
+_fixed_samples: Deque[float] = deque(maxlen=_HISTORY_SIZE)
+_seen_jobs: Deque[str] = deque(maxlen=_HISTORY_SIZE)
+
+
+def stage_metrics_payload(
+    clock: StageClock, extracts: List[Dict[str, Any]], concurrent: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    The `stage_metrics` block stored in audit_events and used to seed history after a restart.
+    `concurrent` holds per-stage durations of overlapped stages; their wall time is already one lap in `stages`.
+    """
+    payload: Dict[str, Any] = {
+        "pages": sum(int(e.get("pages") or 0) for e in extracts),
+        "stages": clock.as_dict(),
+        "extract": extracts,
+    }
+    if concurrent:
+        payload["concurrent"] = dict(concurrent)
+    return payload
+
+
+def record_stage_metrics(metrics: Dict[str, Any], job_id: Optional[str] = None) -> None:
+    if job_id is not None:
+        with _lock:
+            if job_id in _seen_jobs:
+                return
+            _seen_jobs.append(job_id)
+    pages = int(metrics.get("pages") or 0)
+    stages = metrics.get("stages") or {}
+    with _lock:
+        for item in metrics.get("extract") or []:
+            item_pages = int(item.get("pages") or 0)
+            if item_pages > 0:
+                samples = _extract_samples.setdefault(str(item.get("engine")), deque(maxlen=_HISTORY_SIZE))
+                samples.append(float(item.get("seconds") or 0.0) / item_pages)
+        other = sum(float(v) for k, v in stages.items() if k != "extract" and k not in FIXED_STAGES + WAIT_STAGES)
+        if pages > 0:
+            _other_samples.append(other / pages)
+        _fixed_samples.append(sum(float(stages.get(k) or 0.0) for k in FIXED_STAGES))
+
+
+def seed_stage_history(payloads: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    count = 0
+    for job_id, metrics in payloads:
+        if isinstance(metrics, dict):
+            record_stage_metrics(metrics, job_id=job_id)
+            count += 1
+    return count
+
+
+def _median(samples: Iterable[float], default: float) -> float:
+    values = list(samples)
+    return statistics.median(values) if values else default
+
+
+def predict_parse_seconds(pages_by_engine: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Predicted wall time for a job: per-engine extraction rate x pages, plus the
+    per-page rate of the downstream stages and the fixed download/setup cost.
+    Rates are medians over recent jobs, falling back to defaults.
+    """
+    total_pages = sum(pages_by_engine.values())
+    with _lock:
+        rates = {
+            engine: _median(_extract_samples.get(engine, ()), DEFAULT_EXTRACT_S_PER_PAGE.get(engine, DEFAULT_EXTRACT_S_PER_PAGE["pdfplumber"]))
+            for engine in pages_by_engine
+        }
+        other_rate = _median(_other_samples, DEFAULT_OTHER_S_PER_PAGE)
+        fixed = _median(_fixed_samples, DEFAULT_FIXED_S)
+        history_jobs = len(_other_samples)
+    extract_s = sum(rates[engine] * pages for engine, pages in pages_by_engine.items())
+    return {
+        "seconds": round(extract_s + other_rate * total_pages + fixed, 2),
+        "extract_seconds": round(extract_s, 2),
+        "extract_s_per_page": {engine: round(rate, 4) for engine, rate in rates.items()},
+        "other_s_per_page": round(other_rate, 4),
+        "history_jobs": history_jobs,
+    }
+
+
+def clear_stage_history() -> None:
+    with _lock:
+        _extract_samples.clear()
+        _other_samples.clear()
+        _fixed_samples.clear()
+        _seen_jobs.clear()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .parser.extract import ExtractionReport
+
+# One pdf_page_stats row per parsed PDF. Per-page values are stored as parallel
+# arrays (a 300-page PDF is a few KB of jsonb) rather than one row per page.
+PAGE_STATS_VERSION = 1
+_COLUMNS = ("page_no", "method", "wall_ms", "table_ms", "chars", "tables", "lines")
+
+
+def page_stats_row(
+    version_id: str,
+    pdf_file_id: str,
+    parse_hash: str,
+    report: ExtractionReport,
+    fingerprint: str,
+) -> Dict[str, Any]:
+    pages = sorted(report.pages, key=lambda stat: stat.page_no)
+    wall = [round(stat.wall_ms, 1) for stat in pages]
+    return {
+        "version_id": version_id,
+        "pdf_file_id": pdf_file_id,
+        "parse_hash": parse_hash,
+        "fingerprint": fingerprint,
+        "layout_key": report.layout_key,
+        "engine": report.engine,
+        "start_mode": report.start_mode,
+        "page_count": len(pages),
+        "total_ms": round(sum(wall), 1),
+        "max_page_ms": max(wall) if wall else 0.0,
+        "pages": {
+            "v": PAGE_STATS_VERSION,
+            "page_no": [stat.page_no for stat in pages],
+            "method": [stat.method for stat in pages],
+            "wall_ms": wall,
+            "table_ms": [round(stat.table_ms, 1) for stat in pages],
+            "chars": [stat.char_count for stat in pages],
+            "tables": [stat.table_count for stat in pages],
+            "lines": [stat.lines_emitted for stat in pages],
+            "over_budget": [stat.page_no for stat in pages if stat.over_budget],
+        },
+    }
+
+
+def expand_page_stats(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """One dict per page, carrying the PDF-level fields of its row."""
+    for row in rows:
+        pages = row.get("pages") or {}
+        over_budget = set(pages.get("over_budget") or [])
+        columns = [pages.get(name) or [] for name in _COLUMNS]
+        for values in zip(*columns):
+            page = dict(zip(_COLUMNS, values))
+            page.update(
+                {
+                    "over_budget": page["page_no"] in over_budget,
+                    "version_id": row.get("version_id"),
+                    "pdf_file_id": row.get("pdf_file_id"),
+                    "fingerprint": row.get("fingerprint"),
+                    "layout_key": row.get("layout_key"),
+                    "engine": row.get("engine"),
+                }
+            )
+            yield page
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def slow_page_report(rows: Iterable[Dict[str, Any]], top: int = 20) -> Dict[str, Any]:
+    """Slowest pages and per-layout page cost across the given pdf_page_stats rows."""
+    rows = list(rows)
+    pages = list(expand_page_stats(rows))
+    slowest = sorted(pages, key=lambda page: page["wall_ms"], reverse=True)[:top]
+
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for page in pages:
+        groups[(page["fingerprint"], page["layout_key"], page["engine"])].append(page)
+    layouts = []
+    for (fingerprint, layout_key, engine), group in groups.items():
+        wall = sorted(page["wall_ms"] for page in group)
+        methods: Dict[str, int] = defaultdict(int)
+        for page in group:
+            methods[page["method"]] += 1
+        layouts.append(
+            {
+                "fingerprint": fingerprint,
+                "layout_key": layout_key,
+                "engine": engine,
+                "pdfs": len({page["pdf_file_id"] for page in group}),
+                "pages": len(group),
+                "total_s": round(sum(wall) / 1000.0, 2),
+                "mean_page_ms": round(statistics.mean(wall), 1),
+                "p95_page_ms": _percentile(wall, 95),
+                "max_page_ms": wall[-1],
+                "over_budget_pages": sum(1 for page in group if page["over_budget"]),
+                "methods": dict(methods),
+            }
+        )
+    # Where the time goes: layouts ranked by total extraction time.
+    layouts.sort(key=lambda layout: layout["total_s"], reverse=True)
+    return {
+        "pdfs": len(rows),
+        "pages": len(pages),
+        "slowest_pages": slowest,
+        "layouts": layouts,
+    }
+
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import datetime as dt
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from .engines import SHARDABLE_ENGINES, extract_sharded, extract_with_engine, pdf_page_count, resolve_engine_name
+from .extract import DATE_RE, ExtractionReport, PageStat, RawLine, _looks_like_amount, merge_multiline_transactions
+from .fingerprint import Fingerprint
+from .recovery import alternate_engines
+from .source import PDFIUM_LOCK, PdfSource, pdfium_document
+
+
+class BankParser(ABC):
+    """
+    Parser plugin for one bank (optionally restricted to specific layouts).
+    Subclasses know their column layout, date formats and multiline rules;
+    GenericBankParser keeps the original heuristics as the fallback.
+    """
+
+    bank = "GENERIC"
+    layouts: Tuple[str, ...] = ()  # empty: any layout of `bank`
+    date_formats: Tuple[str, ...] = ()
+
+    def __init__(self, fingerprint: Fingerprint) -> None:
+        self.fingerprint = fingerprint
+
+    @abstractmethod
+    def extract(self, source: PdfSource, report: ExtractionReport, **options: Any) -> List[RawLine]:
+        ...
+
+    def merge(self, raw_lines: List[RawLine]) -> List[dict]:
+        return merge_multiline_transactions(raw_lines)
+
+    def planned_engine(self, source: PdfSource, engine_name: str = "auto") -> str:
+        """The extraction method `extract(source, engine_name=...)` will use; plugins have their own."""
+        return getattr(self, "method", type(self).__name__)
+
+    def recovery_engines(self, engine_name: str) -> Tuple[str, ...]:
+        """
+        Engines page recovery may re-extract failing pages with, via `extract(...,
+        engine_name=, pages=)`. None by default: a bank parser's lines have its own
+        row format, which lines from a generic engine would not match.
+        """
+        return ()
+
+    def parse_date(self, value: str) -> Optional[dt.date]:
+        text = (value or "").strip()
+        for fmt in self.date_formats:
+            try:
+                return dt.datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+        return None
+
+
+class GenericBankParser(BankParser):
+    """
+    Engine-based extraction with the date-driven multiline merge.
+    With `shard_pages` set, PDFs of at least `shard_min_pages` pages on a
+    shardable engine are extracted and merged per page range in worker
+    processes; merge() then returns the stitched rows for those lines.
+    """
+
+    def __init__(self, fingerprint: Fingerprint) -> None:
+        super().__init__(fingerprint)
+        self._sharded: Optional[Tuple[List[RawLine], List[dict]]] = None
+
+    def extract(self, source: PdfSource, report: ExtractionReport, **options: Any) -> List[RawLine]:
+        engine_name = options.pop("engine_name", "auto")
+        shard_pages = options.pop("shard_pages", None)
+        shard_min_pages = options.pop("shard_min_pages", None) or 0
+        shard_workers = options.pop("shard_workers", None)
+        name = self.planned_engine(source, engine_name)
+        if shard_pages and name in SHARDABLE_ENGINES and pdf_page_count(source) >= max(shard_min_pages, shard_pages + 1):
+            lines, merged = extract_sharded(source, name, shard_pages, workers=shard_workers, report=report, **options)
+            self._sharded = (lines, merged)
+            return lines
+        return extract_with_engine(source, engine_name=name, report=report, **options)
+
+    def planned_engine(self, source: PdfSource, engine_name: str = "auto") -> str:
+        return resolve_engine_name(source, engine_name, self.fingerprint.key)
+
+    def merge(self, raw_lines: List[RawLine]) -> List[dict]:
+        if self._sharded is not None and self._sharded[0] is raw_lines:
+            return self._sharded[1]
+        return merge_multiline_transactions(raw_lines)
+
+    def recovery_engines(self, engine_name: str) -> Tuple[str, ...]:
+        return alternate_engines(engine_name)
+
+
+BANK_PARSERS: Dict[str, List[Type[BankParser]]] = {}
+
+
+def register_bank_parser(cls: Type[BankParser]) -> Type[BankParser]:
+    BANK_PARSERS.setdefault(cls.bank, []).append(cls)
+    return cls
+
+
+def parser_for(fingerprint: Fingerprint) -> BankParser:
+    for cls in BANK_PARSERS.get(fingerprint.bank, []):
+        if not cls.layouts or fingerprint.layout in cls.layouts:
+            return cls(fingerprint)
+    return GenericBankParser(fingerprint)
+
+
+class _Word:
+    __slots__ = ("text", "x0", "x1", "top")
+
+    def __init__(self, text: str, x0: float, x1: float, top: float) -> None:
+        self.text = text
+        self.x0 = x0
+        self.x1 = x1
+        self.top = top
+
+
+def _content_words(chars: List[Dict[str, Any]], x_tolerance: float = 3.0, y_tolerance: float = 3.0) -> List[_Word]:
+    """Words in content-stream order (not visual order), which keeps each statement row's cells together."""
+    words: List[_Word] = []
+    current: Optional[_Word] = None
+    for char in chars:
+        if char["text"].isspace():
+            current = None
+            continue
+        if (
+            current is not None
+            and abs(char["top"] - current.top) <= y_tolerance
+            and -x_tolerance <= char["x0"] - current.x1 <= x_tolerance
+        ):
+            current.text += char["text"]
+            current.x1 = char["x1"]
+        else:
+            current = _Word(char["text"], char["x0"], char["x1"], char["top"])
+            words.append(current)
+    return words
+
+
+SIGNED_AMOUNT_RE = re.compile(r"^-?[\d,]+\.\d{2}$")
+
+
+@register_bank_parser
+class TmbParser(BankParser):
+    """
+    Tamilnad Mercantile Bank "OpTransactionHistory" (JasperReports) statements.
+
+    Layout: Txn. date | Cheque No. | Transaction Remarks | Debit | Credit | Account Balance,
+    header printed once on page 1. Visually the remarks sit above the date/balance
+    line and wrap onto extra lines, so pdfplumber's tables/text both split rows.
+    In content order each row is [cheque] date remarks... amount balance, which
+    is what this parser walks: a date opens a row, the balance closes it, a
+    cheque number belongs to the row whose date follows it.
+    """
+
+    bank = "TMB"
+    layouts = ("jasperreports_optransactionhistory",)
+    date_formats = ("%d/%m/%Y",)
+    method = "tmb_positional"
+
+    def extract(self, source: PdfSource, report: ExtractionReport, **options: Any) -> List[RawLine]:
+        from .engines import _pdfium_page_chars
+
+        report.engine = self.method
+        report.start_mode = "text"
+        columns: Optional[Dict[str, float]] = None
+        lines: List[RawLine] = []
+        with pdfium_document(source) as pdf:
+            with PDFIUM_LOCK:
+                page_count = len(pdf)
+            for page_index in range(page_count):
+                page_no = page_index + 1
+                started = time.perf_counter()
+                with PDFIUM_LOCK:
+                    page = pdf[page_index]
+                    textpage = page.get_textpage()
+                    try:
+                        chars = _pdfium_page_chars(page, textpage)
+                    finally:
+                        textpage.close()
+                        page.close()
+                words = _content_words(chars)
+                page_lines, columns = self._page_lines(page_no, words, columns)
+                report.add_page(
+                    PageStat(
+                        page_no=page_no,
+                        method="text",
+                        wall_ms=(time.perf_counter() - started) * 1000.0,
+                        char_count=len(chars),
+                        lines_emitted=len(page_lines),
+                    )
+                )
+                lines.extend(page_lines)
+        return lines
+
+    @staticmethod
+    def _header(words: List[_Word]) -> Optional[Tuple[Dict[str, float], float]]:
+        by_text = {}
+        for word in words:
+            by_text.setdefault(word.text.upper(), []).append(word)
+        for debit in by_text.get("DEBIT", []):
+            same_line = [w for w in words if abs(w.top - debit.top) <= 3]
+            texts = {w.text.upper(): w for w in same_line}
+            if "CREDIT" in texts and "BALANCE" in texts and "TXN." in texts:
+                account = texts.get("ACCOUNT") or texts["BALANCE"]
+                cheque = next((w for w in words if w.text.upper() == "CHEQUE" and abs(w.top - debit.top) <= 15), None)
+                remarks = texts.get("TRANSACTION") or debit
+                columns = {
+                    "cheque": cheque.x0 if cheque else texts["TXN."].x1,
+                    "narration": remarks.x0,
+                    "dr": debit.x0,
+                    "cr": texts["CREDIT"].x0,
+                    "bal": account.x0,
+                }
+                return columns, debit.top + 15
+        return None
+
+    def _page_lines(
+        self, page_no: int, words: List[_Word], columns: Optional[Dict[str, float]]
+    ) -> Tuple[List[RawLine], Optional[Dict[str, float]]]:
+        header_bottom = -1.0
+        header = self._header(words)
+        if header is not None:
+            columns, header_bottom = header
+
+        rows: List[Dict[str, Any]] = []  # transactions and loose text, each with a sort top
+        loose: List[_Word] = []
+        current: Optional[Dict[str, Any]] = None
+        pending_cheque: Optional[_Word] = None
+
+        def close_current() -> None:
+            nonlocal current
+            if current is not None:
+                rows.append(current)
+                current = None
+
+        for word in words:
+            if columns is None or word.top <= header_bottom:
+                loose.append(word)
+                continue
+            in_left_columns = word.x1 < columns["narration"]
+            if in_left_columns and DATE_RE.match(word.text) and word.x0 < columns["cheque"]:
+                close_current()
+                current = {"top": word.top, "date": word.text, "cheque": pending_cheque, "narration": [], "complete": False}
+                pending_cheque = None
+                continue
+            if in_left_columns and word.text.isdigit():
+                if pending_cheque is not None:
+                    loose.append(pending_cheque)
+                pending_cheque = word
+                continue
+            if current is not None and not current["complete"]:
+                if SIGNED_AMOUNT_RE.match(word.text) and word.x1 > columns["dr"]:
+                    column = "dr"
+                    for key in ("cr", "bal"):
+                        if word.x1 > columns[key]:
+                            column = key
+                    current[column] = word.text
+                    if column == "bal":
+                        current["complete"] = True
+                else:
+                    current["narration"].append(word.text)
+                continue
+            loose.append(word)
+        close_current()
+        if pending_cheque is not None:
+            loose.append(pending_cheque)
+
+        # Loose words -> NON_TXN lines, one per visual line.
+        loose.sort(key=lambda w: (round(w.top), w.x0))
+        for word in loose:
+            if rows and rows[-1].get("loose") and abs(rows[-1]["top"] - word.top) <= 3:
+                rows[-1]["words"].append(word.text)
+            else:
+                rows.append({"top": word.top, "loose": True, "words": [word.text]})
+
+        rows.sort(key=lambda r: r["top"])
+        lines: List[RawLine] = []
+        for row_no, row in enumerate(rows, start=1):
+            if row.get("loose"):
+                text = " ".join(row["words"])
+                lines.append(
+                    RawLine(
+                        page_no=page_no,
+                        row_no=row_no,
+                        raw_row_text=text,
+                        date_text=None,
+                        narration_text=text,
+                        dr_text=None,
+                        cr_text=None,
+                        bal_text=None,
+                        line_type="NON_TXN_LINE",
+                        extraction_method=self.method,
+                    )
+                )
+                continue
+            narration = " ".join(row["narration"])
+            cheque = row["cheque"].text if row["cheque"] is not None else ""
+            dr_text = row.get("dr")
+            cr_text = row.get("cr")
+            bal_text = row.get("bal")
+            cells = [row["date"], cheque, narration, dr_text or "", cr_text or "", bal_text or ""]
+            has_amount = any(_looks_like_amount(v or "") for v in (dr_text, cr_text, bal_text))
+            lines.append(
+                RawLine(
+                    page_no=page_no,
+                    row_no=row_no,
+                    raw_row_text=" | ".join(cells).strip(" |"),
+                    date_text=row["date"],
+                    narration_text=" ".join(p for p in (cheque, narration) if p) or None,
+                    dr_text=dr_text,
+                    cr_text=cr_text,
+                    bal_text=bal_text,
+                    line_type="TRANSACTION" if has_amount else "NON_TXN_LINE",
+                    extraction_method=self.method,
+                )
+            )
+        return lines, columns
+
+    def merge(self, raw_lines: List[RawLine]) -> List[dict]:
+        # Each TRANSACTION line is already a complete row; loose header/footer
+        # text must not be glued onto the previous row's narration.
+        merged: List[dict] = []
+        for index, raw_line in enumerate(raw_lines):
+            if raw_line.line_type != "TRANSACTION" or not raw_line.date_text:
+                continue
+            merged.append(
+                {
+                    "raw_indices": [index],
+                    "date_text": raw_line.date_text,
+                    "narration": raw_line.narration_text or raw_line.raw_row_text,
+                    "dr_text": raw_line.dr_text,
+                    "cr_text": raw_line.cr_text,
+                    "bal_text": raw_line.bal_text,
+                }
+            )
+        return merged
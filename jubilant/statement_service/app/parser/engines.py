@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import as_completed
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..jobs import process_executor
+from .extract import (
+    ExtractionReport,
+    PageStat,
+    RawLine,
+    ShardMerge,
+    _text_lines,
+    extract_raw_lines_pdfplumber,
+    layout_key,
+    layout_prefers_text,
+    mapped_table_lines,
+    merge_shard,
+    record_slow_layout,
+    stitch_shard_merges,
+)
+from .source import PDFIUM_LOCK, PdfSource, pdfium_document, source_path
+
+
+class ExtractionEngine(ABC):
+    """
+    Turns one PDF into ordered RawLines.
+    Engines must keep the RawLine contract of extract_raw_lines_pdfplumber so
+    merge/reconcile do not care which engine ran.
+    """
+
+    name = "base"
+
+    def __init__(self, **options: Any) -> None:
+        self.options = options
+
+    @abstractmethod
+    def extract(self, source: PdfSource, report: Optional[ExtractionReport] = None) -> List[RawLine]:
+        ...
+
+
+class PdfplumberEngine(ExtractionEngine):
+    name = "pdfplumber"
+
+    def extract(self, source: PdfSource, report: Optional[ExtractionReport] = None) -> List[RawLine]:
+        return extract_raw_lines_pdfplumber(
+            source,
+            page_budget_s=self.options.get("page_budget_s"),
+            max_page_edges=self.options.get("max_page_edges"),
+            report=report,
+            pages=self.options.get("pages"),
+        )
+
+
+def _pdfium_page_chars(page, textpage) -> List[Dict[str, Any]]:
+    """
+    pdfium chars shaped like pdfplumber chars, so pdfplumber's own word/line
+    clustering can lay them out. Synthetic spaces/line breaks pdfium inserts are
+    dropped; pdfplumber never sees them either.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    height = page.get_height()
+    chars: List[Dict[str, Any]] = []
+    for index in range(textpage.count_chars()):
+        if pdfium_c.FPDFText_IsGenerated(textpage.raw, index) == 1:
+            continue
+        if pdfium_c.FPDFText_IsHyphen(textpage.raw, index) == 1:
+            text = "-"
+        else:
+            codepoint = pdfium_c.FPDFText_GetUnicode(textpage.raw, index)
+            if codepoint in (0, 0xFFFE, 0xFFFF):
+                continue
+            text = chr(codepoint)
+            if text in "\r\n":
+                continue
+        left, bottom, right, top = textpage.get_charbox(index, loose=True)
+        chars.append(
+            {
+                "text": text,
+                "x0": left,
+                "x1": right,
+                "top": height - top,
+                "bottom": height - bottom,
+                "doctop": height - top,
+                "width": right - left,
+                "height": top - bottom,
+                "upright": True,
+                "size": pdfium_c.FPDFText_GetFontSize(textpage.raw, index),
+            }
+        )
+    return chars
+
+
+class PdfiumTextEngine(ExtractionEngine):
+    """
+    Text-layer engine for statements without ruled tables.
+    Reads chars through pdfium's native text layer (no pdfminer layout pass) and
+    renders lines with pdfplumber's extract_text clustering, so RawLines match
+    the pdfplumber text path.
+    """
+
+    name = "pdfium_text"
+
+    def extract(self, source: PdfSource, report: Optional[ExtractionReport] = None) -> List[RawLine]:
+        from pdfplumber.utils.text import extract_text
+
+        if report is None:
+            report = ExtractionReport()
+        report.start_mode = "text"
+        lines: List[RawLine] = []
+        with pdfium_document(source) as pdf:
+            with PDFIUM_LOCK:
+                page_count = len(pdf)
+                meta = pdf.get_metadata_dict()
+                first_size = pdf.get_page_size(0) if page_count else (None, None)
+            report.layout_key = layout_key(meta.get("Producer"), meta.get("Creator"), *first_size)
+            wanted = self.options.get("pages")
+            page_nos = sorted(set(wanted)) if wanted is not None else range(1, page_count + 1)
+            for page_no in page_nos:
+                page_index = page_no - 1
+                page_started = time.perf_counter()
+                # Only the pdfium reads hold the lock; clustering works on the copied chars.
+                with PDFIUM_LOCK:
+                    page = pdf[page_index]
+                    textpage = page.get_textpage()
+                    try:
+                        chars = _pdfium_page_chars(page, textpage)
+                    finally:
+                        textpage.close()
+                        page.close()
+                page_lines = _text_lines(page_no, extract_text(chars) if chars else "", "pdfium_text")
+                report.add_page(
+                    PageStat(
+                        page_no=page_no,
+                        method="text",
+                        wall_ms=(time.perf_counter() - page_started) * 1000.0,
+                        char_count=len(chars),
+                        lines_emitted=len(page_lines),
+                    )
+                )
+                lines.extend(page_lines)
+        return lines
+
+
+class _PdfiumRasterBackend:
+    """camelot image backend that renders with pdfium, so lattice needs no ghostscript/poppler install."""
+
+    def __init__(self, dpi: int = 300) -> None:
+        self.dpi = dpi
+
+    def convert(self, pdf_path: str, png_path: str) -> None:
+        with pdfium_document(pdf_path) as pdf, PDFIUM_LOCK:
+            page = pdf[0]
+            try:
+                image = page.render(scale=self.dpi / 72.0).to_pil()
+            finally:
+                page.close()
+        image.save(png_path)
+
+
+def _lattice_page_rows(pdf_path: str, page_no: int, backend: str) -> Tuple[int, Optional[List[List[str]]], float]:
+    """
+    Process-pool worker: camelot lattice on one page.
+    Returns (page_no, rows or None when lattice found nothing / failed, wall_ms).
+    """
+    started = time.perf_counter()
+    try:
+        import camelot
+
+        tables = camelot.read_pdf(
+            pdf_path,
+            pages=str(page_no),
+            flavor="lattice",
+            backend=_PdfiumRasterBackend() if backend == "pdfium" else backend,
+            suppress_stdout=True,
+        )
+        rows: List[List[str]] = []
+        for table in tables:
+            rows.extend([str(cell) for cell in row] for row in table.df.values.tolist())
+        return page_no, (rows or None), (time.perf_counter() - started) * 1000.0
+    except Exception:
+        return page_no, None, (time.perf_counter() - started) * 1000.0
+
+
+class LatticeEngine(ExtractionEngine):
+    """
+    Ruled-table engine: camelot lattice detection, one page per process-pool task.
+    Header rows are mapped to date/narration/debit/credit/balance columns so
+    RawLines carry dr_text/cr_text/bal_text. Pages where lattice finds no table
+    (or fails) are extracted by the pdfplumber path for that page.
+    """
+
+    name = "lattice"
+
+    def extract(self, source: PdfSource, report: Optional[ExtractionReport] = None) -> List[RawLine]:
+        if report is None:
+            report = ExtractionReport()
+        report.start_mode = "table"
+        workers = int(self.options.get("workers") or os.environ.get("STATEMENT_LATTICE_WORKERS") or min(4, os.cpu_count() or 1))
+        backend = str(self.options.get("backend") or os.environ.get("STATEMENT_LATTICE_BACKEND", "pdfium"))
+
+        with pdfium_document(source) as pdf, PDFIUM_LOCK:
+            page_count = len(pdf)
+            meta = pdf.get_metadata_dict()
+            report.layout_key = layout_key(
+                meta.get("Producer"), meta.get("Creator"), *(pdf.get_page_size(0) if page_count else (None, None))
+            )
+
+        executor = process_executor("lattice", workers)
+        page_rows: Dict[int, Tuple[Optional[List[List[str]]], float]] = {}
+        # camelot reads from a file; an in-memory source is written to scratch for the pool.
+        with source_path(source, "lattice") as (path, scratch_bytes):
+            report.scratch_bytes += scratch_bytes
+            futures = [executor.submit(_lattice_page_rows, path, page_no, backend) for page_no in range(1, page_count + 1)]
+            for future in futures:
+                page_no, rows, wall_ms = future.result()
+                page_rows[page_no] = (rows, wall_ms)
+
+        fallback_pages = [page_no for page_no, (rows, _) in page_rows.items() if rows is None]
+        fallback_lines: Dict[int, List[RawLine]] = {}
+        if fallback_pages:
+            fallback_report = ExtractionReport()
+            for line in extract_raw_lines_pdfplumber(
+                source,
+                page_budget_s=self.options.get("page_budget_s"),
+                max_page_edges=self.options.get("max_page_edges"),
+                report=fallback_report,
+                pages=fallback_pages,
+            ):
+                fallback_lines.setdefault(line.page_no, []).append(line)
+            fallback_stats = {stat.page_no: stat for stat in fallback_report.pages}
+        else:
+            fallback_stats = {}
+
+        lines: List[RawLine] = []
+        columns: Optional[Dict[str, int]] = None
+        for page_no in range(1, page_count + 1):
+            rows, wall_ms = page_rows[page_no]
+            if rows is None:
+                page_lines = fallback_lines.get(page_no, [])
+                stat = fallback_stats.get(page_no) or PageStat(page_no=page_no, method="text", wall_ms=0.0)
+                stat.wall_ms += wall_ms
+            else:
+                page_lines, columns = mapped_table_lines(page_no, rows, columns, "camelot_lattice")
+                stat = PageStat(page_no=page_no, method="lattice", wall_ms=wall_ms, table_ms=wall_ms, table_count=1)
+            stat.lines_emitted = len(page_lines)
+            report.add_page(stat)
+            lines.extend(page_lines)
+        return lines
+
+
+ENGINES: Dict[str, Callable[..., ExtractionEngine]] = {
+    PdfplumberEngine.name: PdfplumberEngine,
+    PdfiumTextEngine.name: PdfiumTextEngine,
+    LatticeEngine.name: LatticeEngine,
+}
+
+
+def engine_overrides() -> Dict[str, str]:
+    """
+    Per-fingerprint engine choice from STATEMENT_ENGINE_OVERRIDES, a JSON object
+    such as {"<fingerprint>": "lattice"}.
+    """
+    raw = os.environ.get("STATEMENT_ENGINE_OVERRIDES")
+    if not raw:
+        return {}
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return {}
+    return {str(k): str(v) for k, v in value.items()} if isinstance(value, dict) else {}
+
+
+def register_engine(factory: Callable[..., ExtractionEngine], name: Optional[str] = None) -> None:
+    ENGINES[name or getattr(factory, "name")] = factory
+
+
+def get_engine(name: str, **options: Any) -> ExtractionEngine:
+    factory = ENGINES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown extraction engine: {name}")
+    return factory(**options)
+
+
+def select_engine_name(source: PdfSource, sample_pages: int = 3, max_paths_per_page: Optional[int] = None) -> str:
+    """
+    Auto-selection heuristic, cheap enough to run per PDF:
+    - layouts already marked text-first (slow table pages) -> pdfium_text
+    - sampled pages with a text layer and few vector path objects (no ruled
+      table grid) -> pdfium_text
+    - anything else (ruled tables, scanned pages, unreadable files) -> pdfplumber
+    """
+    import pypdfium2.raw as pdfium_c
+
+    if max_paths_per_page is None:
+        max_paths_per_page = int(os.environ.get("STATEMENT_TEXT_ENGINE_MAX_PATHS", "40"))
+    with ExitStack() as stack:
+        try:
+            pdf = stack.enter_context(pdfium_document(source))
+        except Exception:
+            return PdfplumberEngine.name
+        stack.enter_context(PDFIUM_LOCK)
+        page_count = len(pdf)
+        if page_count == 0:
+            return PdfplumberEngine.name
+        meta = pdf.get_metadata_dict()
+        if layout_prefers_text(layout_key(meta.get("Producer"), meta.get("Creator"), *pdf.get_page_size(0))):
+            return PdfiumTextEngine.name
+        for page_index in range(min(sample_pages, page_count)):
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            try:
+                if textpage.count_chars() == 0:
+                    return PdfplumberEngine.name
+                path_count = sum(1 for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=2))
+                if path_count > max_paths_per_page:
+                    return PdfplumberEngine.name
+            finally:
+                textpage.close()
+                page.close()
+        return PdfiumTextEngine.name
+
+
+def resolve_engine_name(source: PdfSource, engine_name: str = "auto", fingerprint: Optional[str] = None) -> str:
+    name = engine_overrides().get(fingerprint or "") if fingerprint else None
+    if not name:
+        name = select_engine_name(source) if engine_name == "auto" else engine_name
+    return name
+
+
+def extract_with_engine(
+    source: PdfSource,
+    engine_name: str = "auto",
+    report: Optional[ExtractionReport] = None,
+    fingerprint: Optional[str] = None,
+    **options: Any,
+) -> List[RawLine]:
+    if report is None:
+        report = ExtractionReport()
+    name = resolve_engine_name(source, engine_name, fingerprint)
+    report.engine = name
+    return get_engine(name, **options).extract(source, report=report)
+
+
+# Engines whose pages are extracted independently of each other; lattice carries
+# the header column mapping across pages and already runs one task per page.
+SHARDABLE_ENGINES = (PdfplumberEngine.name, PdfiumTextEngine.name)
+
+
+def pdf_page_count(source: PdfSource) -> int:
+    with pdfium_document(source) as pdf, PDFIUM_LOCK:
+        return len(pdf)
+
+
+def page_ranges(page_count: int, shard_pages: int) -> List[List[int]]:
+    return [list(range(start, min(start + shard_pages, page_count + 1))) for start in range(1, page_count + 1, shard_pages)]
+
+
+def _extract_shard(
+    engine_name: str, source: PdfSource, pages: List[int], options: Dict[str, Any]
+) -> Tuple[List[RawLine], ExtractionReport, ShardMerge]:
+    report = ExtractionReport()
+    lines = get_engine(engine_name, pages=pages, **options).extract(source, report=report)
+    return lines, report, merge_shard(lines)
+
+
+def extract_sharded(
+    source: PdfSource,
+    engine_name: str,
+    shard_pages: int,
+    workers: Optional[int] = None,
+    report: Optional[ExtractionReport] = None,
+    **options: Any,
+) -> Tuple[List[RawLine], List[dict]]:
+    """
+    Extract page ranges of `shard_pages` in a process pool, merge each shard
+    locally and stitch the shards. Returns the RawLines and merged rows exactly
+    as extract + merge_multiline_transactions would over the whole file.
+    With one worker the shards run in-process.
+    """
+    if engine_name not in SHARDABLE_ENGINES:
+        raise ValueError(f"Engine {engine_name} does not support page sharding")
+    if report is None:
+        report = ExtractionReport()
+    report.engine = engine_name
+    workers = workers or int(os.environ.get("STATEMENT_SHARD_WORKERS") or min(4, os.cpu_count() or 1))
+    ranges = page_ranges(pdf_page_count(source), shard_pages)
+
+    def shard_done(shard_report: ExtractionReport) -> None:
+        # Progress is reported per shard as it finishes; the stats join report.pages in page order below.
+        if report.on_page is not None:
+            for stat in shard_report.pages:
+                report.on_page(stat)
+
+    if workers <= 1 or len(ranges) <= 1:
+        results = []
+        for pages in ranges:
+            results.append(_extract_shard(engine_name, source, pages, options))
+            shard_done(results[-1][1])
+    else:
+        executor = process_executor("shards", workers)
+        # Every shard task would pickle its own copy of in-memory bytes; hand the pool one scratch file instead.
+        with source_path(source, "shards") as (path, scratch_bytes):
+            report.scratch_bytes += scratch_bytes
+            futures = [executor.submit(_extract_shard, engine_name, path, pages, options) for pages in ranges]
+            for future in as_completed(futures):
+                shard_done(future.result()[1])
+            results = [future.result() for future in futures]
+        # Workers cannot update this process' layout hints themselves.
+        record_slow_layout(
+            results[0][1].layout_key, sum(len(shard_report.slow_pages) for _, shard_report, _ in results)
+        )
+
+    lines: List[RawLine] = []
+    for index, (shard_lines, shard_report, _) in enumerate(results):
+        if index == 0:
+            report.layout_key = shard_report.layout_key
+            report.start_mode = shard_report.start_mode
+        report.pages.extend(shard_report.pages)
+        lines.extend(shard_lines)
+    return lines, stitch_shard_merges(shard_merge for _, _, shard_merge in results)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import os
 import re
-from dataclasses import dataclass
-from typing import List, Optional
-
-import pdfplumber
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from .source import PdfSource, pdfplumber_document
 
 DATE_RE = re.compile(r"^\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s*$")
+TEXT_TXN_RE = re.compile(r"^(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s+(.*)$")
 
 
 @dataclass
@@ -31,90 +34,386 @@ def _looks_like_amount(value: str) -> bool:
     return bool(re.fullmatch(r"-?\d+(\.\d{1,2})?", value))
 
 
-def extract_raw_lines_pdfplumber(pdf_path: str) -> List[RawLine]:
+@dataclass
+class PageStat:
+    page_no: int
+    method: str  # table / text
+    wall_ms: float
+    table_ms: float = 0.0
+    char_count: int = 0
+    table_count: int = 0
+    lines_emitted: int = 0
+    over_budget: bool = False
+
+
+@dataclass
+class ExtractionReport:
+    layout_key: str = ""
+    start_mode: str = "table"
+    engine: str = "pdfplumber"
+    pages: List[PageStat] = field(default_factory=list)
+    # Bytes written to scratch so process pools could read the PDF from a file.
+    scratch_bytes: int = 0
+    # Called with each PageStat as it is recorded (progress reporting); never pickled to shard workers.
+    on_page: Optional[Callable[[PageStat], None]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def slow_pages(self) -> List[int]:
+        return [p.page_no for p in self.pages if p.over_budget]
+
+    def add_page(self, stat: PageStat) -> None:
+        self.pages.append(stat)
+        if self.on_page is not None:
+            self.on_page(stat)
+
+
+# Layout keys whose pages blew the table budget; later PDFs with the same
+# layout go straight to text mode instead of paying for extract_tables() again.
+# A hint lapses STATEMENT_LAYOUT_HINT_TTL_S after the last slow page, so a layout
+# that was slow once gets table mode back. Values: (slow pages, last recorded).
+_text_mode_layouts: Dict[str, Tuple[int, float]] = {}
+_layout_lock = threading.Lock()
+
+
+def _layout_hint_ttl_s() -> float:
+    raw = os.environ.get("STATEMENT_LAYOUT_HINT_TTL_S")
+    return float(raw) if raw is not None and raw.strip() else 3600.0
+
+
+def layout_key(producer: Any, creator: Any, width: Optional[float], height: Optional[float]) -> str:
+    """
+    Cheap layout identity: producer/creator metadata + first page size. Empty (no
+    memoisation) when both metadata fields are blank, since page size alone would
+    put every metadata-less A4 PDF in one layout.
+    """
+    if not str(producer or "").strip() and not str(creator or "").strip():
+        return ""
+    size = f"{round(float(width))}x{round(float(height))}" if width and height else ""
+    return "|".join([str(producer or ""), str(creator or ""), size])
+
+
+def layout_key_for(pdf) -> str:
+    meta = pdf.metadata or {}
+    first = pdf.pages[0] if pdf.pages else None
+    return layout_key(
+        meta.get("Producer"),
+        meta.get("Creator"),
+        first.width if first is not None else None,
+        first.height if first is not None else None,
+    )
+
+
+def record_slow_layout(layout_key: str, slow_page_count: int) -> None:
+    if not layout_key or slow_page_count <= 0:
+        return
+    with _layout_lock:
+        count, _ = _text_mode_layouts.get(layout_key, (0, 0.0))
+        _text_mode_layouts[layout_key] = (count + slow_page_count, time.monotonic())
+
+
+def layout_prefers_text(layout_key: str) -> bool:
+    if not layout_key:
+        return False
+    with _layout_lock:
+        hint = _text_mode_layouts.get(layout_key)
+        if hint is None:
+            return False
+        if time.monotonic() - hint[1] >= _layout_hint_ttl_s():
+            del _text_mode_layouts[layout_key]
+            return False
+        return True
+
+
+def layout_mode_hints() -> Dict[str, int]:
+    """Slow-page counts of the layouts currently started in text mode."""
+    ttl_s = _layout_hint_ttl_s()
+    now = time.monotonic()
+    with _layout_lock:
+        return {key: count for key, (count, seen) in _text_mode_layouts.items() if now - seen < ttl_s}
+
+
+def _table_lines(page_no: int, tables: List[List[List[Optional[str]]]], method: str) -> List[RawLine]:
+    lines: List[RawLine] = []
+    row_no = 0
+    for table in tables:
+        for row in table:
+            row_no += 1
+            cells = [str(cell).strip() if cell is not None else "" for cell in row]
+            joined = " | ".join(cells).strip(" |")
+            if not joined:
+                continue
+
+            date_text = cells[0] if cells and DATE_RE.match(cells[0]) else None
+            numeric_cells = [c for c in cells if _looks_like_amount(c)]
+            line_type = "TRANSACTION" if date_text and numeric_cells else "NON_TXN_LINE"
+
+            lines.append(
+                RawLine(
+                    page_no=page_no,
+                    row_no=row_no,
+                    raw_row_text=joined,
+                    date_text=date_text,
+                    narration_text=None,
+                    dr_text=None,
+                    cr_text=None,
+                    bal_text=None,
+                    line_type=line_type,
+                    extraction_method=method,
+                )
+            )
+    return lines
+
+
+def _text_lines(page_no: int, text: str, method: str) -> List[RawLine]:
+    lines: List[RawLine] = []
+    row_no = 0
+    for text_line in text.splitlines():
+        row_no += 1
+        cleaned = text_line.strip()
+        if not cleaned:
+            continue
+
+        match = TEXT_TXN_RE.match(cleaned)
+        if match:
+            lines.append(
+                RawLine(
+                    page_no=page_no,
+                    row_no=row_no,
+                    raw_row_text=cleaned,
+                    date_text=match.group(1),
+                    narration_text=match.group(2),
+                    dr_text=None,
+                    cr_text=None,
+                    bal_text=None,
+                    line_type="TRANSACTION",
+                    extraction_method=method,
+                )
+            )
+        else:
+            lines.append(
+                RawLine(
+                    page_no=page_no,
+                    row_no=row_no,
+                    raw_row_text=cleaned,
+                    date_text=None,
+                    narration_text=cleaned,
+                    dr_text=None,
+                    cr_text=None,
+                    bal_text=None,
+                    line_type="NON_TXN_LINE",
+                    extraction_method=method,
+                )
+            )
+    return lines
+
+
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "date": ("DATE", "TXN DATE", "TRAN DATE", "TRANSACTION DATE", "VALUE DATE", "POST DATE"),
+    "narration": ("PARTICULARS", "NARRATION", "DESCRIPTION", "DETAILS", "REMARKS", "TRANSACTION REMARKS"),
+    "dr": ("DEBIT", "DEBITS", "WITHDRAWAL", "WITHDRAWALS", "DR", "WITHDRAWAL AMT", "DEBIT AMOUNT"),
+    "cr": ("CREDIT", "CREDITS", "DEPOSIT", "DEPOSITS", "CR", "DEPOSIT AMT", "CREDIT AMOUNT"),
+    "bal": ("BALANCE", "CLOSING BALANCE", "ACCOUNT BALANCE", "RUNNING BALANCE"),
+}
+
+
+_PAREN_RE = re.compile(r"\([^)]*\)?")
+
+
+def _header_cell(value: str) -> str:
+    # Parenthesised suffixes go first ("Withdrawal Amt.(INR)", "Balance (Rs.)"), then punctuation.
+    return re.sub(r"[^A-Z ]+", " ", _PAREN_RE.sub(" ", value.upper())).strip()
+
+
+def detect_columns(cells: List[str]) -> Optional[Dict[str, int]]:
+    """Map a header row to column indexes; None unless date + balance + a debit/credit column are present."""
+    columns: Dict[str, int] = {}
+    for index, cell in enumerate(cells):
+        label = " ".join(_header_cell(cell).split())
+        if not label:
+            continue
+        for key, aliases in COLUMN_ALIASES.items():
+            if key not in columns and label in aliases:
+                columns[key] = index
+                break
+    if "date" in columns and "bal" in columns and ("dr" in columns or "cr" in columns):
+        return columns
+    return None
+
+
+def _amount_cell(cells: List[str], columns: Dict[str, int], key: str) -> Optional[str]:
+    index = columns.get(key)
+    if index is None or index >= len(cells):
+        return None
+    value = cells[index]
+    return value if _looks_like_amount(value) else None
+
+
+def mapped_table_lines(
+    page_no: int,
+    rows: List[List[Optional[str]]],
+    columns: Optional[Dict[str, int]],
+    method: str,
+) -> Tuple[List[RawLine], Optional[Dict[str, int]]]:
+    """
+    Table rows -> RawLines with dr/cr/bal populated from a detected column map.
+    Header rows (re)define the map; returns (lines, columns) so the map carries
+    across pages whose tables repeat no header.
+    """
+    lines: List[RawLine] = []
+    row_no = 0
+    for row in rows:
+        row_no += 1
+        cells = [" ".join(str(cell).split()) if cell is not None else "" for cell in row]
+        joined = " | ".join(cells).strip(" |")
+        if not joined:
+            continue
+        header = detect_columns(cells)
+        if header is not None:
+            columns = header
+        date_text = None
+        narration = None
+        dr_text = cr_text = bal_text = None
+        if columns and header is None:
+            date_index = columns["date"]
+            if date_index < len(cells) and DATE_RE.match(cells[date_index]):
+                date_text = cells[date_index]
+            narration_index = columns.get("narration")
+            if narration_index is not None and narration_index < len(cells):
+                narration = cells[narration_index] or None
+            dr_text = _amount_cell(cells, columns, "dr")
+            cr_text = _amount_cell(cells, columns, "cr")
+            bal_text = _amount_cell(cells, columns, "bal")
+        line_type = "TRANSACTION" if date_text and (dr_text or cr_text or bal_text) else "NON_TXN_LINE"
+        lines.append(
+            RawLine(
+                page_no=page_no,
+                row_no=row_no,
+                raw_row_text=joined,
+                date_text=date_text,
+                narration_text=narration,
+                dr_text=dr_text,
+                cr_text=cr_text,
+                bal_text=bal_text,
+                line_type=line_type,
+                extraction_method=method,
+            )
+        )
+    return lines, columns
+
+
+def extract_raw_lines_pdfplumber(
+    source: PdfSource,
+    page_budget_s: Optional[float] = None,
+    max_page_edges: Optional[int] = None,
+    report: Optional[ExtractionReport] = None,
+    pages: Optional[Iterable[int]] = None,
+) -> List[RawLine]:
     """
     Generic extractor:
     - Uses table extraction when available.
     - Falls back to line extraction.
     - Persists both TRANSACTION and NON_TXN_LINE rows for strict reconciliation.
+
+    Table extraction is skipped for pages with more than `max_page_edges` ruling
+    objects, and abandoned for pages where it took longer than `page_budget_s`;
+    those pages use the text path and mark the layout as text-first.
+    `pages` (1-based) restricts extraction to a subset, in document order.
     """
+    if report is None:
+        report = ExtractionReport()
     lines: List[RawLine] = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with pdfplumber_document(source) as pdf:
+        report.layout_key = layout_key_for(pdf)
+        text_mode = layout_prefers_text(report.layout_key)
+        report.start_mode = "text" if text_mode else "table"
+
+        wanted = set(pages) if pages is not None else None
         for page_index, page in enumerate(pdf.pages):
             page_no = page_index + 1
-            row_no = 0
-
-            tables = page.extract_tables() or []
-            if tables:
-                for table in tables:
-                    for row in table:
-                        row_no += 1
-                        cells = [str(cell).strip() if cell is not None else "" for cell in row]
-                        joined = " | ".join(cells).strip(" |")
-                        if not joined:
-                            continue
-
-                        date_text = cells[0] if cells and DATE_RE.match(cells[0]) else None
-                        numeric_cells = [c for c in cells if _looks_like_amount(c)]
-                        line_type = "TRANSACTION" if date_text and numeric_cells else "NON_TXN_LINE"
-
-                        lines.append(
-                            RawLine(
-                                page_no=page_no,
-                                row_no=row_no,
-                                raw_row_text=joined,
-                                date_text=date_text,
-                                narration_text=None,
-                                dr_text=None,
-                                cr_text=None,
-                                bal_text=None,
-                                line_type=line_type,
-                                extraction_method="pdfplumber_table",
-                            )
-                        )
+            if wanted is not None and page_no not in wanted:
                 continue
+            page_started = time.perf_counter()
+            stat = PageStat(page_no=page_no, method="text", wall_ms=0.0)
+
+            if not text_mode and max_page_edges is not None:
+                edge_count = len(page.lines) + len(page.rects) + len(page.curves)
+                if edge_count > max_page_edges:
+                    stat.over_budget = True
 
-            text = page.extract_text() or ""
-            for text_line in text.splitlines():
-                row_no += 1
-                cleaned = text_line.strip()
-                if not cleaned:
-                    continue
-
-                match = re.match(r"^(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})\s+(.*)$", cleaned)
-                if match:
-                    lines.append(
-                        RawLine(
-                            page_no=page_no,
-                            row_no=row_no,
-                            raw_row_text=cleaned,
-                            date_text=match.group(1),
-                            narration_text=match.group(2),
-                            dr_text=None,
-                            cr_text=None,
-                            bal_text=None,
-                            line_type="TRANSACTION",
-                            extraction_method="pdfplumber_text",
-                        )
-                    )
-                else:
-                    lines.append(
-                        RawLine(
-                            page_no=page_no,
-                            row_no=row_no,
-                            raw_row_text=cleaned,
-                            date_text=None,
-                            narration_text=cleaned,
-                            dr_text=None,
-                            cr_text=None,
-                            bal_text=None,
-                            line_type="NON_TXN_LINE",
-                            extraction_method="pdfplumber_text",
-                        )
-                    )
+            page_lines: Optional[List[RawLine]] = None
+            if not text_mode and not stat.over_budget:
+                table_started = time.perf_counter()
+                tables = page.extract_tables() or []
+                stat.table_ms = (time.perf_counter() - table_started) * 1000.0
+                stat.table_count = len(tables)
+                if page_budget_s is not None and stat.table_ms > page_budget_s * 1000.0:
+                    stat.over_budget = True
+                elif tables:
+                    stat.method = "table"
+                    page_lines = _table_lines(page_no, tables, "pdfplumber_table")
+
+            if page_lines is None:
+                page_lines = _text_lines(page_no, page.extract_text() or "", "pdfplumber_text")
+
+            stat.char_count = len(page.chars)
+            stat.lines_emitted = len(page_lines)
+            stat.wall_ms = (time.perf_counter() - page_started) * 1000.0
+            report.add_page(stat)
+            lines.extend(page_lines)
+
+    record_slow_layout(report.layout_key, len(report.slow_pages))
     return lines
 
 
+@dataclass
+class ShardMerge:
+    """
+    merge_multiline_transactions over one page range, indices local to the shard.
+    `leading` holds continuation lines seen before the shard's first transaction;
+    they belong to the previous shard's last transaction.
+    """
+
+    line_count: int
+    leading: List[Tuple[int, str]] = field(default_factory=list)
+    rows: List[dict] = field(default_factory=list)
+
+
+def _starts_transaction(raw_line: RawLine) -> bool:
+    return raw_line.line_type == "TRANSACTION" and bool(raw_line.date_text)
+
+
+def merge_shard(raw_lines: List[RawLine]) -> ShardMerge:
+    """merge_multiline_transactions from the shard's first transaction on; the lines before it are `leading`."""
+    first = next((index for index, line in enumerate(raw_lines) if _starts_transaction(line)), len(raw_lines))
+    rows = merge_multiline_transactions(raw_lines[first:])
+    for row in rows:
+        row["raw_indices"] = [first + index for index in row["raw_indices"]]
+    leading = [(index, line.raw_row_text) for index, line in enumerate(raw_lines[:first]) if line.raw_row_text]
+    return ShardMerge(line_count=len(raw_lines), leading=leading, rows=rows)
+
+
+def stitch_shard_merges(shards: Iterable[ShardMerge]) -> List[dict]:
+    """
+    Join per-shard merges in page order into the result merge_multiline_transactions
+    gives for the concatenated lines: indices are offset by the preceding shards'
+    line counts and each shard's leading continuation lines are carried into the
+    last transaction merged so far (or dropped if there is none yet, as in the serial merge).
+    """
+    merged: List[dict] = []
+    offset = 0
+    for shard in shards:
+        if merged:
+            last = merged[-1]
+            for index, text in shard.leading:
+                last["raw_indices"].append(offset + index)
+                last["narration"] = f"{last['narration']} {text}".strip()
+        for row in shard.rows:
+            row["raw_indices"] = [offset + index for index in row["raw_indices"]]
+            merged.append(row)
+        offset += shard.line_count
+    return merged
+
+
 def merge_multiline_transactions(raw_lines: List[RawLine]) -> List[dict]:
     """
     Strict mapping:
@@ -125,7 +424,7 @@ def merge_multiline_transactions(raw_lines: List[RawLine]) -> List[dict]:
     current: Optional[dict] = None
 
     for index, raw_line in enumerate(raw_lines):
-        if raw_line.line_type == "TRANSACTION" and raw_line.date_text:
+        if _starts_transaction(raw_line):
             if current:
                 merged.append(current)
             current = {
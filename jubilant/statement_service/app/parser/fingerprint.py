@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import ctypes
+import re
+import threading
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
+from typing import Dict, List, Tuple
+
+
+IFSC_RE = re.compile(r"\b([A-Z]{4})0[A-Z0-9]{6}\b")
+NON_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+# IFSC bank prefix -> short bank code.
+IFSC_BANKS: Dict[str, str] = {
+    "TMBL": "TMB",
+    "SBIN": "SBI",
+    "HDFC": "HDFC",
+    "ICIC": "ICICI",
+    "UTIB": "AXIS",
+    "KKBK": "KOTAK",
+    "CNRB": "CANARA",
+    "IOBA": "IOB",
+    "IDIB": "INDIAN",
+    "BARB": "BOB",
+    "PUNB": "PNB",
+    "UBIN": "UNION",
+    "CIUB": "CUB",
+    "KVBL": "KVB",
+    "YESB": "YES",
+    "INDB": "INDUSIND",
+    "FDRL": "FEDERAL",
+}
+
+# Fallback when no IFSC is printed: bank names as they appear in headers/footers.
+BANK_NAME_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("TMB", re.compile(r"TAMILNAD\s+MERCANTILE\s+BANK")),
+    ("SBI", re.compile(r"STATE\s+BANK\s+OF\s+INDIA")),
+    ("HDFC", re.compile(r"HDFC\s+BANK")),
+    ("ICICI", re.compile(r"ICICI\s+BANK")),
+    ("AXIS", re.compile(r"AXIS\s+BANK")),
+    ("KOTAK", re.compile(r"KOTAK\s+MAHINDRA")),
+    ("CANARA", re.compile(r"CANARA\s+BANK")),
+    ("IOB", re.compile(r"INDIAN\s+OVERSEAS\s+BANK")),
+    ("INDIAN", re.compile(r"\bINDIAN\s+BANK\b")),
+    ("CUB", re.compile(r"CITY\s+UNION\s+BANK")),
+    ("KVB", re.compile(r"KARUR\s+VYSYA")),
+]
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    bank: str  # short bank code or UNKNOWN
+    layout: str  # slug of the generator (creator/producer), "generic" when absent
+    producer: str = ""
+    creator: str = ""
+    fonts: Tuple[str, ...] = ()
+    confidence: float = 0.0
+    cached: bool = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.bank}:{self.layout}"
+
+
+UNKNOWN_FINGERPRINT = Fingerprint(bank="UNKNOWN", layout="generic")
+
+# (producer, creator, first page size) -> fingerprint. Only confident results
+# from PDFs that carry producer metadata are cached, since generic producers
+# (Word, ReportLab, ...) are shared across banks.
+_fingerprint_cache: Dict[Tuple[str, str, str], Fingerprint] = {}
+_cache_lock = threading.Lock()
+CACHE_MIN_CONFIDENCE = 0.8
+
+
+def _slug(value: str) -> str:
+    return NON_SLUG_RE.sub("_", value.lower()).strip("_")
+
+
+def detect_bank(text: str) -> Tuple[str, float]:
+    upper = text.upper()
+    for match in IFSC_RE.finditer(upper):
+        bank = IFSC_BANKS.get(match.group(1))
+        if bank:
+            return bank, 0.95
+    for bank, pattern in BANK_NAME_PATTERNS:
+        if pattern.search(upper):
+            return bank, 0.7
+    return "UNKNOWN", 0.0
+
+
+def _page_fonts(textpage, sample: int = 200) -> Tuple[str, ...]:
+    import pypdfium2.raw as pdfium_c
+
+    fonts = set()
+    for index in range(min(sample, textpage.count_chars())):
+        size = pdfium_c.FPDFText_GetFontInfo(textpage.raw, index, None, 0, None)
+        if size <= 0:
+            continue
+        buffer = ctypes.create_string_buffer(size)
+        pdfium_c.FPDFText_GetFontInfo(textpage.raw, index, buffer, size, None)
+        name = buffer.value.decode("utf-8", errors="ignore")
+        if name:
+            fonts.add(name.split("+", 1)[-1])
+    return tuple(sorted(fonts))
+
+
+def fingerprint_pdf(pdf_path_or_bytes) -> Fingerprint:
+    """
+    Identify bank + layout from metadata and first-page text/fonts only.
+    Repeat producers (same generator and page size) hit the cache and skip text detection.
+    """
+    from .source import PDFIUM_LOCK, pdfium_document
+
+    with ExitStack() as stack:
+        try:
+            pdf = stack.enter_context(pdfium_document(pdf_path_or_bytes))
+        except Exception:
+            return UNKNOWN_FINGERPRINT
+        stack.enter_context(PDFIUM_LOCK)
+        meta = pdf.get_metadata_dict()
+        producer = str(meta.get("Producer") or "").strip()
+        creator = str(meta.get("Creator") or "").strip()
+        if len(pdf) == 0:
+            return replace(UNKNOWN_FINGERPRINT, producer=producer, creator=creator)
+        width, height = pdf.get_page_size(0)
+        cache_key = (producer, creator, f"{round(width)}x{round(height)}")
+        if producer or creator:
+            with _cache_lock:
+                cached = _fingerprint_cache.get(cache_key)
+            if cached is not None:
+                return replace(cached, cached=True)
+
+        page = pdf[0]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range()
+            fonts = _page_fonts(textpage)
+        finally:
+            textpage.close()
+            page.close()
+
+    bank, confidence = detect_bank(text)
+    fingerprint = Fingerprint(
+        bank=bank,
+        layout=_slug(creator or producer) or "generic",
+        producer=producer,
+        creator=creator,
+        fonts=fonts,
+        confidence=confidence,
+    )
+    if (producer or creator) and confidence >= CACHE_MIN_CONFIDENCE:
+        with _cache_lock:
+            _fingerprint_cache[cache_key] = fingerprint
+    return fingerprint
+
+
+def clear_fingerprint_cache() -> None:
+    with _cache_lock:
+        _fingerprint_cache.clear()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .banks import GenericBankParser, parser_for
+from .engines import PdfplumberEngine
+from .fingerprint import UNKNOWN_FINGERPRINT, fingerprint_pdf
+from .source import PDFIUM_LOCK, pdfium_document, source_size
+
+# Fewer characters than this and the page is treated as scanned (image only).
+MIN_TEXT_CHARS = 20
+
+
+@dataclass
+class PageInspection:
+    page_no: int
+    char_count: int
+    has_text: bool
+    path_count: int  # vector path objects: ruling lines / table grid density
+
+
+@dataclass
+class PdfInspection:
+    page_count: int = 0
+    size_bytes: int = 0
+    encrypted: bool = False
+    error: Optional[str] = None
+    producer: str = ""
+    creator: str = ""
+    fingerprint: str = UNKNOWN_FINGERPRINT.key
+    fingerprint_confidence: float = 0.0
+    parser: str = GenericBankParser.__name__
+    engine: str = PdfplumberEngine.name
+    pages: List[PageInspection] = field(default_factory=list)
+
+    @property
+    def text_pages(self) -> int:
+        return sum(1 for p in self.pages if p.has_text)
+
+    @property
+    def scanned_pages(self) -> List[int]:
+        return [p.page_no for p in self.pages if not p.has_text]
+
+    @property
+    def ruled_pages(self) -> int:
+        max_paths = int(os.environ.get("STATEMENT_TEXT_ENGINE_MAX_PATHS", "40"))
+        return sum(1 for p in self.pages if p.path_count > max_paths)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["text_pages"] = self.text_pages
+        data["scanned_pages"] = self.scanned_pages
+        data["ruled_pages"] = self.ruled_pages
+        data["avg_paths_per_page"] = (
+            round(sum(p.path_count for p in self.pages) / len(self.pages), 1) if self.pages else 0.0
+        )
+        return data
+
+
+def inspect_pdf(pdf_path_or_bytes, engine_name: str = "auto") -> PdfInspection:
+    """
+    Open a PDF without extracting it: page count, text layer and path-object
+    count per page, fingerprint and the engine parse_statement would use.
+    Costs roughly a text-layer character count per page.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    inspection = PdfInspection()
+    inspection.size_bytes = source_size(pdf_path_or_bytes)
+    with ExitStack() as stack:
+        try:
+            pdf = stack.enter_context(pdfium_document(pdf_path_or_bytes))
+        except Exception as exc:
+            # Password-protected, truncated or otherwise unreadable: reported, not raised.
+            message = str(exc) or type(exc).__name__
+            inspection.encrypted = "password" in message.lower()
+            inspection.error = message
+            return inspection
+        stack.enter_context(PDFIUM_LOCK)
+        inspection.page_count = len(pdf)
+        meta = pdf.get_metadata_dict()
+        inspection.producer = str(meta.get("Producer") or "").strip()
+        inspection.creator = str(meta.get("Creator") or "").strip()
+        for page_index in range(inspection.page_count):
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            try:
+                char_count = textpage.count_chars()
+                path_count = sum(1 for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=2))
+            finally:
+                textpage.close()
+                page.close()
+            inspection.pages.append(
+                PageInspection(
+                    page_no=page_index + 1,
+                    char_count=char_count,
+                    has_text=char_count >= MIN_TEXT_CHARS,
+                    path_count=path_count,
+                )
+            )
+
+    fingerprint = fingerprint_pdf(pdf_path_or_bytes)
+    inspection.fingerprint = fingerprint.key
+    inspection.fingerprint_confidence = fingerprint.confidence
+    parser = parser_for(fingerprint)
+    inspection.parser = type(parser).__name__
+    inspection.engine = parser.planned_engine(pdf_path_or_bytes, engine_name)
+    return inspection
@@ -1,6 +1,14 @@
 from __future__ import annotations
 
-from typing import Set
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .fingerprint import IFSC_RE
+
+# "Account No : 0001 1122 2333", "A/C No. XXXXXX1234", "Acct # 50100012345678".
+ACCOUNT_NO_RE = re.compile(
+    r"\b(?:A/C|ACCOUNT|ACCT)\.?\s*(?:NO|NUMBER|NUM|#)?\.?\s*[:\-]*\s*([0-9X*]{2,}(?:[ -][0-9X*]{2,})*)\b"
+)
 
 
 def reconcile_strict(raw_lines, mapped_raw_indices: Set[int]) -> int:
@@ -13,3 +21,58 @@ def reconcile_strict(raw_lines, mapped_raw_indices: Set[int]) -> int:
         if raw_line.line_type == "TRANSACTION" and index not in mapped_raw_indices:
             unmapped += 1
     return unmapped
+
+
+def unmapped_pages(raw_lines, mapped_raw_indices: Set[int]) -> Set[int]:
+    """Pages holding TRANSACTION rows that reconcile_strict counts as unmapped."""
+    return {
+        raw_line.page_no
+        for index, raw_line in enumerate(raw_lines)
+        if raw_line.line_type == "TRANSACTION" and index not in mapped_raw_indices
+    }
+
+
+def statement_account(header_lines: Iterable[str]) -> Optional[str]:
+    """
+    Account printed in a statement header: the account number, prefixed with the
+    IFSC when one is printed. None when no number with at least four digits is found.
+    """
+    text = "\n".join(header_lines).upper()
+    match = ACCOUNT_NO_RE.search(text)
+    if match is None:
+        return None
+    number = re.sub(r"[ -]", "", match.group(1)).replace("*", "X")
+    if sum(ch.isdigit() for ch in number) < 4:
+        return None
+    ifsc = IFSC_RE.search(text)
+    return f"{ifsc.group(0)}:{number}" if ifsc else number
+
+
+def overlap_key(account: str, txn_date: Any, amount: Any, balance: Any, narration: str) -> Optional[Tuple[Any, ...]]:
+    """Identity of a row for cross-PDF overlap matching; None when the row has no balance to anchor it."""
+    if balance is None:
+        return None
+    return (account, str(txn_date), f"{float(amount):.2f}", f"{float(balance):.2f}", narration)
+
+
+def overlap_duplicates(keyed_rows: Iterable[Tuple[str, Optional[Tuple[Any, ...]]]]) -> List[int]:
+    """
+    Positions of rows that repeat rows of an earlier PDF, for `(pdf_id, key)`
+    pairs in PDF order. A key seen n times in earlier PDFs drops the first n
+    copies in a later one; repeats within a single PDF are genuine and kept.
+    """
+    seen: Dict[Tuple[Any, ...], int] = {}
+    current: Dict[Tuple[Any, ...], int] = {}
+    current_pdf: Optional[str] = None
+    dropped: List[int] = []
+    for position, (pdf_id, key) in enumerate(keyed_rows):
+        if pdf_id != current_pdf:
+            for done_key, count in current.items():
+                seen[done_key] = max(seen.get(done_key, 0), count)
+            current, current_pdf = {}, pdf_id
+        if key is None:
+            continue
+        current[key] = current.get(key, 0) + 1
+        if current[key] <= seen.get(key, 0):
+            dropped.append(position)
+    return dropped
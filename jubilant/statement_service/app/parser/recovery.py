@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from .engines import PdfiumTextEngine, PdfplumberEngine
+from .extract import RawLine
+
+# Engines to retry failing pages with, in order, keyed by the engine that produced them.
+# pdfium_text is the pdfplumber text path, so it is the "tables off" retry for pdfplumber.
+ALTERNATE_ENGINES: Dict[str, Tuple[str, ...]] = {
+    PdfplumberEngine.name: (PdfiumTextEngine.name,),
+    PdfiumTextEngine.name: (PdfplumberEngine.name,),
+    "lattice": (PdfplumberEngine.name, PdfiumTextEngine.name),
+}
+
+
+def alternate_engines(engine_name: str) -> Tuple[str, ...]:
+    return ALTERNATE_ENGINES.get(engine_name, (PdfplumberEngine.name,))
+
+
+def splice_pages(raw_lines: List[RawLine], replacement: List[RawLine], pages: Iterable[int]) -> List[RawLine]:
+    """Replace every line of `pages` with the re-extracted lines, keeping page order."""
+    pages = set(pages)
+    by_page: Dict[int, List[RawLine]] = {}
+    for line in raw_lines:
+        if line.page_no not in pages:
+            by_page.setdefault(line.page_no, []).append(line)
+    for line in replacement:
+        if line.page_no in pages:
+            by_page.setdefault(line.page_no, []).append(line)
+    return [line for page_no in sorted(by_page) for line in by_page[page_no]]
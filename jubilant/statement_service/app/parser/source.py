@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Tuple, Union
+
+# A PDF handed to the parser: a filesystem path, the downloaded bytes, or a
+# memory-mapped file. Engines open sources through the helpers below, so bytes
+# and mmaps are parsed in place; only process-pool fan-out (shards, lattice
+# pages) needs a path, and `source_path` writes one to scratch for that.
+
+PdfSource = Union[str, bytes, mmap.mmap]
+
+# pdfium keeps global library state and is not thread-safe: every pypdfium2
+# call (open, page load, text/char reads, close) is made holding this lock.
+# Callers copy what they need into plain Python objects and work on those
+# outside it. Re-entrant so a helper can take it while its caller holds it.
+PDFIUM_LOCK = threading.RLock()
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only stream over an mmap for pdfium, copying only the blocks it reads."""
+
+    def __init__(self, buffer: Any) -> None:
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        size = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:size] = self._view[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+def source_size(source: PdfSource) -> int:
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    return len(source)
+
+
+@contextmanager
+def pdfium_document(source: PdfSource) -> Iterator[Any]:
+    """
+    Open `source` with pdfium; the document is closed when the block exits.
+    Opening and closing take PDFIUM_LOCK; calls on the document inside the
+    block must take it too.
+    """
+    import pypdfium2 as pdfium
+
+    with PDFIUM_LOCK:
+        if isinstance(source, (str, bytes)):
+            pdf = pdfium.PdfDocument(source)
+        else:
+            # autoclose: the reader (and its export of the mmap) is released with the document.
+            pdf = pdfium.PdfDocument(_BufferReader(source), autoclose=True)
+    try:
+        yield pdf
+    finally:
+        with PDFIUM_LOCK:
+            pdf.close()
+
+
+def pdfplumber_document(source: PdfSource):
+    import pdfplumber
+
+    if isinstance(source, str):
+        return pdfplumber.open(source)
+    if isinstance(source, bytes):
+        return pdfplumber.open(io.BytesIO(source))
+    # pdfminer only needs read/seek, which an mmap has.
+    return pdfplumber.open(source)
+
+
+@contextmanager
+def source_path(source: PdfSource, label: str = "pdf") -> Iterator[Tuple[str, int]]:
+    """
+    A path for `source`, plus the scratch bytes written to provide it (0 for a
+    path source). The scratch copy is removed when the block exits.
+    """
+    if isinstance(source, str):
+        yield source, 0
+        return
+    from ..scratch import ScratchSpace
+
+    with ScratchSpace(label) as scratch:
+        yield scratch.write("source.pdf", source), len(source)
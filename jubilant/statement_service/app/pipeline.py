@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .jobs import process_executor
+from .profiling import track_thread
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        deps: Tuple[str, ...],
+        isolation: str,
+    ) -> None:
+        if isolation not in ("thread", "process"):
+            raise ValueError(f"Unknown stage isolation: {isolation}")
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.deps = deps
+        self.isolation = isolation
+
+    def __call__(self) -> Any:
+        if self.isolation == "process":
+            # fn and arguments must be picklable; the result comes back by value.
+            return process_executor("stages", 1).submit(self.fn, *self.args, **self.kwargs).result()
+        return self.fn(*self.args, **self.kwargs)
+
+
+class StageGraph:
+    """
+    Small dependency graph of job stages. Stages whose dependencies are done run
+    concurrently on a thread pool (or a spawn process for isolation="process").
+    On the first failure no further stages start; stages already running are
+    awaited, then the original exception is raised, so callers see the same
+    exception-then-status ordering as sequential code.
+    """
+
+    def __init__(self, max_workers: int = 4, on_done: Optional[Callable[[str, float], None]] = None) -> None:
+        self.max_workers = max_workers
+        self.on_done = on_done
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.durations: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        deps: Tuple[str, ...] = (),
+        isolation: str = "thread",
+        **kwargs: Any,
+    ) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        self.stages[name] = Stage(name, fn, args, kwargs, tuple(deps), isolation)
+        return self
+
+    def _timed(self, stage: Stage) -> Any:
+        started = time.perf_counter()
+        try:
+            with track_thread(f"stage:{stage.name}"):
+                return stage()
+        finally:
+            self.durations[stage.name] = round(time.perf_counter() - started, 4)
+            if self.on_done is not None:
+                self.on_done(stage.name, self.durations[stage.name])
+
+    def run(self) -> Dict[str, Any]:
+        pending: List[str] = list(self.stages)
+        running: Dict[Future, str] = {}
+        done: set = set()
+        failure: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                if failure is None:
+                    for name in [n for n in pending if all(dep in done for dep in self.stages[n].deps)]:
+                        pending.remove(name)
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._timed, self.stages[name])] = name
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exc = future.exception()
+                    if exc is not None:
+                        failure = failure or exc
+                    else:
+                        self.results[name] = future.result()
+                        done.add(name)
+        if failure is not None:
+            raise failure
+        return self.results
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import contextvars
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Statistical profiler for one parse job. A daemon thread wakes every
+# `interval_s` and records the Python stacks of the threads working for the job:
+# the request thread, plus StageGraph stage threads, which attach themselves
+# through the context variable below. Other requests' threads are never sampled.
+# Worker processes (shards, lattice, isolated stages) are not visible from here.
+
+_active: contextvars.ContextVar[Optional["SamplingProfiler"]] = contextvars.ContextVar(
+    "statement_profiler", default=None
+)
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages/", "statement_service/"):
+        index = path.rfind(marker)
+        if index >= 0:
+            return path[index + len(marker):]
+    return path
+
+
+class SamplingProfiler:
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 200) -> None:
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration_s = 0.0
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._frame_cache: Dict[Any, Frame] = {}
+
+    def track(self, ident: int, label: str) -> None:
+        with self._lock:
+            self._threads[ident] = label
+
+    def untrack(self, ident: int) -> None:
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="statement-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._done.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self.started_at is not None:
+            self.duration_s = time.perf_counter() - self.started_at
+        return self
+
+    def _frame(self, code: Any) -> Frame:
+        frame = self._frame_cache.get(code)
+        if frame is None:
+            frame = (code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+            self._frame_cache[code] = frame
+        return frame
+
+    def _run(self) -> None:
+        while not self._done.wait(self.interval_s):
+            with self._lock:
+                threads = dict(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident, label in threads.items():
+                frame = frames.get(ident)
+                stack: List[Frame] = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    stack.append((label, "", 0))
+                    self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    # -- exports -------------------------------------------------------------
+
+    @staticmethod
+    def _frame_name(frame: Frame) -> str:
+        name, path, line = frame
+        return f"{name} ({path}:{line})" if path else name
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg's folded format: `root;child;leaf count` per line."""
+        lines = [
+            ";".join(self._frame_name(frame).replace(";", ":") for frame in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope.app file: one sampled profile, stacks weighted by sampled seconds."""
+        index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.stacks.most_common():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    entry: Dict[str, Any] = {"name": frame[0]}
+                    if frame[1]:
+                        entry.update({"file": frame[1], "line": frame[2]})
+                    frames.append(entry)
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(count * self.interval_s, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "statement_service",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 6),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "interval_ms": round(self.interval_s * 1000.0, 3),
+            "duration_s": round(self.duration_s, 3),
+            "stacks": len(self.stacks),
+        }
+
+
+def profiling_active() -> bool:
+    return _active.get() is not None
+
+
+@contextmanager
+def profile_job(interval_s: float, label: str = "job") -> Iterator[SamplingProfiler]:
+    """Profile the calling thread (and stage threads it starts) for the duration of the block."""
+    profiler = SamplingProfiler(interval_s=interval_s)
+    token = _active.set(profiler)
+    profiler.track(threading.get_ident(), label)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active.reset(token)
+
+
+@contextmanager
+def track_thread(label: str) -> Iterator[None]:
+    """Attach the current thread to the job's profiler, if the job is being profiled."""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profiler.track(ident, label)
+    try:
+        yield
+    finally:
+        profiler.untrack(ident)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Parse jobs publish from the request thread. Thread subscribers wait on the
+# job's condition; SSE subscribers are coroutines on the server's event loop and
+# get a per-subscriber asyncio.Event set through call_soon_threadsafe, so an
+# open stream holds no thread. Publishing is a lock, a deque append and the
+# wake-ups, so it is cheap enough for the per-page extraction loop.
+
+_MAX_EVENTS_PER_JOB = 5000
+TERMINAL_EVENTS = ("done", "failed")
+
+
+class ProgressEvent:
+    __slots__ = ("seq", "event", "data")
+
+    def __init__(self, seq: int, event: str, data: Dict[str, Any]) -> None:
+        self.seq = seq
+        self.event = event
+        self.data = data
+
+    def to_sse(self) -> str:
+        return f"id: {self.seq}\nevent: {self.event}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class ProgressJob:
+    """Event channel of one parse job, plus the running counters its events report."""
+
+    def __init__(self, bus: "ProgressBus", key: str) -> None:
+        self.bus = bus
+        self.key = key
+        self.events: Deque[ProgressEvent] = deque(maxlen=_MAX_EVENTS_PER_JOB)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.started = False
+        self.subscribers = 0
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.pages_done = 0
+        self.pages_total = 0
+        self.rows = 0
+
+    def publish(self, event: str, **data: Any) -> None:
+        with self.condition:
+            if self.closed:
+                return
+            data.setdefault("elapsed_s", round(time.perf_counter() - self._started, 3))
+            self.events.append(ProgressEvent(next(self.bus._seq), event, data))
+            if event in TERMINAL_EVENTS:
+                self.closed = True
+            self.condition.notify_all()
+            waiters = list(self.waiters)
+        for loop, wake in waiters:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # the subscriber's loop has shut down
+
+    def _attach(self, waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None) -> None:
+        with self.condition:
+            self.subscribers += 1
+            if waiter is not None:
+                self.waiters.append(waiter)
+
+    def _detach(self, waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None) -> None:
+        with self.condition:
+            self.subscribers -= 1
+            if waiter is not None and waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def _pending(self, after: int) -> Tuple[List[ProgressEvent], bool]:
+        with self.condition:
+            return [event for event in self.events if event.seq > after], self.closed
+
+    @property
+    def evictable(self) -> bool:
+        """Finished, or a channel nobody has started or is still watching."""
+        return self.closed or (not self.started and self.subscribers == 0)
+
+    def stage(self, name: str, seconds: float) -> None:
+        """StageClock lap hook: `name` just finished after `seconds`."""
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds, 4)
+        self.publish("stage", stage=name, seconds=round(seconds, 4), stages=dict(self.stages))
+
+    def pdf_started(self, pdf_id: str, index: int, pdf_count: int, page_count: Optional[int]) -> None:
+        self.pages_total += page_count or 0
+        self.publish(
+            "pdf",
+            pdf_file_id=pdf_id,
+            pdf_index=index,
+            pdf_count=pdf_count,
+            page_count=page_count,
+            pages_done=self.pages_done,
+            pages_total=self.pages_total,
+        )
+
+    def page(self, pdf_id: str, stat: Any) -> None:
+        """ExtractionReport page hook."""
+        self.pages_done += 1
+        self.rows += stat.lines_emitted
+        self.publish(
+            "page",
+            pdf_file_id=pdf_id,
+            page_no=stat.page_no,
+            method=stat.method,
+            wall_ms=round(stat.wall_ms, 1),
+            lines=stat.lines_emitted,
+            pages_done=self.pages_done,
+            pages_total=self.pages_total,
+            rows_so_far=self.rows,
+        )
+
+    def finish(self, event: str, **data: Any) -> None:
+        self.publish(event, stages=dict(self.stages), pages_done=self.pages_done, rows_so_far=self.rows, **data)
+
+
+class ProgressBus:
+    """
+    In-process pub/sub of parse progress keyed by version_id. Events are kept per
+    job (bounded) so late or reconnecting subscribers replay what they missed;
+    sequence numbers are global, so a `Last-Event-ID` from an earlier run of the
+    same version never hides events of the next one.
+    """
+
+    def __init__(self, max_jobs: int = 256) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ProgressJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def _channel(self, key: str, fresh: bool) -> ProgressJob:
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (fresh and job.closed):
+                job = ProgressJob(self, key)
+                self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            # Running jobs and watched channels are never evicted; the table may
+            # exceed max_jobs while they are (running jobs are bounded by the scheduler).
+            excess = len(self._jobs) - self.max_jobs
+            if excess > 0:
+                for stale in [k for k, j in self._jobs.items() if k != key and j.evictable][:excess]:
+                    del self._jobs[stale]
+            return job
+
+    def start(self, key: str, **data: Any) -> ProgressJob:
+        """Open (or reopen after a finished run) the channel for `key`; waiting subscribers keep their channel."""
+        job = self._channel(key, fresh=True)
+        job.started = True
+        job.publish("started", **data)
+        return job
+
+    def get(self, key: str) -> Optional[ProgressJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def subscribe(
+        self,
+        key: str,
+        last_event_id: int = 0,
+        heartbeat_s: float = 15.0,
+        idle_timeout_s: Optional[float] = 600.0,
+    ) -> Iterator[Optional[ProgressEvent]]:
+        """
+        Yield events of `key` after `last_event_id` until the job finishes. Yields
+        None every `heartbeat_s` without events (for keep-alive comments) and stops
+        after `idle_timeout_s` without any. Subscribing before the job starts is allowed.
+        """
+        job = self._channel(key, fresh=False)
+        job._attach()
+        last = last_event_id
+        idle_since = time.monotonic()
+        try:
+            while True:
+                with job.condition:
+                    pending = [event for event in job.events if event.seq > last]
+                    if not pending and not job.closed:
+                        job.condition.wait(heartbeat_s)
+                        pending = [event for event in job.events if event.seq > last]
+                    closed = job.closed
+                for event in pending:
+                    last = event.seq
+                    yield event
+                if pending:
+                    idle_since = time.monotonic()
+                if closed and not pending:
+                    return
+                if not pending:
+                    # A new run of the same version replaces a finished channel.
+                    current = self.get(key)
+                    if current is not None and current is not job:
+                        job._detach()
+                        job = current
+                        job._attach()
+                        continue
+                    if idle_timeout_s is not None and time.monotonic() - idle_since >= idle_timeout_s:
+                        return
+                    yield None
+        finally:
+            job._detach()
+
+    async def subscribe_async(
+        self,
+        key: str,
+        last_event_id: int = 0,
+        heartbeat_s: float = 15.0,
+        idle_timeout_s: Optional[float] = 600.0,
+    ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """`subscribe` for coroutines: waits on the event loop instead of blocking a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        wake = waiter[1]
+        job = self._channel(key, fresh=False)
+        job._attach(waiter)
+        last = last_event_id
+        idle_since = time.monotonic()
+        try:
+            while True:
+                wake.clear()
+                pending, closed = job._pending(last)
+                for event in pending:
+                    last = event.seq
+                    yield event
+                if pending:
+                    idle_since = time.monotonic()
+                    continue
+                if closed:
+                    return
+                current = self.get(key)
+                if current is not None and current is not job:
+                    job._detach(waiter)
+                    job = current
+                    job._attach(waiter)
+                    continue
+                if idle_timeout_s is not None and time.monotonic() - idle_since >= idle_timeout_s:
+                    return
+                try:
+                    await asyncio.wait_for(wake.wait(), heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            job._detach(waiter)
+
+
+progress_bus = ProgressBus()
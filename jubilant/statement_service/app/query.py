@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import base64
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MAX_PAGE_SIZE = 1000
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(parse_hash: str, row_index: int) -> str:
+    return base64.urlsafe_b64encode(f"{parse_hash}:{row_index}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parse_hash: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_hash, row_index = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").rsplit(":", 1)
+        value = int(row_index)
+    except Exception as exc:
+        raise CursorError("Malformed cursor") from exc
+    if cursor_hash != parse_hash:
+        raise CursorError("Cursor belongs to a previous parse of this version")
+    return value
+
+
+def plain_table(table):
+    """Decode dictionary columns once so filters compare plain strings."""
+    import pyarrow as pa
+
+    columns = []
+    for column in table.columns:
+        if pa.types.is_dictionary(column.type):
+            column = pa.chunked_array([chunk.dictionary_decode() for chunk in column.chunks], type=column.type.value_type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def query_transactions(
+    table,
+    parse_hash: str,
+    tag: Optional[str] = None,
+    month: Optional[str] = None,
+    counterparty: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    text: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Filter a version's transaction frame (ordered by row_index) and return one
+    keyset page. `tag="NONE"` matches untagged rows; counterparty and text are
+    case-insensitive substring matches.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if fields:
+        unknown = [f for f in fields if f not in table.column_names]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    mask = None
+
+    def both(condition):
+        nonlocal mask
+        mask = condition if mask is None else pc.and_kleene(mask, condition)
+
+    if tag:
+        if tag.upper() == "NONE":
+            both(pc.is_null(table["finance_tag"]))
+        else:
+            both(pc.equal(table["finance_tag"], tag.upper()))
+    if month:
+        both(pc.equal(table["month_key"], month))
+    if counterparty:
+        both(pc.match_substring(table["counterparty"], counterparty, ignore_case=True))
+    if min_amount is not None:
+        both(pc.greater_equal(table["amount"], float(min_amount)))
+    if max_amount is not None:
+        both(pc.less_equal(table["amount"], float(max_amount)))
+    if text:
+        both(pc.match_substring(table["narration"], text, ignore_case=True))
+
+    matched = table if mask is None else table.filter(pc.fill_null(mask, False))
+    total = matched.num_rows
+    if cursor:
+        after = decode_cursor(cursor, parse_hash)
+        matched = matched.filter(pc.greater(matched["row_index"], pa.scalar(after, pa.int32())))
+    page = matched.slice(0, limit + 1)
+    has_more = page.num_rows > limit
+    page = page.slice(0, limit)
+    next_cursor = encode_cursor(parse_hash, page["row_index"][-1].as_py()) if has_more and page.num_rows else None
+    if fields:
+        page = page.select(list(fields))
+    return {"items": page.to_pylist(), "matched": total, "next_cursor": next_cursor}
+
+
+class VersionFrameCache:
+    """
+    In-process LRU of decoded transaction frames keyed by (version_id, parse_hash,
+    revision), where the revision is the version's parse_completed_at, so a forced
+    re-parse with an unchanged parse_hash still gets a fresh frame. The version ->
+    (parse_hash, revision) lookup is cached for `hash_ttl_s`; `invalidate` drops a
+    version at once when this process has just re-parsed it.
+    """
+
+    def __init__(
+        self,
+        load_frame: Callable[[str, str, str], Any],
+        lookup_parse: Callable[[str], Optional[Tuple[str, str]]],
+        max_versions: int = 32,
+        hash_ttl_s: float = 30.0,
+    ) -> None:
+        self.load_frame = load_frame
+        self.lookup_parse = lookup_parse
+        self.max_versions = max_versions
+        self.hash_ttl_s = hash_ttl_s
+        self._frames: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._parses: Dict[str, Tuple[Optional[Tuple[str, str]], float]] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+    def current(self, version_id: str) -> Optional[Tuple[str, str]]:
+        """(parse_hash, revision) of the version's current parse, or None."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._parses.get(version_id)
+        if cached is not None and now - cached[1] < self.hash_ttl_s:
+            return cached[0]
+        value = self.lookup_parse(version_id)
+        with self._lock:
+            self._parses[version_id] = (value, now)
+        return value
+
+    def frame(self, version_id: str, parse_hash: str, revision: str = ""):
+        key = (version_id, parse_hash, revision)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                if key in self._frames:
+                    return self._frames[key]
+            frame = plain_table(self.load_frame(version_id, parse_hash, revision))
+            with self._lock:
+                self._frames[key] = frame
+                self._loading.pop(key, None)
+                for stale in [k for k in self._frames if k[0] == version_id and k != key]:
+                    del self._frames[stale]
+                while len(self._frames) > self.max_versions:
+                    self._frames.popitem(last=False)
+            return frame
+
+    def invalidate(self, version_id: str) -> None:
+        with self._lock:
+            self._parses.pop(version_id, None)
+            for stale in [k for k in self._frames if k[0] == version_id]:
+                del self._frames[stale]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._parses.clear()
+
+
+def frame_from_rows(rows: List[Dict[str, Any]]):
+    """Fallback frame for versions parsed before snapshots existed: `transactions` rows in table order."""
+    import datetime as dt
+
+    from .snapshot import snapshot_table
+
+    converted = []
+    for row_index, row in enumerate(rows, start=1):
+        txn_date = row.get("txn_date")
+        if isinstance(txn_date, str):
+            txn_date = dt.date.fromisoformat(txn_date[:10])
+        dr = float(row.get("dr") or 0)
+        cr = float(row.get("cr") or 0)
+        converted.append(
+            {
+                **row,
+                "row_index": row_index,
+                "txn_date": txn_date,
+                "amount": max(abs(dr), abs(cr)),
+                "balance": float(row["balance"]) if row.get("balance") is not None else None,
+                "tag_confidence": float(row["tag_confidence"]) if row.get("tag_confidence") is not None else None,
+            }
+        )
+    return snapshot_table(converted)
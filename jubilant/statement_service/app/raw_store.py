@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Blob storage mode for raw statement lines (STATEMENT_RAW_LINES_STORAGE=blob).
+# Each PDF's lines go to one zstd Parquet object, sorted by (page_no, row_no)
+# with a row group per RAW_LINES_ROW_GROUP lines, so a page read only touches the
+# row groups whose page_no statistics match. The DB keeps one raw_line_blobs row
+# per PDF, and transactions point at lines by (pdf_file_id, page_no, row_no).
+RAW_LINES_FORMAT_VERSION = "1"
+RAW_LINES_ROW_GROUP = 2048
+
+_TEXT_COLUMNS = (
+    "raw_row_text",
+    "raw_date_text",
+    "raw_narration_text",
+    "raw_dr_text",
+    "raw_cr_text",
+    "raw_balance_text",
+)
+
+
+def raw_lines_path(version_id: str, parse_hash: str, pdf_file_id: str) -> str:
+    return f"raw_lines/{version_id}/{parse_hash}/{pdf_file_id}.parquet"
+
+
+def _schema():
+    import pyarrow as pa
+
+    text_dict = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema(
+        [("page_no", pa.int32()), ("row_no", pa.int32())]
+        + [(name, pa.string()) for name in _TEXT_COLUMNS]
+        + [("line_type", text_dict), ("extraction_method", text_dict)]
+    )
+
+
+def encode_raw_lines(raw_rows: Iterable[Dict[str, Any]]) -> bytes:
+    """Parquet blob of one PDF's raw line rows (as built by `_raw_insert_rows`)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = sorted(raw_rows, key=lambda row: (row["page_no"], row["row_no"]))
+    schema = _schema().with_metadata({"raw_lines_format": RAW_LINES_FORMAT_VERSION})
+    table = pa.table({name: [row.get(name) for row in rows] for name in schema.names}, schema=schema)
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd", compression_level=6, row_group_size=RAW_LINES_ROW_GROUP)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_raw_lines(blob: bytes, pages: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """Raw line dicts of a blob, optionally only the given pages."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    filters = [("page_no", "in", list(pages))] if pages else None
+    return pq.read_table(pa.BufferReader(blob), filters=filters).to_pylist()
+
+
+def raw_line_index_row(
+    version_id: str,
+    pdf_file_id: str,
+    parse_hash: str,
+    raw_rows: Sequence[Dict[str, Any]],
+    storage_path: str,
+    size_bytes: int,
+) -> Dict[str, Any]:
+    lines_per_page: Dict[int, int] = {}
+    for row in raw_rows:
+        lines_per_page[row["page_no"]] = lines_per_page.get(row["page_no"], 0) + 1
+    page_nos = sorted(lines_per_page)
+    return {
+        "version_id": version_id,
+        "pdf_file_id": pdf_file_id,
+        "parse_hash": parse_hash,
+        "storage_path": storage_path,
+        "format": f"parquet-zstd/v{RAW_LINES_FORMAT_VERSION}",
+        "line_count": len(raw_rows),
+        "txn_line_count": sum(1 for row in raw_rows if row.get("line_type") == "TRANSACTION"),
+        "size_bytes": size_bytes,
+        "pages": {"page_no": page_nos, "lines": [lines_per_page[page] for page in page_nos]},
+    }
+
+
+def raw_line_refs(raw_lines: Sequence[Any], raw_indices: Iterable[int]) -> List[List[int]]:
+    """(page_no, row_no) coordinates of a merged transaction's raw lines within its PDF."""
+    return [[raw_lines[i].page_no, raw_lines[i].row_no] for i in raw_indices if 0 <= i < len(raw_lines)]
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config import env_float, env_int
+from .jobs import JobCancelled, JobControl
+
+# Admission control for the extraction phase of parse jobs. A job is admitted
+# once its PDFs are downloaded, so its cost is known from page counts and file
+# sizes. Jobs wait shortest-first; waiting makes a job look cheaper (aging), so a
+# large job is not starved by a steady stream of small ones. Large jobs may hold
+# at most `large_slots` of the slots, which keeps the rest free for small
+# statements, and one lead may hold at most `per_lead` slots at a time.
+
+BYTES_PER_PAGE = 250_000  # image-heavy scans: one "page" of cost per 250 KB
+SMALL = "small"
+LARGE = "large"
+
+
+def estimate_cost(page_counts: Sequence[Optional[int]], sizes: Sequence[int]) -> float:
+    """Page-equivalents of a job; a PDF whose page count is unknown is costed by size alone."""
+    cost = 0.0
+    for pages, size in zip(page_counts, sizes):
+        cost += max(float(pages or 0), size / BYTES_PER_PAGE)
+    return round(max(cost, 1.0), 1)
+
+
+class Ticket:
+    def __init__(self, seq: int, version_id: str, lead_id: Optional[str], cost: float, lane: str) -> None:
+        self.seq = seq
+        self.version_id = version_id
+        self.lead_id = lead_id
+        self.cost = cost
+        self.lane = lane
+        self.state = "queued"
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+
+    def waited_s(self, now: Optional[float] = None) -> float:
+        end = self.admitted_at if self.admitted_at is not None else (now or time.monotonic())
+        return end - self.enqueued_at
+
+    def as_dict(self, position: Optional[int] = None) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            "version_id": self.version_id,
+            "lead_id": self.lead_id,
+            "state": self.state,
+            "lane": self.lane,
+            "cost_pages": self.cost,
+            "waited_s": round(self.waited_s(), 3),
+        }
+        if position is not None:
+            info["queue_position"] = position
+        return info
+
+
+class LaneScheduler:
+    def __init__(
+        self,
+        slots: int,
+        large_slots: Optional[int] = None,
+        small_max_pages: float = 50.0,
+        per_lead: Optional[int] = 2,
+        aging_s: float = 30.0,
+    ) -> None:
+        self.slots = max(1, slots)
+        self.large_slots = max(1, min(self.slots, large_slots if large_slots else (self.slots + 1) // 2))
+        self.small_max_pages = small_max_pages
+        self.per_lead = per_lead
+        self.aging_s = aging_s
+        self._cond = threading.Condition()
+        self._seq = itertools.count(1)
+        self._waiting: List[Ticket] = []
+        self._running: List[Ticket] = []
+
+    def lane_for(self, cost: float) -> str:
+        return SMALL if cost <= self.small_max_pages else LARGE
+
+    def _priority(self, ticket: Ticket, now: float) -> tuple:
+        # Shortest job first; every `aging_s` waited takes a small job's worth of pages off the cost.
+        aged = ticket.cost
+        if self.aging_s:
+            aged -= ticket.waited_s(now) / self.aging_s * self.small_max_pages
+        return (aged, ticket.seq)
+
+    def _can_start(self, ticket: Ticket) -> bool:
+        if len(self._running) >= self.slots:
+            return False
+        if ticket.lane == LARGE and sum(1 for t in self._running if t.lane == LARGE) >= self.large_slots:
+            return False
+        if self.per_lead and ticket.lead_id is not None:
+            if sum(1 for t in self._running if t.lead_id == ticket.lead_id) >= self.per_lead:
+                return False
+        return True
+
+    def _next(self) -> Optional[Ticket]:
+        now = time.monotonic()
+        for ticket in sorted(self._waiting, key=lambda t: self._priority(t, now)):
+            if self._can_start(ticket):
+                return ticket
+        return None
+
+    def acquire(
+        self,
+        version_id: str,
+        cost: float,
+        lead_id: Optional[str] = None,
+        control: Optional[JobControl] = None,
+        poll_s: float = 0.25,
+    ) -> Ticket:
+        """Block until the job may run; a cancelled or timed-out job leaves the queue with JobCancelled."""
+        with self._cond:
+            ticket = Ticket(next(self._seq), version_id, lead_id, cost, self.lane_for(cost))
+            self._waiting.append(ticket)
+            try:
+                while self._next() is not ticket:
+                    if control is not None:
+                        control.check()
+                    # Timed wait: aging changes the order without anyone notifying.
+                    self._cond.wait(poll_s)
+            except JobCancelled:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._waiting.remove(ticket)
+            ticket.state = "running"
+            ticket.admitted_at = time.monotonic()
+            self._running.append(ticket)
+            self._cond.notify_all()
+            return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        with self._cond:
+            if ticket in self._running:
+                self._running.remove(ticket)
+            ticket.state = "done"
+            self._cond.notify_all()
+
+    def status(self, version_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            for ticket in self._running:
+                if ticket.version_id == version_id:
+                    return ticket.as_dict()
+            now = time.monotonic()
+            order = sorted(self._waiting, key=lambda t: self._priority(t, now))
+            for position, ticket in enumerate(order, start=1):
+                if ticket.version_id == version_id:
+                    return ticket.as_dict(position)
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "large_slots": self.large_slots,
+                "small_max_pages": self.small_max_pages,
+                "per_lead": self.per_lead,
+                "running": {lane: sum(1 for t in self._running if t.lane == lane) for lane in (SMALL, LARGE)},
+                "queued": {lane: sum(1 for t in self._waiting if t.lane == lane) for lane in (SMALL, LARGE)},
+            }
+
+
+_scheduler: Optional[LaneScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def job_scheduler() -> LaneScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            # One slot per extraction worker: more would just queue FIFO inside the pool.
+            slots = (
+                env_int("STATEMENT_JOB_SLOTS", None, positive=True)
+                or env_int("STATEMENT_EXTRACT_WORKERS", None, positive=True)
+                or min(4, os.cpu_count() or 1)
+            )
+            _scheduler = LaneScheduler(
+                slots,
+                large_slots=env_int("STATEMENT_LARGE_JOB_SLOTS", None, positive=True),
+                small_max_pages=env_float("STATEMENT_SMALL_JOB_PAGES", 50.0, positive=True) or 50.0,
+                per_lead=env_int("STATEMENT_JOBS_PER_LEAD", 2, positive=True),
+                aging_s=env_float("STATEMENT_JOB_AGING_S", 30.0, positive=True) or 0.0,
+            )
+        return _scheduler
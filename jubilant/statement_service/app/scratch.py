@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+# Scratch directories for parse jobs and workbook builds. A ScratchSpace owns one
+# directory and deletes it on exit, whatever happened inside the block. Directory
+# names carry the owning pid, so a space left behind by a killed worker process
+# is removed by `sweep_orphans()` (run at startup) once that pid is gone.
+
+_PREFIX = "stmt-scratch-"
+
+
+def scratch_root() -> str:
+    path = os.environ.get("STATEMENT_SCRATCH_DIR") or tempfile.gettempdir()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _du(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class _Usage:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.active: Dict[str, "ScratchSpace"] = {}
+        self.spaces = 0
+        self.bytes_written = 0
+        self.peak_bytes = 0
+        self.cleanup_errors = 0
+        self.orphans_removed = 0
+
+
+_usage = _Usage()
+
+
+class ScratchSpace:
+    def __init__(self, label: str = "job") -> None:
+        self.label = label
+        self.path: Optional[str] = None
+        self.files = 0
+        self.bytes_written = 0
+        self.peak_bytes = 0
+
+    def __enter__(self) -> "ScratchSpace":
+        self.path = tempfile.mkdtemp(prefix=f"{_PREFIX}{os.getpid()}-{self.label}-", dir=scratch_root())
+        with _usage.lock:
+            _usage.active[self.path] = self
+            _usage.spaces += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cleanup()
+
+    def file(self, name: str) -> str:
+        """Path for a file another library will write (e.g. the workbook); counted at cleanup."""
+        if self.path is None:
+            raise RuntimeError("ScratchSpace used outside its `with` block")
+        self.files += 1
+        return os.path.join(self.path, os.path.basename(name))
+
+    def write(self, name: str, data: Any) -> str:
+        path = self.file(name)
+        with open(path, "wb") as handle:
+            handle.write(data)
+        self._account(len(data))
+        return path
+
+    def _account(self, size: int) -> None:
+        self.bytes_written += size
+        self.peak_bytes = max(self.peak_bytes, self.bytes_written)
+        with _usage.lock:
+            _usage.bytes_written += size
+            _usage.peak_bytes = max(_usage.peak_bytes, _bytes_in_use_locked())
+
+    def usage(self) -> Dict[str, Any]:
+        size = _du(self.path) if self.path else 0
+        self.peak_bytes = max(self.peak_bytes, size)
+        return {"files": self.files, "bytes_written": self.bytes_written, "peak_bytes": self.peak_bytes}
+
+    def cleanup(self) -> None:
+        path, self.path = self.path, None
+        if path is None:
+            return
+        size = _du(path)
+        self.peak_bytes = max(self.peak_bytes, size)
+        shutil.rmtree(path, ignore_errors=True)
+        with _usage.lock:
+            _usage.active.pop(path, None)
+            if os.path.exists(path):
+                _usage.cleanup_errors += 1
+
+
+def _bytes_in_use_locked() -> int:
+    return sum(space.bytes_written for space in _usage.active.values())
+
+
+def scratch_usage() -> Dict[str, Any]:
+    """Process-wide scratch disk counters (reported by /health and parse stage metrics)."""
+    with _usage.lock:
+        active = list(_usage.active)
+        counters = {
+            "active_spaces": len(active),
+            "spaces_total": _usage.spaces,
+            "bytes_written_total": _usage.bytes_written,
+            "peak_bytes": _usage.peak_bytes,
+            "cleanup_errors": _usage.cleanup_errors,
+            "orphans_removed": _usage.orphans_removed,
+        }
+    counters["bytes_in_use"] = sum(_du(path) for path in active)
+    return counters
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_orphans() -> int:
+    """Remove scratch directories whose owning process no longer exists."""
+    root = scratch_root()
+    removed = 0
+    for name in os.listdir(root):
+        if not name.startswith(_PREFIX):
+            continue
+        try:
+            pid = int(name[len(_PREFIX):].split("-", 1)[0])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed += 1
+    with _usage.lock:
+        _usage.orphans_removed += removed
+    return removed
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Columnar snapshot of a version's final transaction frame. Stored as zstd
+# Parquet under the parse_hash; readers keep a local uncompressed Arrow IPC
+# copy and memory-map it, so repeated analytics reads are zero-copy.
+SNAPSHOT_FORMAT_VERSION = "1"
+SNAPSHOT_FILE = "transactions.parquet"
+
+
+def snapshot_path(version_id: str, parse_hash: str) -> str:
+    return f"snapshots/{version_id}/{parse_hash}/{SNAPSHOT_FILE}"
+
+
+def _schema():
+    import pyarrow as pa
+
+    text_dict = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("row_index", pa.int32()),
+            ("transaction_uid", pa.string()),
+            ("pdf_file_id", pa.string()),
+            ("txn_date", pa.date32()),
+            ("month_key", text_dict),
+            ("narration", pa.string()),
+            ("dr", pa.float64()),
+            ("cr", pa.float64()),
+            ("amount", pa.float64()),
+            ("balance", pa.float64()),
+            ("txn_type", text_dict),
+            ("category", text_dict),
+            ("counterparty", pa.string()),
+            ("finance_tag", text_dict),
+            ("tag_confidence", pa.float64()),
+            ("tag_reason_codes", pa.list_(pa.string())),
+        ]
+    )
+
+
+def snapshot_table(transactions: Iterable[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None):
+    """Arrow table of the tagged transaction rows built by parse_statement."""
+    import pyarrow as pa
+
+    rows = list(transactions)
+    columns: Dict[str, List[Any]] = {
+        "row_index": [tx["row_index"] for tx in rows],
+        "transaction_uid": [tx["transaction_uid"] for tx in rows],
+        "pdf_file_id": [tx.get("pdf_file_id") for tx in rows],
+        "txn_date": [tx["txn_date"] for tx in rows],
+        "month_key": [tx["month_key"] for tx in rows],
+        "narration": [tx["narration"] for tx in rows],
+        "dr": [float(tx.get("dr") or 0) for tx in rows],
+        "cr": [float(tx.get("cr") or 0) for tx in rows],
+        "amount": [float(tx.get("amount") or 0) for tx in rows],
+        "balance": [tx.get("balance") for tx in rows],
+        "txn_type": [tx.get("txn_type") for tx in rows],
+        "category": [tx.get("category") for tx in rows],
+        "counterparty": [tx.get("counterparty_norm") for tx in rows],
+        "finance_tag": [tx.get("finance_tag") for tx in rows],
+        "tag_confidence": [tx.get("tag_confidence") for tx in rows],
+        "tag_reason_codes": [list(tx.get("tag_reason_codes") or []) for tx in rows],
+    }
+    schema = _schema()
+    meta = {"snapshot_format": SNAPSHOT_FORMAT_VERSION, **(metadata or {})}
+    return pa.table(columns, schema=schema.with_metadata({k: str(v) for k, v in meta.items()}))
+
+
+def encode_snapshot(transactions: Iterable[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None) -> bytes:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(snapshot_table(transactions, metadata), sink, compression="zstd", compression_level=6)
+    return sink.getvalue().to_pybytes()
+
+
+def _cache_dir() -> str:
+    path = os.environ.get("STATEMENT_SNAPSHOT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "statement_snapshots")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+_local_lock = threading.Lock()
+
+
+def _local_name(version_id: str, parse_hash: str, revision: str) -> str:
+    digest = hashlib.sha1(revision.encode("utf-8")).hexdigest()[:12]
+    return f"{version_id}-{parse_hash}-{digest}.arrow"
+
+
+def load_snapshot(
+    version_id: str,
+    parse_hash: str,
+    download: Optional[Callable[[str], bytes]] = None,
+    cache_dir: Optional[str] = None,
+    revision: str = "",
+):
+    """
+    Memory-mapped Arrow table for a version snapshot. The Parquet object is
+    downloaded once and converted to a local Arrow IPC file keyed by parse_hash
+    and `revision` (the version's parse_completed_at, which a forced re-parse
+    with the same parse_hash changes); later calls (in any process) just map
+    that file. Copies of older revisions are removed when a new one is written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = cache_dir or _cache_dir()
+    name = _local_name(version_id, parse_hash, revision)
+    local_path = os.path.join(directory, name)
+    if not os.path.exists(local_path):
+        if download is None:
+            download = _storage_download
+        blob = download(snapshot_path(version_id, parse_hash))
+        table = pq.read_table(pa.BufferReader(blob))
+        with _local_lock:
+            if not os.path.exists(local_path):
+                tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                os.replace(tmp_path, local_path)
+                prefix = f"{version_id}-{parse_hash}-"
+                for stale in os.listdir(directory):
+                    if stale.startswith(prefix) and stale.endswith(".arrow") and stale != name:
+                        try:
+                            os.remove(os.path.join(directory, stale))
+                        except OSError:
+                            pass
+    return pa.ipc.open_file(pa.memory_map(local_path, "r")).read_all()
+
+
+def _storage_download(path: str) -> bytes:
+    from .config import settings
+    from .supabase_client import sb
+
+    return sb.storage.from_(settings.bucket).download(path)
+
+
+def open_version_snapshot(version_id: str, cache_dir: Optional[str] = None):
+    """Snapshot of the version's current parse (looked up by its parse_hash)."""
+    from .supabase_client import sb
+
+    rows = (
+        sb.table("statement_versions")
+        .select("parse_hash,parse_status,parse_completed_at")
+        .eq("id", version_id)
+        .limit(1)
+        .execute()
+        .data
+        or []
+    )
+    if not rows or str(rows[0].get("parse_status") or "").upper() != "SUCCESS":
+        raise LookupError(f"No successful parse for version {version_id}")
+    return load_snapshot(
+        version_id, str(rows[0]["parse_hash"]), cache_dir=cache_dir, revision=str(rows[0].get("parse_completed_at") or "")
+    )
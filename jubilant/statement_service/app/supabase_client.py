@@ -1,6 +1,66 @@
-from supabase import create_client
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
 
 from .config import settings
 
 
-sb = create_client(settings.supabase_url, settings.supabase_service_key)
+def _supabase_client() -> Any:
+    from supabase import create_client
+
+    client = create_client(settings.supabase_url, settings.supabase_service_key)
+    if os.environ.get("STATEMENT_HTTP_POOLED", "true").strip().lower() in ("0", "false", "no", "off"):
+        return client
+    from .http_transport import install_transport, pooled_transport_from_env, set_active_transport
+
+    transport = pooled_transport_from_env()
+    set_active_transport(transport)
+    return install_transport(client, transport)
+
+
+def _local_client() -> Any:
+    from .local_backend import local_client_from_env
+
+    return local_client_from_env()
+
+
+# STATEMENT_DATA_BACKEND -> factory. Every backend exposes the supabase-py subset
+# the service uses: table(...) query builders and storage.from_(bucket).
+DATA_BACKENDS: Dict[str, Callable[[], Any]] = {
+    "supabase": _supabase_client,
+    "local": _local_client,
+}
+
+
+class _LazyClient:
+    """
+    Defers building the data client (and importing supabase/httpx/postgrest)
+    until the first attribute access, so the service can bind its port first.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    factory = DATA_BACKENDS.get(settings.data_backend)
+                    if factory is None:
+                        raise RuntimeError(f"Unknown STATEMENT_DATA_BACKEND: {settings.data_backend}")
+                    self._client = factory()
+        return self._client
+
+    def set_client(self, client: Optional[Any]) -> None:
+        """Swap the underlying client (tests, benchmarks); None rebuilds from settings on next use."""
+        with self._lock:
+            self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+
+sb = _LazyClient()
@@ -0,0 +1 @@
+# Offline tooling for the statement service (synthetic corpus, benchmarks).
@@ -0,0 +1,267 @@
+"""
+Delete/select latency benchmark for the statement tables on a local Postgres.
+
+Creates a throwaway schema with the core statement tables, seeds `--versions`
+versions of `--rows` raw lines (and a matching share of transactions), then times
+the parse-reset delete and the per-version reads before and after applying
+STATEMENT_AUTOPILOT_INDEXES.sql (and, with `--partition`, the raw line
+partitioning migration). The schema is dropped afterwards.
+
+Needs psycopg (v3), which is not a service dependency:
+
+    pip install "psycopg[binary]"
+    python -m scripts.bench_db_indexes --dsn postgresql://postgres@localhost/postgres \
+        --versions 200 --rows 2000 --samples 20 [--partition] [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+SQL_DIR = Path(__file__).resolve().parents[2]
+SCHEMA = "stmt_bench"
+
+# Only the tables/columns the benchmarked statements touch; mirrors the core schema.
+_DDL = """
+create extension if not exists "pgcrypto";
+drop schema if exists {schema} cascade;
+create schema {schema};
+set search_path to {schema};
+create type raw_line_type as enum ('TRANSACTION', 'NON_TXN_LINE');
+create table statement_versions (id uuid primary key default gen_random_uuid());
+create table pdf_files (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references statement_versions(id) on delete cascade,
+  created_at timestamptz default now()
+);
+create table raw_statement_lines (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references statement_versions(id) on delete cascade,
+  pdf_file_id uuid references pdf_files(id) on delete cascade,
+  page_no int not null,
+  row_no int not null,
+  raw_row_text text not null,
+  raw_date_text text null,
+  raw_narration_text text null,
+  raw_dr_text text null,
+  raw_cr_text text null,
+  raw_balance_text text null,
+  line_type raw_line_type not null,
+  extraction_method text not null,
+  bbox_json jsonb null,
+  created_at timestamptz default now()
+);
+create table transactions (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references statement_versions(id) on delete cascade,
+  txn_date date not null,
+  month_key text not null,
+  narration text not null,
+  finance_tag text,
+  transaction_uid text not null,
+  unique(version_id, transaction_uid)
+);
+create table pivots (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid references statement_versions(id) on delete cascade,
+  month_key text not null
+);
+create table statement_transaction_ledger (
+  id uuid primary key default gen_random_uuid(),
+  version_id uuid not null references statement_versions(id) on delete cascade,
+  row_index int not null,
+  finance_tag text
+);
+create table audit_events (
+  id uuid primary key default gen_random_uuid(),
+  entity_type text not null,
+  entity_id uuid not null,
+  action text not null,
+  created_at timestamptz default now()
+);
+"""
+
+
+def _migration_sql(name: str) -> str:
+    """Migration text retargeted at the bench schema (statements are schema-qualified)."""
+    sql = (SQL_DIR / name).read_text(encoding="utf-8")
+    sql = sql.replace("public.", f"{SCHEMA}.")
+    sql = sql.replace("nspname = 'public'", f"nspname = '{SCHEMA}'")
+    return sql.replace("notify pgrst, 'reload schema';", "")
+
+
+def _seed(cur: Any, versions: int, rows: int) -> List[str]:
+    version_ids = [str(uuid.uuid4()) for _ in range(versions)]
+    cur.execute(
+        "insert into statement_versions(id) select unnest(%s::uuid[])",
+        (version_ids,),
+    )
+    cur.execute(
+        "insert into pdf_files(version_id) select unnest(%s::uuid[])",
+        (version_ids,),
+    )
+    cur.execute(
+        """
+        insert into raw_statement_lines(
+          version_id, pdf_file_id, page_no, row_no, raw_row_text, raw_narration_text,
+          line_type, extraction_method
+        )
+        select p.version_id, p.id, g / 40 + 1, g %% 40, 'row ' || g, 'NEFT/' || g,
+          (case when g %% 3 = 0 then 'NON_TXN_LINE' else 'TRANSACTION' end)::raw_line_type,
+          'pdfplumber'
+        from pdf_files p, generate_series(0, %s - 1) g
+        """,
+        (rows,),
+    )
+    cur.execute(
+        """
+        insert into transactions(version_id, txn_date, month_key, narration, finance_tag, transaction_uid)
+        select p.version_id, date '2025-01-01' + (g %% 365), to_char(date '2025-01-01' + (g %% 365), 'YYYY-MM'),
+          'NEFT/' || g, case when g %% 10 = 0 then 'PVT_FIN' end, md5(p.version_id::text || g)
+        from pdf_files p, generate_series(0, %s - 1) g
+        """,
+        (max(1, rows * 2 // 3),),
+    )
+    cur.execute(
+        """
+        insert into statement_transaction_ledger(version_id, row_index, finance_tag)
+        select version_id, g, case when g %% 10 = 0 then 'BANK_FIN' end
+        from statement_versions, generate_series(0, %s - 1) g
+        """,
+        (max(1, rows * 2 // 3),),
+    )
+    cur.execute(
+        """
+        insert into pivots(version_id, month_key)
+        select id, '2025-' || lpad(g::text, 2, '0') from statement_versions, generate_series(1, 12) g
+        """
+    )
+    cur.execute("analyze")
+    return version_ids
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000.0
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _measure(conn: Any, version_ids: List[str], samples: int) -> Dict[str, Dict[str, float]]:
+    """Time each access path on `samples` random versions; deletes are rolled back."""
+    picks = random.Random(7).sample(version_ids, min(samples, len(version_ids)))
+    results: Dict[str, List[float]] = {}
+
+    def add(name: str, ms: float) -> None:
+        results.setdefault(name, []).append(ms)
+
+    with conn.cursor() as cur:
+        for vid in picks:
+            def fetch(sql: str) -> Callable[[], Any]:
+                return lambda: cur.execute(sql, (vid,)).fetchall()
+
+            add("select_raw_lines", _timed(fetch(
+                "select * from raw_statement_lines where version_id = %s order by pdf_file_id, page_no, row_no"
+            )))
+            add("select_transactions", _timed(fetch(
+                "select * from transactions where version_id = %s order by txn_date, id limit 1000"
+            )))
+            add("select_finance_tag", _timed(fetch(
+                "select * from transactions where version_id = %s and finance_tag = 'PVT_FIN'"
+            )))
+            add("select_ledger_rows", _timed(fetch(
+                "select * from statement_transaction_ledger where version_id = %s order by row_index"
+            )))
+
+            # Same statements and order as the parse reset in app.main.
+            def reset() -> None:
+                for table in ("raw_statement_lines", "transactions", "pivots", "statement_transaction_ledger"):
+                    cur.execute(f"delete from {table} where version_id = %s", (vid,))
+
+            add("delete_version", _timed(reset))
+            conn.rollback()
+    return {name: _summary(values) for name, values in results.items()}
+
+
+def run(dsn: str, versions: int, rows: int, samples: int, partition: bool) -> Dict[str, Any]:
+    try:
+        import psycopg
+    except ImportError as exc:  # pragma: no cover - optional tool dependency
+        raise SystemExit('psycopg is required: pip install "psycopg[binary]"') from exc
+
+    report: Dict[str, Any] = {"versions": versions, "rows_per_version": rows, "samples": samples}
+    with psycopg.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(_DDL.format(schema=SCHEMA))
+            version_ids = _seed(cur, versions, rows)
+        conn.commit()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"set search_path to {SCHEMA}")
+            report["before"] = _measure(conn, version_ids, samples)
+
+            with conn.cursor() as cur:
+                cur.execute(_migration_sql("STATEMENT_AUTOPILOT_INDEXES.sql"))
+            conn.commit()
+            report["after_indexes"] = _measure(conn, version_ids, samples)
+
+            if partition:
+                # The migration manages its own transaction.
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(_migration_sql("STATEMENT_AUTOPILOT_RAW_LINES_PARTITIONING.sql"))
+                conn.autocommit = False
+                report["after_partitioning"] = _measure(conn, version_ids, samples)
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"drop schema if exists {SCHEMA} cascade")
+            conn.commit()
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    phases = [p for p in ("before", "after_indexes", "after_partitioning") if p in report]
+    print(f"{report['versions']} versions x {report['rows_per_version']} raw lines, {report['samples']} samples")
+    print(f"{'query':<22}" + "".join(f"{p + ' p50/p95 ms':>34}" for p in phases))
+    for name in report["before"]:
+        cells = []
+        for phase in phases:
+            stats = report[phase][name]
+            cells.append(f"{stats['p50_ms']:>15.3f} / {stats['p95_ms']:<15.3f}")
+        print(f"{name:<22}" + "".join(f"{c:>34}" for c in cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default="postgresql://postgres@localhost:5432/postgres")
+    parser.add_argument("--versions", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=2000, help="raw lines per version")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--partition", action="store_true", help="also apply the raw line partitioning migration")
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    report = run(args.dsn, args.versions, args.rows, args.samples, args.partition)
+    _print_report(report)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+A/B benchmark of extraction engines on the synthetic corpus.
+
+For every corpus PDF, each engine extracts RawLines `--repeat` times; the report
+shows best wall time per engine, speedup vs pdfplumber, what `auto` selects,
+and whether RawLines are identical (extraction_method is ignored).
+
+Usage:
+    python -m scripts.bench_engines --corpus /tmp/stmt_corpus [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+from app.parser.engines import ENGINES, get_engine, select_engine_name
+from app.parser.extract import RawLine
+
+from .synthetic_corpus import build_corpus
+
+
+def _comparable(lines: List[RawLine]) -> List[Dict[str, Any]]:
+    out = []
+    for line in lines:
+        row = asdict(line)
+        row.pop("extraction_method", None)
+        out.append(row)
+    return out
+
+
+def run(corpus_dir: str, engines: List[str], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for entry in build_corpus(corpus_dir):
+        row: Dict[str, Any] = {"name": entry["name"], "layout": entry["layout"], "pages": entry["pages"]}
+        row["auto"] = select_engine_name(entry["path"])
+        baseline = None
+        for name in engines:
+            engine = get_engine(name)
+            best = float("inf")
+            lines: List[RawLine] = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                lines = engine.extract(entry["path"])
+                best = min(best, time.perf_counter() - started)
+            row[f"{name}_s"] = round(best, 4)
+            row[f"{name}_lines"] = len(lines)
+            if baseline is None:
+                baseline = (best, _comparable(lines))
+            else:
+                row[f"{name}_speedup"] = round(baseline[0] / best, 2) if best > 0 else None
+                row[f"{name}_identical"] = _comparable(lines) == baseline[1]
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="/tmp/stmt_corpus")
+    parser.add_argument("--engines", default="pdfplumber,pdfium_text", help="first engine is the baseline")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {unknown}; available: {sorted(ENGINES)}")
+
+    results = run(args.corpus, engines, args.repeat)
+    for row in results:
+        print(json.dumps(row))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"engines": engines, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
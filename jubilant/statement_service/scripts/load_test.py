@@ -0,0 +1,353 @@
+"""
+Concurrent load test of POST /jobs/parse_statement against the local backend.
+
+Starts the service under uvicorn with STATEMENT_DATA_BACKEND=local, seeds one
+fresh statement version per job from a weighted mix of synthetic statements,
+fires the jobs from `--concurrency` client threads and samples the server's CPU
+and RSS (server process plus its worker processes, from /proc) while they run.
+The JSON report (configuration, git commit, latency percentiles, jobs/min,
+resource timeline) can be compared against an earlier run with `--compare`.
+
+Usage:
+    python -m scripts.load_test --jobs 40 --concurrency 8 --mix text:5:4,text:40:2,ruled:5:1 \
+        --env STATEMENT_EXTRACTION_ENGINE=pdfium_text --label pdfium --json /tmp/load_pdfium.json
+    python -m scripts.load_test --jobs 40 --concurrency 8 --compare /tmp/load_pdfium.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.local_backend import LocalClient, reset_local_data, seed_statement
+
+from .synthetic_corpus import build_corpus
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MIX = "text:5:4,text:40:2,ruled:5:1,text:150:1"
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def parse_mix(spec: str) -> List[Tuple[str, int, int]]:
+    """"layout:pages:weight,..." -> [(layout, pages, weight)]."""
+    mix = []
+    for item in spec.split(","):
+        layout, pages, *weight = item.strip().split(":")
+        mix.append((layout, int(pages), int(weight[0]) if weight else 1))
+    return mix
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+# -- resource sampling (Linux /proc) ------------------------------------------
+
+
+def _proc_tree(root_pid: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _cpu_seconds_and_rss(pids: Sequence[int]) -> Tuple[float, float]:
+    cpu, rss_kb = 0.0, 0.0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += float(line.split()[1])
+                        break
+        except (OSError, IndexError, ValueError):
+            continue
+    return cpu, rss_kb / 1024.0
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU% (of one core) and RSS MB of a process tree every `interval_s`."""
+
+    def __init__(self, pid: int, interval_s: float) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval_s = interval_s
+        self.samples: List[Dict[str, float]] = []
+        self._done = threading.Event()
+        self.supported = os.path.isdir("/proc")
+
+    def run(self) -> None:
+        if not self.supported:
+            return
+        started = time.perf_counter()
+        last_cpu, _ = _cpu_seconds_and_rss(_proc_tree(self.pid))
+        last_t = started
+        while not self._done.wait(self.interval_s):
+            now = time.perf_counter()
+            cpu, rss_mb = _cpu_seconds_and_rss(_proc_tree(self.pid))
+            self.samples.append(
+                {
+                    "t": round(now - started, 2),
+                    "cpu_pct": round(100.0 * (cpu - last_cpu) / max(now - last_t, 1e-6), 1),
+                    "rss_mb": round(rss_mb, 1),
+                }
+            )
+            last_cpu, last_t = cpu, now
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join(timeout=5)
+
+
+# -- server + jobs ------------------------------------------------------------
+
+
+def _start_server(port: int, data_dir: str, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        {
+            "STATEMENT_DATA_BACKEND": "local",
+            "STATEMENT_LOCAL_DATA_DIR": data_dir,
+            "STATEMENT_WORKBOOK_ENABLED": "false",
+        }
+    )
+    env.update(env_overrides)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(SERVICE_ROOT),
+        env=env,
+    )
+
+
+def _wait_healthy(base_url: str, timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Service at {base_url} did not become healthy")
+
+
+def _run_job(base_url: str, job: Dict[str, Any], started: float, timeout_s: float) -> Dict[str, Any]:
+    request = urllib.request.Request(f"{base_url}/jobs/parse_statement/{job['version_id']}", method="POST", data=b"")
+    t0 = time.perf_counter()
+    status_code, status, error = 0, None, None
+    try:
+        with urllib.request.urlopen(request, timeout=timeout_s) as resp:
+            status_code = resp.status
+            status = json.loads(resp.read() or b"{}").get("status")
+    except urllib.error.HTTPError as exc:
+        status_code, error = exc.code, exc.read().decode("utf-8", "replace")[:200]
+    except Exception as exc:  # timeouts, resets
+        error = f"{type(exc).__name__}: {exc}"
+    t1 = time.perf_counter()
+    return {
+        **{k: job[k] for k in ("name", "pages")},
+        "start_s": round(t0 - started, 3),
+        "latency_s": round(t1 - t0, 3),
+        "http_status": status_code,
+        "status": status,
+        "error": error,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(SERVICE_ROOT), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(
+    jobs: int,
+    concurrency: int,
+    mix: List[Tuple[str, int, int]],
+    corpus_dir: str,
+    data_dir: str,
+    port: int,
+    env_overrides: Dict[str, str],
+    sample_interval_s: float,
+    timeout_s: float,
+    seed: int,
+    label: Optional[str],
+) -> Dict[str, Any]:
+    corpus = build_corpus(corpus_dir, [(f"{layout}_{pages}p", layout, pages) for layout, pages, _ in mix])
+    weights = [weight for _, _, weight in mix]
+    rng = random.Random(seed)
+    picks = rng.choices(corpus, weights=weights, k=jobs)
+
+    client = LocalClient(db_path=str(Path(data_dir) / "db.sqlite3"), storage_dir=str(Path(data_dir) / "storage"))
+    reset_local_data(client)
+    planned = [
+        {"name": entry["name"], "pages": entry["pages"], "version_id": seed_statement(client, [entry["path"]])}
+        for entry in picks
+    ]
+    client.close()
+
+    base_url = f"http://127.0.0.1:{port}"
+    server = _start_server(port, data_dir, env_overrides)
+    try:
+        _wait_healthy(base_url)
+        sampler = ResourceSampler(server.pid, sample_interval_s)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda job: _run_job(base_url, job, started, timeout_s), planned))
+        wall_s = time.perf_counter() - started
+        sampler.stop()
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    ok = [r for r in results if r["status"] == "READY"]
+    latencies = [r["latency_s"] for r in ok]
+    by_size: Dict[str, List[float]] = {}
+    for r in ok:
+        by_size.setdefault(r["name"], []).append(r["latency_s"])
+    cpu = [s["cpu_pct"] for s in sampler.samples]
+    rss = [s["rss_mb"] for s in sampler.samples]
+    return {
+        "label": label,
+        "commit": _git_commit(),
+        "config": {
+            "jobs": jobs,
+            "concurrency": concurrency,
+            "mix": [{"layout": l, "pages": p, "weight": w} for l, p, w in mix],
+            "env": env_overrides,
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+        },
+        "summary": {
+            "wall_s": round(wall_s, 2),
+            "completed": len(ok),
+            "failed": len(results) - len(ok),
+            "jobs_per_min": round(60.0 * len(ok) / wall_s, 2) if wall_s else None,
+            "pages_per_min": round(60.0 * sum(r["pages"] for r in ok) / wall_s, 1) if wall_s else None,
+            "latency_p50_s": _round(percentile(latencies, 50)),
+            "latency_p95_s": _round(percentile(latencies, 95)),
+            "latency_p99_s": _round(percentile(latencies, 99)),
+            "latency_max_s": _round(max(latencies) if latencies else None),
+            "cpu_mean_pct": _round(statistics.mean(cpu) if cpu else None, 1),
+            "cpu_peak_pct": _round(max(cpu) if cpu else None, 1),
+            "rss_peak_mb": _round(max(rss) if rss else None, 1),
+        },
+        "latency_by_statement": {
+            name: {"jobs": len(values), "p50_s": _round(percentile(values, 50)), "p95_s": _round(percentile(values, 95))}
+            for name, values in sorted(by_size.items())
+        },
+        "errors": [r for r in results if r["status"] != "READY"][:20],
+        "jobs": results,
+        "timeline": sampler.samples,
+    }
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    config = report["config"]
+    print(
+        f"# Load test {report.get('label') or ''} @ {report.get('commit') or '?'}: "
+        f"{config['jobs']} jobs, concurrency {config['concurrency']}, {config['cpu_count']} CPUs, env {config['env'] or '{}'}"
+    )
+    header = "| metric | value |" if baseline is None else f"| metric | value | baseline ({baseline.get('label') or baseline.get('commit')}) | change |"
+    print(header)
+    print("|" + "---|" * (header.count("|") - 1))
+    for key, value in report["summary"].items():
+        if baseline is None:
+            print(f"| {key} | {value} |")
+            continue
+        base = baseline["summary"].get(key)
+        change = f"{100.0 * (value - base) / base:+.1f}%" if isinstance(value, (int, float)) and base else ""
+        print(f"| {key} | {value} | {base} | {change} |")
+    print()
+    print("| statement | jobs | p50 s | p95 s |")
+    print("|---|---|---|---|")
+    for name, stats in report["latency_by_statement"].items():
+        print(f"| {name} | {stats['jobs']} | {stats['p50_s']} | {stats['p95_s']} |")
+    for error in report["errors"][:5]:
+        print(f"- failed {error['name']}: http {error['http_status']} {error['status'] or ''} {error['error'] or ''}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="layout:pages:weight,... (layouts: text, ruled)")
+    parser.add_argument("--corpus", default=str(Path(tempfile.gettempdir()) / "stmt_load_corpus"))
+    parser.add_argument("--data-dir", default=None, help="local backend directory (default: a fresh temp dir)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the service (repeatable)")
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=900.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--json", dest="json_out", default=None)
+    parser.add_argument("--compare", default=None, help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split("=", 1) for item in args.env)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="stmt_load_")
+    report = run(
+        jobs=args.jobs,
+        concurrency=args.concurrency,
+        mix=parse_mix(args.mix),
+        corpus_dir=args.corpus,
+        data_dir=data_dir,
+        port=args.port,
+        env_overrides=env_overrides,
+        sample_interval_s=args.sample_interval,
+        timeout_s=args.timeout,
+        seed=args.seed,
+        label=args.label,
+    )
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(report, baseline)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
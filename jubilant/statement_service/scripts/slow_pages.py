@@ -0,0 +1,66 @@
+"""
+Slowest pages and layouts across recent parses, from pdf_page_stats.
+
+Reads through the service's data client, so it uses the same env as the service
+(SUPABASE_URL/SUPABASE_SERVICE_ROLE_KEY, or STATEMENT_DATA_BACKEND=local).
+
+Usage:
+    python -m scripts.slow_pages [--limit 500] [--top 20] [--fingerprint TMB:...] [--engine pdfplumber] [--json out.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from app.page_stats import slow_page_report
+from app.supabase_client import sb
+
+
+def load_report(limit: int, top: int, fingerprint: str = "", engine: str = "") -> Dict[str, Any]:
+    query = sb.table("pdf_page_stats").select("*")
+    if fingerprint:
+        query = query.eq("fingerprint", fingerprint)
+    if engine:
+        query = query.eq("engine", engine)
+    rows = query.order("created_at", desc=True).limit(limit).execute().data or []
+    return slow_page_report(rows, top=top)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['pdfs']} PDFs, {report['pages']} pages")
+    print()
+    print(f"{'layout':<48} {'engine':<14} {'pdfs':>5} {'pages':>6} {'total s':>8} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for layout in report["layouts"]:
+        name = f"{layout['fingerprint']} {layout['layout_key'] or ''}"[:48]
+        print(
+            f"{name:<48} {layout['engine'] or '':<14} {layout['pdfs']:>5} {layout['pages']:>6} {layout['total_s']:>8} "
+            f"{layout['mean_page_ms']:>8} {layout['p95_page_ms']:>8} {layout['max_page_ms']:>8}"
+        )
+    print()
+    print(f"{'wall ms':>8} {'method':<8} {'chars':>6} {'tables':>6} {'lines':>5}  page  pdf_file_id / fingerprint")
+    for page in report["slowest_pages"]:
+        print(
+            f"{page['wall_ms']:>8} {page['method']:<8} {page['chars']:>6} {page['tables']:>6} {page['lines']:>5} "
+            f"{page['page_no']:>5}  {page['pdf_file_id']} / {page['fingerprint']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=500, help="most recent PDFs to include")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--fingerprint", default="")
+    parser.add_argument("--engine", default="")
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    report = load_report(args.limit, args.top, args.fingerprint, args.engine)
+    print_report(report)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Deterministic synthetic bank statements for benchmarks and offline tests.
+
+Layouts:
+- text:  unruled rows, one transaction per line plus optional continuation lines
+- ruled: same rows drawn inside a fully ruled table grid
+
+Usage:
+    python -m scripts.synthetic_corpus --out /tmp/stmt_corpus
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import random
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+ROWS_PER_PAGE = 34
+PAGE_WIDTH, PAGE_HEIGHT = 595.0, 842.0  # A4 points
+COLUMNS = {"date": 30, "narration": 95, "dr": 395, "cr": 475, "balance": 565}
+COLUMN_EDGES = [25, 90, 330, 410, 490, 570]
+
+NARRATIONS = [
+    "NEFT/{name}/HDFCH00{ref}",
+    "RTGS/{name}/SBINR520250{ref}",
+    "UPI/{name}/{ref}/PAYMENT",
+    "TR/CHEPA/{name}",
+    "ACH DEBIT/{name} FINANCE EMI/{ref}",
+    "CASH DEPOSIT BY {name}",
+    "IMPS/{name}/WEEKLY INTEREST/{ref}",
+    "CHQ RETURN/{name}/{ref}",
+]
+NAMES = ["VEERA INDUSTRIES", "AFFAN METALS", "SURESH BABU", "KCP LTD", "MTC BUSINESS", "RAJU FINANCE", "ILAKKIA"]
+
+# (name, layout, pages)
+DEFAULT_CORPUS: Sequence[Tuple[str, str, int]] = (
+    ("text_small", "text", 5),
+    ("text_medium", "text", 40),
+    ("text_large", "text", 150),
+    ("ruled_small", "ruled", 5),
+    ("ruled_medium", "ruled", 40),
+)
+
+
+def _fmt_inr(value: Decimal) -> str:
+    sign = "-" if value < 0 else ""
+    whole, frac = f"{abs(value):.2f}".split(".")
+    if len(whole) > 3:
+        head, tail = whole[:-3], whole[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        whole = ",".join(groups + [tail])
+    return f"{sign}{whole}.{frac}"
+
+
+def synthetic_transactions(pages: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Rows (with pre-split narration lines) that fill `pages` pages."""
+    rng = random.Random(seed)
+    balance = Decimal("250000.00")
+    day = dt.date(2025, 4, 1)
+    rows: List[Dict[str, Any]] = []
+    used_lines = 0
+    budget = pages * ROWS_PER_PAGE
+    while True:
+        narration = rng.choice(NARRATIONS).format(name=rng.choice(NAMES), ref=rng.randint(10_000, 99_999))
+        continuation = [f"REF {rng.randint(100_000, 999_999)} {rng.choice(NAMES)}"] if rng.random() < 0.25 else []
+        if used_lines + 1 + len(continuation) > budget:
+            break
+        amount = Decimal(rng.choice([rng.randint(5, 900) * 100, rng.randint(100, 500_000)])).quantize(Decimal("0.01"))
+        is_debit = rng.random() < 0.55
+        balance = balance - amount if is_debit else balance + amount
+        rows.append(
+            {
+                "date": day,
+                "narration": narration,
+                "continuation": continuation,
+                "dr": amount if is_debit else Decimal("0"),
+                "cr": Decimal("0") if is_debit else amount,
+                "balance": balance,
+            }
+        )
+        used_lines += 1 + len(continuation)
+        if rng.random() < 0.3:
+            day += dt.timedelta(days=1)
+    return rows
+
+
+def write_statement_pdf(path: str, pages: int, layout: str = "text", seed: int = 7) -> List[Dict[str, Any]]:
+    """Render a statement with reportlab; returns the transactions drawn."""
+    from reportlab.pdfgen import canvas
+
+    rows = synthetic_transactions(pages, seed=seed)
+    pdf = canvas.Canvas(path, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    pdf.setTitle("Synthetic statement")
+    pdf.setProducer("jubilant-synthetic-corpus")
+
+    line_height = 18.0
+    top_y = PAGE_HEIGHT - 120
+
+    def rule_row(y: float) -> None:
+        if layout != "ruled":
+            return
+        bottom = y - 5
+        pdf.line(COLUMN_EDGES[0], bottom, COLUMN_EDGES[-1], bottom)
+        pdf.line(COLUMN_EDGES[0], bottom + line_height, COLUMN_EDGES[-1], bottom + line_height)
+        for x in COLUMN_EDGES:
+            pdf.line(x, bottom, x, bottom + line_height)
+
+    def page_header(page_no: int) -> None:
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(30, PAGE_HEIGHT - 40, "SYNTHETIC BANK LIMITED")
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(30, PAGE_HEIGHT - 56, "Account Number : 000111222333  IFSC : SYNB0000123")
+        pdf.drawString(30, PAGE_HEIGHT - 70, f"Statement of Account  Page {page_no}")
+        pdf.setFont("Helvetica-Bold", 9)
+        y = top_y + line_height
+        pdf.drawString(COLUMNS["date"], y, "Date")
+        pdf.drawString(COLUMNS["narration"], y, "Particulars")
+        pdf.drawRightString(COLUMNS["dr"], y, "Debit")
+        pdf.drawRightString(COLUMNS["cr"], y, "Credit")
+        pdf.drawRightString(COLUMNS["balance"], y, "Balance")
+        rule_row(y)
+        pdf.setFont("Helvetica", 9)
+
+    page_no = 1
+    page_header(page_no)
+    y = top_y
+    for row in rows:
+        needed = 1 + len(row["continuation"])
+        if y - (needed - 1) * line_height < 60:
+            pdf.showPage()
+            page_no += 1
+            page_header(page_no)
+            y = top_y
+        rule_row(y)
+        pdf.drawString(COLUMNS["date"], y, row["date"].strftime("%d/%m/%Y"))
+        pdf.drawString(COLUMNS["narration"], y, row["narration"])
+        if row["dr"]:
+            pdf.drawRightString(COLUMNS["dr"], y, _fmt_inr(row["dr"]))
+        if row["cr"]:
+            pdf.drawRightString(COLUMNS["cr"], y, _fmt_inr(row["cr"]))
+        pdf.drawRightString(COLUMNS["balance"], y, _fmt_inr(row["balance"]))
+        y -= line_height
+        for text in row["continuation"]:
+            rule_row(y)
+            pdf.drawString(COLUMNS["narration"], y, text)
+            y -= line_height
+    pdf.showPage()
+    pdf.save()
+    return rows
+
+
+def build_corpus(out_dir: str, corpus: Sequence[Tuple[str, str, int]] = DEFAULT_CORPUS) -> List[Dict[str, Any]]:
+    """Write every corpus entry once (existing files are reused); returns a manifest."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    for index, (name, layout, pages) in enumerate(corpus):
+        path = out / f"{name}.pdf"
+        if not path.exists():
+            rows = write_statement_pdf(str(path), pages=pages, layout=layout, seed=index + 1)
+        else:
+            rows = synthetic_transactions(pages, seed=index + 1)
+        manifest.append({"name": name, "layout": layout, "pages": pages, "path": str(path), "transactions": len(rows)})
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="/tmp/stmt_corpus")
+    args = parser.parse_args()
+    print(json.dumps(build_corpus(args.out), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Configure app settings before importing app modules.
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test.service.key")
+os.environ.setdefault("STATEMENT_WORKBOOK_ENABLED", "false")
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVICE_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVICE_ROOT))
+
+
+@pytest.fixture
+def local_client(tmp_path):
+    """Route the service's data client to a fresh local stand-in for one test."""
+    from app.local_backend import LocalClient
+    from app.supabase_client import sb
+
+    client = LocalClient(str(tmp_path / "db.sqlite3"), str(tmp_path / "storage"))
+    sb.set_client(client)
+    yield client
+    sb.set_client(None)
+    client.close()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from app.parser.banks import GenericBankParser, TmbParser, _Word, parser_for
+from app.parser.fingerprint import Fingerprint, clear_fingerprint_cache, detect_bank, fingerprint_pdf
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_unknown_layout_falls_back_to_generic_parser(tmp_path) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=1, layout="text")
+    clear_fingerprint_cache()
+
+    fingerprint = fingerprint_pdf(path)
+
+    assert isinstance(parser_for(fingerprint), GenericBankParser)
+    assert isinstance(parser_for(Fingerprint(bank="TMB", layout="other")), GenericBankParser)
+    assert isinstance(parser_for(Fingerprint(bank="TMB", layout="jasperreports_optransactionhistory")), TmbParser)
+    assert detect_bank("IFSC : TMBL0000210")[0] == "TMB"
+
+
+def test_tmb_rows_follow_content_order() -> None:
+    parser = TmbParser(Fingerprint(bank="TMB", layout="jasperreports_optransactionhistory"))
+    header = [("Txn.", 56, 80, 100), ("Cheque", 151, 190, 95), ("Transaction", 323, 380, 100), ("Debit", 603, 630, 100),
+              ("Credit", 720, 750, 100), ("Account", 822, 860, 100), ("Balance", 862, 900, 100)]
+    rows = [
+        ("01/08/2025", 56, 110, 200), ("NEFT/ACME", 216, 300, 196), ("STEEL", 216, 250, 212),
+        ("1,000.00", 740, 791, 200), ("6,000.00", 890, 940, 200),
+        ("000123", 138, 180, 235), ("02/08/2025", 56, 110, 235), ("CHQ", 216, 240, 231),
+        ("500.00", 640, 678, 235), ("5,500.00", 890, 940, 235),
+        ("Page", 500, 520, 1240), ("1", 522, 526, 1240),
+    ]
+    words = [_Word(*w) for w in header + rows]
+
+    lines, columns = parser._page_lines(1, words, None)
+    merged = parser.merge(lines)
+
+    assert columns is not None
+    assert [(m["date_text"], m["narration"], m["dr_text"], m["cr_text"], m["bal_text"]) for m in merged] == [
+        ("01/08/2025", "NEFT/ACME STEEL", None, "1,000.00", "6,000.00"),
+        ("02/08/2025", "000123 CHQ", "500.00", None, "5,500.00"),
+    ]
+    assert lines[-1].raw_row_text == "Page 1" and lines[-1].line_type == "NON_TXN_LINE"
+    assert parser.parse_date("02/08/2025") == dt.date(2025, 8, 2)
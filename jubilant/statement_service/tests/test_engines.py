@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict
+
+from app.parser import engines, source
+from app.parser.engines import get_engine, select_engine_name
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _without_method(lines):
+    rows = [asdict(line) for line in lines]
+    for row in rows:
+        row.pop("extraction_method")
+    return rows
+
+
+def test_pdfium_text_engine_matches_pdfplumber_on_text_layout(tmp_path) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=2, layout="text")
+
+    plumber = get_engine("pdfplumber").extract(path)
+    pdfium = get_engine("pdfium_text").extract(path)
+
+    assert plumber
+    assert _without_method(pdfium) == _without_method(plumber)
+    assert {line.extraction_method for line in pdfium} == {"pdfium_text"}
+
+
+def test_auto_selection_keeps_ruled_tables_on_pdfplumber(tmp_path) -> None:
+    text_path = str(tmp_path / "text.pdf")
+    ruled_path = str(tmp_path / "ruled.pdf")
+    write_statement_pdf(text_path, pages=1, layout="text")
+    write_statement_pdf(ruled_path, pages=1, layout="ruled")
+
+    assert select_engine_name(text_path) == "pdfium_text"
+    assert select_engine_name(ruled_path) == "pdfplumber"
+
+
+def test_pdfium_lock_is_held_for_pdfium_calls_only(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=2, layout="text")
+
+    def lock_free() -> bool:
+        result = []
+
+        def probe() -> None:
+            got = source.PDFIUM_LOCK.acquire(blocking=False)
+            result.append(got)
+            if got:
+                source.PDFIUM_LOCK.release()
+
+        other = threading.Thread(target=probe)
+        other.start()
+        other.join()
+        return result[0]
+
+    during_clustering = []
+    text_lines = engines._text_lines
+
+    def recording_text_lines(*args, **kwargs):
+        during_clustering.append(lock_free())
+        return text_lines(*args, **kwargs)
+
+    monkeypatch.setattr(engines, "_text_lines", recording_text_lines)
+    with source.pdfium_document(path) as pdf:
+        with source.PDFIUM_LOCK:
+            assert len(pdf) == 2
+            assert not lock_free()
+        assert lock_free()
+    assert get_engine("pdfium_text").extract(path)
+    assert during_clustering == [True, True]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from app.parser import extract
+from app.parser.extract import (
+    detect_columns,
+    extract_raw_lines_pdfplumber,
+    layout_key,
+    layout_prefers_text,
+    mapped_table_lines,
+    record_slow_layout,
+)
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_layout_key_needs_producer_or_creator_metadata() -> None:
+    assert layout_key("ReportLab", None, 595.3, 841.9) == "ReportLab||595x842"
+    assert layout_key("", "Word", None, None) == "|Word|"
+    # Page size alone would lump every metadata-less A4 PDF into one layout.
+    assert layout_key(None, "  ", 595.3, 841.9) == ""
+    record_slow_layout("", 5)
+    assert not layout_prefers_text("")
+
+
+def test_slow_layout_starts_in_text_mode_until_the_hint_expires(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(extract, "_text_mode_layouts", {})
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=1, layout="text")
+    first = extract.ExtractionReport()
+    extract_raw_lines_pdfplumber(path, report=first)
+    assert first.start_mode == "table" and first.layout_key
+
+    record_slow_layout(first.layout_key, 2)
+    flipped = extract.ExtractionReport()
+    extract_raw_lines_pdfplumber(path, report=flipped)
+    assert flipped.start_mode == "text"
+    assert extract.layout_mode_hints() == {first.layout_key: 2}
+
+    monkeypatch.setenv("STATEMENT_LAYOUT_HINT_TTL_S", "0")
+    expired = extract.ExtractionReport()
+    extract_raw_lines_pdfplumber(path, report=expired)
+    assert expired.start_mode == "table"
+    assert extract.layout_mode_hints() == {}
+
+
+def test_currency_suffixed_headers_map_columns() -> None:
+    header = ["Date", "Narration", "Chq./Ref.No.", "Withdrawal Amt.(INR)", "Deposit Amt. (INR)", "Closing Balance(Rs."]
+    assert detect_columns(header) == {"date": 0, "narration": 1, "dr": 3, "cr": 4, "bal": 5}
+
+    rows = [header, ["01/08/2025", "NEFT ACME", "123", "1,000.00", "", "9,000.00"]]
+    lines, columns = mapped_table_lines(1, rows, None, "lattice")
+
+    assert columns == {"date": 0, "narration": 1, "dr": 3, "cr": 4, "bal": 5}
+    assert [line.line_type for line in lines] == ["NON_TXN_LINE", "TRANSACTION"]
+    txn = lines[1]
+    assert (txn.date_text, txn.dr_text, txn.cr_text, txn.bal_text) == ("01/08/2025", "1,000.00", None, "9,000.00")
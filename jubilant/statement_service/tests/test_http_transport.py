@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from supabase import create_client
+
+from app.data_errors import TransientDataError, is_transient_error
+from app.http_transport import RetryingTransport, install_transport
+from app.main import _safe_table_select
+from app.supabase_client import sb
+
+
+def _flaky(statuses):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        if status == "connect":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(status, json=[{"id": 1}] if status == 200 else {"message": "busy"})
+
+    return handler, calls
+
+
+def _client(handler, retries=3):
+    transport = RetryingTransport(httpx.MockTransport(handler), retries=retries, sleep=lambda _: None)
+    return httpx.Client(transport=transport, base_url="http://db.test"), transport
+
+
+def test_idempotent_requests_are_retried() -> None:
+    handler, calls = _flaky([503, 502, 200])
+    client, transport = _client(handler)
+    assert client.get("/rest/v1/pivots").status_code == 200
+    assert len(calls) == 3
+    stats = transport.stats.snapshot()
+    assert stats["retries"] == {"rest GET 503": 1, "rest GET 502": 1}
+    assert stats["requests"] == {"rest GET": 1}
+    assert stats["latency"]["rest GET"]["samples"] == 1
+
+
+def test_plain_post_is_not_retried_unless_never_sent() -> None:
+    handler, calls = _flaky([503, 200])
+    client, _ = _client(handler)
+    assert client.post("/rest/v1/transactions", json=[{}]).status_code == 503
+    assert len(calls) == 1
+
+    handler, calls = _flaky([503, 200])
+    client, _ = _client(handler)
+    upsert = client.post("/rest/v1/workbooks", json=[{}], headers={"Prefer": "resolution=merge-duplicates"})
+    assert upsert.status_code == 200 and len(calls) == 2
+
+    handler, calls = _flaky(["connect", 200])
+    client, _ = _client(handler)
+    assert client.post("/rest/v1/transactions", json=[{}]).status_code == 200
+
+
+def test_retries_give_up() -> None:
+    handler, calls = _flaky(["connect"])
+    client, transport = _client(handler, retries=2)
+    with pytest.raises(httpx.ConnectError):
+        client.get("/storage/v1/object/statements/a.pdf")
+    assert len(calls) == 3
+    assert transport.stats.snapshot()["failures"] == {"storage GET": 1}
+
+
+def _supabase(handler):
+    client = create_client("http://db.test", "header.payload.signature")
+    return install_transport(client, RetryingTransport(httpx.MockTransport(handler), sleep=lambda _: None))
+
+
+def test_supabase_sessions_share_the_transport() -> None:
+    handler, calls = _flaky([503, 200])
+    client = _supabase(handler)
+    assert client.table("pivots").select("*").execute().data == [{"id": 1}]
+    assert client.storage.session._transport is client.postgrest.session._transport
+    assert client.http_transport.stats.snapshot()["retries"] == {"rest GET 503": 1}
+
+
+def test_install_transport_fails_loudly_on_an_unknown_client_layout() -> None:
+    transport = RetryingTransport(httpx.MockTransport(_flaky([200])[0]))
+    with pytest.raises(RuntimeError, match="_init_postgrest_client, _init_storage_client"):
+        install_transport(object(), transport)
+
+    client = create_client("http://db.test", "header.payload.signature")
+    client._init_storage_client = lambda *args, **kwargs: object()
+    install_transport(client, transport)
+    with pytest.raises(RuntimeError, match="no httpx session"):
+        client.storage
+
+
+def test_safe_table_select_separates_transient_from_empty() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "missing_table" in request.url.path:
+            return httpx.Response(404, json={"code": "PGRST205", "message": "Could not find the table"})
+        return httpx.Response(503, json={"code": "PGRST002", "message": "schema cache not ready"})
+
+    sb.set_client(_supabase(handler))
+    try:
+        assert _safe_table_select("missing_table") == []
+        with pytest.raises(TransientDataError) as info:
+            _safe_table_select("finance_keywords")
+        assert is_transient_error(info.value.cause)
+    finally:
+        sb.set_client(None)
+
+
+def test_sqlstates_are_not_read_as_http_statuses() -> None:
+    from postgrest.exceptions import APIError
+    from storage3.utils import StorageException
+
+    def api_error(code: str) -> APIError:
+        return APIError({"code": code, "message": "x"})
+
+    # Bad column, unique violation, bad datetime, permission denied, statement timeout.
+    for code in ("42703", "23505", "22007", "42501", "57014", "PGRST205"):
+        assert not is_transient_error(api_error(code)), code
+    for code in ("08006", "53300", "57P01", "40001", "40P01", "PGRST002"):
+        assert is_transient_error(api_error(code)), code
+    assert is_transient_error(StorageException({"statusCode": 503}))
+    assert not is_transient_error(StorageException({"statusCode": 404, "error": "not_found"}))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import app
+from app.metrics import StageClock, clear_stage_history, predict_parse_seconds, record_stage_metrics, stage_metrics_payload
+from app.parser.inspect import inspect_pdf
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_inspect_reports_text_layer_and_ruling(tmp_path) -> None:
+    text_path = str(tmp_path / "text.pdf")
+    ruled_path = str(tmp_path / "ruled.pdf")
+    write_statement_pdf(text_path, pages=3, layout="text")
+    write_statement_pdf(ruled_path, pages=2, layout="ruled")
+
+    text = inspect_pdf(text_path)
+    with open(ruled_path, "rb") as handle:
+        ruled = inspect_pdf(handle.read())
+
+    assert (text.page_count, text.text_pages, text.ruled_pages, text.engine) == (3, 3, 0, "pdfium_text")
+    assert (ruled.page_count, ruled.ruled_pages, ruled.engine) == (2, 2, "pdfplumber")
+    assert text.to_dict()["scanned_pages"] == []
+
+
+def test_inspect_flags_password_protected_pdf(tmp_path) -> None:
+    from reportlab.pdfgen import canvas
+
+    path = str(tmp_path / "locked.pdf")
+    pdf = canvas.Canvas(path, encrypt="secret")
+    pdf.drawString(72, 720, "locked")
+    pdf.save()
+
+    inspection = inspect_pdf(path)
+
+    assert inspection.encrypted and inspection.page_count == 0
+
+
+def test_inspect_plans_the_engine_parse_statement_resolves(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=1, layout="text")
+    monkeypatch.setenv("STATEMENT_ENGINE_OVERRIDES", json.dumps({inspect_pdf(path).fingerprint: "pdfplumber"}))
+
+    assert inspect_pdf(path).engine == "pdfplumber"
+
+
+def test_inspect_reports_unreadable_pdfs_per_entry(tmp_path, local_client) -> None:
+    good_path = str(tmp_path / "good.pdf")
+    truncated_path = str(tmp_path / "truncated.pdf")
+    write_statement_pdf(good_path, pages=2, layout="text")
+    with open(good_path, "rb") as handle:
+        data = handle.read()
+    with open(truncated_path, "wb") as handle:
+        handle.write(data[: len(data) // 3])
+    version_id = seed_statement(local_client, [good_path, truncated_path])
+
+    result = TestClient(app).post(f"/jobs/inspect/{version_id}").json()
+
+    good, truncated = result["pdfs"]
+    assert good["page_count"] == 2 and not good["error"]
+    assert truncated["error"] and not truncated["encrypted"]
+    assert result["unreadable_pdfs"] == [truncated["pdf_file_id"]]
+
+
+def test_prediction_uses_recorded_stage_history() -> None:
+    clear_stage_history()
+    default = predict_parse_seconds({"pdfplumber": 100})
+    clock = StageClock()
+    clock.stages.update({"reset": 0.5, "download": 0.5, "extract": 10.0, "transactions": 1.0})
+    for job in range(3):
+        record_stage_metrics(
+            stage_metrics_payload(clock, [{"engine": "pdfplumber", "pages": 100, "seconds": 10.0}]), job_id=str(job)
+        )
+    record_stage_metrics(stage_metrics_payload(clock, [{"engine": "pdfplumber", "pages": 1, "seconds": 99}]), job_id="0")
+
+    predicted = predict_parse_seconds({"pdfplumber": 100})
+    clear_stage_history()
+
+    assert default["history_jobs"] == 0
+    assert predicted["history_jobs"] == 3
+    assert predicted["extract_s_per_page"] == {"pdfplumber": 0.1}
+    assert predicted["seconds"] == 12.0
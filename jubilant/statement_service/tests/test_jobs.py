@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.jobs import JobCancelled, JobControl, KillableWorkerPool
+from app.local_backend import seed_statement
+from app.main import app
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _echo(emit, value):
+    emit(("seen", value))
+    return value * 2
+
+
+def _hang(emit):
+    emit("started")
+    while True:
+        time.sleep(1)
+
+
+@pytest.fixture
+def pool():
+    pool = KillableWorkerPool(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_runs_task_and_forwards_events(pool) -> None:
+    events = []
+    assert pool.run(_echo, 21, on_event=events.append) == 42
+    assert events == [("seen", 21)]
+
+
+def test_timeout_kills_worker_and_frees_slot(pool) -> None:
+    control = JobControl("v1", timeout_s=1.0)
+    started = time.monotonic()
+    with pytest.raises(JobCancelled) as info:
+        pool.run(_hang, control=control)
+    assert info.value.timed_out
+    assert time.monotonic() - started < 10
+    # The single slot is usable again straight away, with a fresh worker.
+    assert pool.run(_echo, 1) == 2
+
+
+def test_cancel_from_another_thread(pool) -> None:
+    control = JobControl("v1")
+    events = []
+
+    def on_event(event):
+        events.append(event)
+        threading.Timer(0.1, control.cancel, ("stop",)).start()
+
+    with pytest.raises(JobCancelled) as info:
+        pool.run(_hang, control=control, on_event=on_event)
+    assert info.value.reason == "stop" and not info.value.timed_out
+    assert events == ["started"]
+
+
+def test_cancel_endpoint_without_running_job() -> None:
+    assert TestClient(app).delete("/jobs/nope").status_code == 404
+
+
+def test_parse_job_timeout_marks_version_failed(tmp_path, local_client, monkeypatch) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=1, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+    monkeypatch.setenv("STATEMENT_JOB_TIMEOUT_S", "0.001")
+
+    response = TestClient(app).post(f"/jobs/parse_statement/{version_id}")
+
+    assert response.status_code == 504
+    version = local_client.table("statement_versions").select("*").eq("id", version_id).execute().data[0]
+    assert version["status"] == "PARSE_FAILED"
+    assert "timed out" in version["error_reason"]
+
+
+def test_finalized_job_ignores_late_cancel_and_stops_watchdog() -> None:
+    control = JobControl("v1", timeout_s=60)
+    fired = []
+    control.watchdog = threading.Timer(0.05, fired.append, ("aborted",))
+    control.watchdog.start()
+
+    control.finalize()
+    time.sleep(0.1)
+
+    assert fired == []
+    assert control.cancel("too late") is False and not control.cancelled
+    cancelled = JobControl("v2")
+    cancelled.cancel("stop")
+    with pytest.raises(JobCancelled):
+        cancelled.finalize()
+
+
+def test_inline_extraction_stops_at_the_next_page(tmp_path, monkeypatch) -> None:
+    from app import main
+    from app.jobs import reextract_pages_task
+    from app.parser.banks import GenericBankParser
+    from app.parser.fingerprint import UNKNOWN_FINGERPRINT
+
+    path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(path, pages=3, layout="text")
+    monkeypatch.setenv("STATEMENT_EXTRACT_ISOLATION", "thread")
+    parser = GenericBankParser(UNKNOWN_FINGERPRINT)
+    control = JobControl("v1")
+    control.cancel("stop")
+
+    with pytest.raises(JobCancelled):
+        main._run_extraction(reextract_pages_task, path, parser, "pdfium_text", [1, 2, 3], {}, control=control)
+    assert main._run_extraction(reextract_pages_task, path, parser, "pdfium_text", [2], {})
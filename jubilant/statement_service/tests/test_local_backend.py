@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.local_backend import LocalBackendError, LocalClient, seed_statement
+from app.main import app
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_query_subset(tmp_path) -> None:
+    client = LocalClient(storage_dir=str(tmp_path / "storage"))
+    client.table("pivots").insert([{"version_id": "v1", "month_key": m} for m in ("2025-03", "2025-01", "2025-02")]).execute()
+    client.table("pivots").insert({"version_id": "v2", "month_key": "2025-01"}).execute()
+
+    rows = client.table("pivots").select("month_key").eq("version_id", "v1").order("month_key", desc=True).execute().data
+    assert rows == [{"month_key": "2025-03"}, {"month_key": "2025-02"}, {"month_key": "2025-01"}]
+    page = client.table("pivots").select("*").eq("version_id", "v1").order("month_key").range(1, 2).execute().data
+    assert [r["month_key"] for r in page] == ["2025-02", "2025-03"]
+    assert all(r["id"] and r["created_at"] for r in page)
+
+    client.table("pivots").update({"category": "X"}).eq("version_id", "v2").execute()
+    assert client.table("pivots").select("category").eq("version_id", "v2").execute().data == [{"category": "X"}]
+
+    key = {"version_id": "v1", "parse_hash": "h"}
+    client.table("workbooks").upsert({**key, "storage_path": "a"}, on_conflict="version_id,parse_hash").execute()
+    client.table("workbooks").upsert({**key, "storage_path": "b"}, on_conflict="version_id,parse_hash").execute()
+    assert [r["storage_path"] for r in client.table("workbooks").select("*").execute().data] == ["b"]
+
+    client.table("pivots").delete().eq("version_id", "v1").execute()
+    assert len(client.table("pivots").select("id").execute().data) == 1
+    assert client.table("missing_table").select("*").execute().data == []
+
+    bucket = client.storage.from_("statements")
+    bucket.upload("a/b.bin", b"one")
+    with pytest.raises(LocalBackendError):
+        bucket.upload("a/b.bin", b"two")
+    bucket.upload("a/b.bin", b"two", {"upsert": "true"})
+    assert bucket.download("a/b.bin") == b"two"
+    assert bucket.remove(["a/b.bin"]) == [{"name": "a/b.bin"}]
+    with pytest.raises(LocalBackendError):
+        bucket.download("a/b.bin")
+    with pytest.raises(LocalBackendError):
+        bucket.download("../escape")
+
+
+def test_parse_job_runs_end_to_end_on_local_backend(tmp_path, local_client) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+    api = TestClient(app)
+
+    result = api.post(f"/jobs/parse_statement/{version_id}").json()
+
+    assert result["status"] == "READY"
+    assert result["transactions"] > 0
+    stored = local_client.table("transactions").select("id").eq("version_id", version_id).execute().data
+    assert len(stored) == result["transactions"]
+    version = local_client.table("statement_versions").select("*").eq("id", version_id).execute().data[0]
+    assert version["parse_status"] == "SUCCESS"
+    assert api.post(f"/jobs/parse_statement/{version_id}").json()["idempotent"] is True
+
+    listing = api.get(f"/versions/{version_id}/transactions", params={"limit": 5}).json()
+    assert listing["matched"] == result["transactions"]
+
+    pdf_file_id = local_client.table("pdf_files").select("id").eq("version_id", version_id).execute().data[0]["id"]
+    raw = api.get(f"/versions/{version_id}/raw_lines", params={"pdf_file_id": pdf_file_id, "page": 2}).json()
+    assert raw["storage"] == "rows" and raw["lines"] and {line["page_no"] for line in raw["lines"]} == {2}
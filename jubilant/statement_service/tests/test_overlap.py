@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import _drop_overlaps, app
+from app.parser.reconcile import overlap_duplicates, overlap_key, statement_account
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_overlap_duplicates_drops_only_rows_repeated_from_earlier_pdfs() -> None:
+    jan = overlap_key("HDFC", "2025-01-31", 100, 900, "RENT")
+    mar = overlap_key("HDFC", "2025-03-01", 50, 850, "UPI TEA")
+    apr = overlap_key("HDFC", "2025-04-01", 10, 840, "UPI TEA")
+    rows = [
+        ("a", jan), ("a", mar), ("a", mar),  # two genuine identical March rows
+        ("b", mar), ("b", mar), ("b", mar), ("b", apr),  # overlap repeats both, plus one new
+        ("c", overlap_key("HDFC", "2025-03-01", 50, None, "UPI TEA")),  # no balance: never matched
+        ("c", overlap_key("ICICI", "2025-03-01", 50, 850, "UPI TEA")),  # another account
+    ]
+
+    assert overlap_duplicates(rows) == [3, 4]
+    assert overlap_duplicates([("a", mar), ("a", mar)]) == []
+
+
+def test_statement_account_reads_the_header_account_number() -> None:
+    assert statement_account(["SYNTHETIC BANK", "Account Number : 000111222333  IFSC : SYNB0000123"]) == (
+        "SYNB0000123:000111222333"
+    )
+    assert statement_account(["A/C No. XXXXXX1234", "Branch: Anna Nagar"]) == "XXXXXX1234"
+    assert statement_account(["Acct # 5010 0012 345678"]) == "50100012345678"
+    assert statement_account(["Account Type : SAVINGS", "Statement of Account  Page 1"]) is None
+
+
+def test_overlapping_uploads_are_deduped_and_reported(tmp_path, local_client) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="text")
+    version_id = seed_statement(local_client, [pdf_path, pdf_path])
+    api = TestClient(app)
+
+    result = api.post(f"/jobs/parse_statement/{version_id}").json()
+
+    assert result["status"] == "READY"
+    overlap = result["reconciliation"]["overlap_dropped"]
+    assert overlap["rows"] == result["transactions"] > 0
+    assert result["raw_row_count"] - result["parsed_row_count"] == overlap["rows"]
+    assert len(overlap["by_pdf"]) == 1 and len(overlap["dropped"]) == overlap["rows"]
+    assert all(row["raw_line_refs"] for row in overlap["dropped"])
+    stored = local_client.table("transactions").select("id").eq("version_id", version_id).execute().data
+    assert len(stored) == result["transactions"]
+
+
+def test_overlaps_are_only_dropped_within_one_detected_account() -> None:
+    def row(pdf_id):
+        return {
+            "pdf_file_id": pdf_id, "txn_date": dt.date(2025, 3, 1), "amount": 500.0, "balance": 0.0,
+            "narration": "SI TRANSFER", "dr": 500.0, "cr": None, "raw_json": {"raw_line_refs": []},
+        }
+
+    transactions = [row("savings"), row("current"), row("unknown-1"), row("unknown-2"), row("savings-again")]
+    accounts = {"savings": "X:1111", "current": "X:2222", "unknown-1": None, "unknown-2": None, "savings-again": "X:1111"}
+
+    kept, report = _drop_overlaps(transactions, accounts)
+
+    assert [tx["pdf_file_id"] for tx in kept] == ["savings", "current", "unknown-1", "unknown-2"]
+    assert report["by_pdf"] == {"savings-again": 1}
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import app
+from app.page_stats import expand_page_stats, page_stats_row, slow_page_report
+from app.parser.extract import ExtractionReport, PageStat
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _report(engine: str, walls) -> ExtractionReport:
+    report = ExtractionReport(layout_key="prod|creator|595x842", engine=engine)
+    for page_no, wall in enumerate(walls, start=1):
+        report.add_page(PageStat(page_no=page_no, method="table", wall_ms=wall, table_count=1, over_budget=wall > 1000))
+    return report
+
+
+def test_rows_round_trip_and_rank_hotspots() -> None:
+    slow = page_stats_row("v1", "p1", "h1", _report("pdfplumber", [120.0, 2400.0, 90.0]), "UNKNOWN:generic")
+    fast = page_stats_row("v2", "p2", "h2", _report("pdfium_text", [5.0, 6.0]), "TMB:x")
+
+    assert slow["page_count"] == 3 and slow["max_page_ms"] == 2400.0
+    pages = list(expand_page_stats([slow]))
+    assert [p["page_no"] for p in pages] == [1, 2, 3]
+    assert [p["over_budget"] for p in pages] == [False, True, False]
+
+    report = slow_page_report([fast, slow], top=2)
+    assert [(p["pdf_file_id"], p["page_no"]) for p in report["slowest_pages"]] == [("p1", 2), ("p1", 1)]
+    assert report["layouts"][0]["engine"] == "pdfplumber"
+    assert report["layouts"][0]["over_budget_pages"] == 1
+    assert report["pdfs"] == 2 and report["pages"] == 5
+
+
+def test_parse_records_page_stats_and_endpoint_reports_them(tmp_path, local_client) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=3, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+    api = TestClient(app)
+
+    assert api.post(f"/jobs/parse_statement/{version_id}").json()["status"] == "READY"
+
+    rows = local_client.table("pdf_page_stats").select("*").eq("version_id", version_id).execute().data
+    assert len(rows) == 1 and rows[0]["page_count"] == 3
+    report = api.get("/stats/slow_pages", params={"top": 2}).json()
+    assert report["pages"] == 3
+    assert len(report["slowest_pages"]) == 2
+    assert report["layouts"][0]["pages"] == 3
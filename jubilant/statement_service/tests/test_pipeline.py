@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.pipeline import StageGraph
+
+
+def test_independent_stages_overlap_and_dependencies_wait() -> None:
+    order = []
+    lock = threading.Lock()
+
+    def stage(name: str, seconds: float) -> str:
+        time.sleep(seconds)
+        with lock:
+            order.append(name)
+        return name
+
+    graph = StageGraph(max_workers=4)
+    graph.add("db", stage, "db", 0.3)
+    graph.add("workbook", stage, "workbook", 0.3)
+    graph.add("upload", stage, "upload", 0.0, deps=("workbook",))
+
+    started = time.perf_counter()
+    results = graph.run()
+
+    assert time.perf_counter() - started < 0.55
+    assert results == {"db": "db", "workbook": "workbook", "upload": "upload"}
+    assert order.index("upload") > order.index("workbook")
+    assert set(graph.durations) == {"db", "workbook", "upload"}
+
+
+def test_failure_stops_new_stages_and_waits_for_running_ones() -> None:
+    finished = []
+
+    def boom() -> None:
+        raise RuntimeError("insert failed")
+
+    def slow() -> None:
+        time.sleep(0.2)
+        finished.append("slow")
+
+    graph = StageGraph(max_workers=4)
+    graph.add("insert", boom)
+    graph.add("workbook", slow)
+    graph.add("upload", finished.append, "upload", deps=("workbook",))
+
+    with pytest.raises(RuntimeError, match="insert failed"):
+        graph.run()
+    assert finished == ["slow"]
+
+
+def test_process_isolation_runs_in_another_process() -> None:
+    graph = StageGraph()
+    graph.add("pid", os.getpid, isolation="process")
+
+    assert graph.run()["pid"] != os.getpid()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import app
+from app.pipeline import StageGraph
+from app.profiling import profile_job
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _spin(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_profiles_job_thread_and_its_stage_threads() -> None:
+    with profile_job(interval_s=0.002) as profiler:
+        _spin(0.1)
+        StageGraph(max_workers=2).add("busy", _spin, 0.1).run()
+
+    collapsed = profiler.to_collapsed()
+    assert profiler.samples > 10
+    assert any(line.startswith("job;") and "_spin" in line for line in collapsed.splitlines())
+    assert any(line.startswith("stage:busy;") and "_spin" in line for line in collapsed.splitlines())
+
+    speedscope = profiler.to_speedscope("test")
+    frames = speedscope["shared"]["frames"]
+    profile = speedscope["profiles"][0]
+    assert len(profile["samples"]) == len(profile["weights"]) == len(profiler.stacks)
+    assert all(0 <= i < len(frames) for stack in profile["samples"] for i in stack)
+
+
+def test_unprofiled_stages_are_not_tracked() -> None:
+    graph = StageGraph().add("busy", _spin, 0.01)
+    assert graph.run()["busy"] > 0
+
+
+def test_profile_flag_uploads_profile_and_audits_it(tmp_path, local_client) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+
+    result = TestClient(app).post(f"/jobs/parse_statement/{version_id}", params={"profile": "true"}).json()
+
+    assert result["status"] == "READY"
+    assert result["profile_path"].startswith(f"exports/{version_id}/profiles/")
+    stored = json.loads(local_client.storage.from_("statements").download(result["profile_path"]))
+    assert stored["profiles"][0]["samples"]
+    audits = local_client.table("audit_events").select("*").eq("action", "PARSE_PROFILED").execute().data
+    assert audits[0]["payload"]["profile_path"] == result["profile_path"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.parser.engines import extract_sharded, get_engine
+from app.parser.extract import ExtractionReport
+from app.progress import ProgressBus
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def test_subscriber_replays_then_follows_until_done() -> None:
+    bus = ProgressBus()
+    job = bus.start("v1", version_id="v1")
+    job.stage("reset", 0.25)
+
+    received = []
+
+    def consume() -> None:
+        for event in bus.subscribe("v1", heartbeat_s=0.05):
+            if event is not None:
+                received.append(event)
+
+    reader = threading.Thread(target=consume)
+    reader.start()
+    time.sleep(0.1)
+    job.publish("pdf", pdf_file_id="p1")
+    job.finish("done", status="READY")
+    reader.join(timeout=2)
+
+    assert not reader.is_alive()
+    assert [e.event for e in received] == ["started", "stage", "pdf", "done"]
+    assert received[-1].data["stages"] == {"reset": 0.25}
+    assert [e.seq for e in received] == sorted(e.seq for e in received)
+
+
+def test_last_event_id_skips_seen_events_across_runs() -> None:
+    bus = ProgressBus()
+    first = bus.start("v1")
+    first.finish("failed", detail="boom")
+    seen = [e.seq for e in bus.subscribe("v1", heartbeat_s=0.01) if e is not None]
+
+    second = bus.start("v1")
+    second.publish("stage", stage="reset")
+    second.finish("done")
+    replay = [e.event for e in bus.subscribe("v1", last_event_id=seen[-1], heartbeat_s=0.01) if e is not None]
+
+    assert replay == ["started", "stage", "done"]
+
+
+def test_subscribe_before_start_and_idle_timeout() -> None:
+    bus = ProgressBus()
+    started = time.perf_counter()
+    events = list(bus.subscribe("missing", heartbeat_s=0.02, idle_timeout_s=0.1))
+    assert all(e is None for e in events)
+    assert time.perf_counter() - started < 1.0
+
+    waiting = bus.get("missing")
+    job = bus.start("missing")
+    assert job is waiting
+
+
+def test_extraction_report_streams_pages(tmp_path) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=3, layout="text")
+    bus = ProgressBus()
+    job = bus.start("v1")
+    job.pdf_started("p1", 0, 1, 3)
+
+    report = ExtractionReport(on_page=lambda stat: job.page("p1", stat))
+    lines = get_engine("pdfium_text").extract(path, report=report)
+
+    pages = [e.data for e in job.events if e.event == "page"]
+    assert [p["page_no"] for p in pages] == [1, 2, 3]
+    assert pages[-1]["pages_done"] == pages[-1]["pages_total"] == 3
+    assert pages[-1]["rows_so_far"] == len(lines)
+
+
+def test_async_subscriber_follows_a_job_published_from_another_thread() -> None:
+    bus = ProgressBus()
+
+    async def consume():
+        return [e.event async for e in bus.subscribe_async("v1", heartbeat_s=0.05) if e is not None]
+
+    def produce() -> None:
+        time.sleep(0.1)
+        job = bus.start("v1")
+        job.publish("pdf", pdf_file_id="p1")
+        job.finish("done")
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    received = asyncio.run(asyncio.wait_for(consume(), timeout=5))
+    producer.join()
+
+    assert received == ["started", "pdf", "done"]
+    assert bus.get("v1").subscribers == 0 and not bus.get("v1").waiters
+
+
+def test_eviction_keeps_running_and_watched_channels() -> None:
+    bus = ProgressBus(max_jobs=2)
+    running = bus.start("running")
+    watched = bus.subscribe("watched", heartbeat_s=0.01, idle_timeout_s=None)
+    next(watched)  # heartbeat: the subscriber is attached
+    bus.start("finished").finish("done")
+    bus.start("newest")
+
+    assert bus.get("running") is running
+    assert bus.get("watched") is not None
+    assert bus.get("finished") is None
+    watched.close()
+    assert bus.get("watched").evictable
+
+
+def test_sharded_extraction_reports_pages_as_shards_finish(tmp_path) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=4, layout="text")
+    seen = []
+    report = ExtractionReport(on_page=lambda stat: seen.append(stat.page_no))
+
+    extract_sharded(path, "pdfium_text", shard_pages=2, workers=1, report=report)
+
+    assert sorted(seen) == [1, 2, 3, 4]
+    assert [stat.page_no for stat in report.pages] == [1, 2, 3, 4]
+
+
+def test_events_endpoint_replays_a_finished_job() -> None:
+    from fastapi.testclient import TestClient
+
+    from app.main import app, progress_bus
+
+    job = progress_bus.start("sse-finished")
+    job.finish("done", status="READY")
+
+    body = TestClient(app).get("/jobs/parse_statement/sse-finished/events").text
+
+    assert body.startswith("retry: ")
+    assert "event: started" in body and "event: done" in body
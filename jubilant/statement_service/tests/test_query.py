@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+
+from app.query import CursorError, VersionFrameCache, plain_table, query_transactions
+from app.snapshot import snapshot_table
+
+
+def _frame():
+    rows = []
+    for i in range(1, 51):
+        rows.append(
+            {
+                "row_index": i,
+                "transaction_uid": f"uid-{i}",
+                "pdf_file_id": "pdf-1",
+                "txn_date": dt.date(2025, 8 if i <= 25 else 9, (i - 1) % 25 + 1),
+                "month_key": "2025-08" if i <= 25 else "2025-09",
+                "narration": f"NEFT {'ACME STEEL' if i % 2 else 'RELIANCE'} {i}",
+                "dr": float(i * 10),
+                "cr": 0.0,
+                "amount": float(i * 10),
+                "balance": 1000.0,
+                "txn_type": "DEBIT",
+                "category": "TRANSFER",
+                "counterparty_norm": "ACME STEEL" if i % 2 else "RELIANCE",
+                "finance_tag": "PVT_FIN" if i % 5 == 0 else None,
+                "tag_confidence": 0.9,
+                "tag_reason_codes": [],
+            }
+        )
+    return plain_table(snapshot_table(rows))
+
+
+def test_filters_and_projection() -> None:
+    frame = _frame()
+
+    result = query_transactions(frame, "h1", tag="pvt_fin", month="2025-09", fields=["row_index", "finance_tag"])
+    assert result["items"] == [{"row_index": i, "finance_tag": "PVT_FIN"} for i in (30, 35, 40, 45, 50)]
+
+    result = query_transactions(frame, "h1", counterparty="acme", min_amount=100, max_amount=200, text="steel")
+    assert [item["row_index"] for item in result["items"]] == [11, 13, 15, 17, 19]
+    assert query_transactions(frame, "h1", tag="none")["matched"] == 40
+
+    with pytest.raises(ValueError):
+        query_transactions(frame, "h1", fields=["nope"])
+
+
+def test_cursor_pagination_walks_all_matches_once() -> None:
+    frame = _frame()
+    seen, cursor = [], None
+    while True:
+        page = query_transactions(frame, "h1", counterparty="RELIANCE", limit=7, cursor=cursor, fields=["row_index"])
+        seen.extend(item["row_index"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(2, 51, 2))
+    with pytest.raises(CursorError):
+        query_transactions(frame, "h2", cursor=query_transactions(frame, "h1", limit=1)["next_cursor"])
+
+
+def test_frame_cache_reuses_frames_and_drops_previous_parse() -> None:
+    loads = []
+    parses = {"v1": ("h1", "t1")}
+
+    def load(version_id: str, parse_hash: str, revision: str):
+        loads.append((version_id, parse_hash, revision))
+        return snapshot_table([])
+
+    cache = VersionFrameCache(load, parses.get, hash_ttl_s=0)
+    cache.frame("v1", *cache.current("v1"))
+    cache.frame("v1", *cache.current("v1"))
+    parses["v1"] = ("h2", "t2")
+    cache.frame("v1", *cache.current("v1"))
+    # A forced re-parse keeps the parse_hash but not the completion time.
+    parses["v1"] = ("h2", "t3")
+    cache.frame("v1", *cache.current("v1"))
+
+    assert loads == [("v1", "h1", "t1"), ("v1", "h2", "t2"), ("v1", "h2", "t3")]
+    assert list(cache._frames) == [("v1", "h2", "t3")]
+
+
+def test_frame_cache_invalidate_skips_the_lookup_ttl() -> None:
+    parses = {"v1": ("h1", "t1")}
+    cache = VersionFrameCache(lambda *key: snapshot_table([]), parses.get, hash_ttl_s=3600)
+    cache.frame("v1", *cache.current("v1"))
+    parses["v1"] = ("h1", "t2")
+    assert cache.current("v1") == ("h1", "t1")
+
+    cache.invalidate("v1")
+
+    assert cache.current("v1") == ("h1", "t2")
+    assert not cache._frames
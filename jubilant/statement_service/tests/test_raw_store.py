@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import app
+from app.raw_store import decode_raw_lines, encode_raw_lines
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _row(page_no, row_no, line_type="TRANSACTION"):
+    return {
+        "page_no": page_no,
+        "row_no": row_no,
+        "raw_row_text": f"p{page_no} r{row_no}",
+        "raw_date_text": "01/02/2025" if line_type == "TRANSACTION" else None,
+        "raw_narration_text": None,
+        "raw_dr_text": "10.00",
+        "raw_cr_text": None,
+        "raw_balance_text": "90.00",
+        "line_type": line_type,
+        "extraction_method": "pdfplumber",
+    }
+
+
+def test_blob_roundtrip_and_page_filter() -> None:
+    rows = [_row(page, row, "NON_TXN_LINE" if row == 1 else "TRANSACTION") for page in (3, 1, 2) for row in (2, 1)]
+    blob = encode_raw_lines(rows)
+
+    decoded = decode_raw_lines(blob)
+    assert [(r["page_no"], r["row_no"]) for r in decoded] == [(p, r) for p in (1, 2, 3) for r in (1, 2)]
+    assert decoded[0] == _row(1, 1, "NON_TXN_LINE")
+    assert [r["page_no"] for r in decode_raw_lines(blob, pages=[2])] == [2, 2]
+
+
+def test_parse_in_blob_mode_writes_no_line_rows(tmp_path, local_client, monkeypatch) -> None:
+    monkeypatch.setenv("STATEMENT_RAW_LINES_STORAGE", "blob")
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+    api = TestClient(app)
+
+    assert api.post(f"/jobs/parse_statement/{version_id}").json()["status"] == "READY"
+
+    assert local_client.table("raw_statement_lines").select("id").eq("version_id", version_id).execute().data == []
+    (index,) = local_client.table("raw_line_blobs").select("*").eq("version_id", version_id).execute().data
+    assert index["line_count"] == sum(index["pages"]["lines"])
+    assert index["pages"]["page_no"] == [1, 2]
+
+    tx = local_client.table("transactions").select("*").eq("version_id", version_id).execute().data[0]
+    assert tx["raw_line_ids"] == []
+    refs = tx["raw_line_refs"]
+    assert refs["pdf_file_id"] == index["pdf_file_id"]
+
+    page_no, row_no = refs["lines"][0]
+    listing = api.get(
+        f"/versions/{version_id}/raw_lines", params={"pdf_file_id": index["pdf_file_id"], "page": page_no}
+    ).json()
+    assert listing["storage"] == "blob"
+    assert {line["page_no"] for line in listing["lines"]} == {page_no}
+    assert any(line["row_no"] == row_no and line["raw_date_text"] for line in listing["lines"])
+
+
+def test_rows_mode_listing_pages_past_the_response_cap(local_client) -> None:
+    rows = [
+        {"version_id": "v1", "pdf_file_id": "p1", **_row(page, row)} for page in (3, 1, 2) for row in range(700, 0, -1)
+    ]
+    local_client.table("raw_statement_lines").insert(rows).execute()
+    api = TestClient(app)
+
+    listing = api.get("/versions/v1/raw_lines", params={"pdf_file_id": "p1"}).json()
+    assert listing["storage"] == "rows"
+    assert [(r["page_no"], r["row_no"]) for r in listing["lines"]] == [(p, r) for p in (1, 2, 3) for r in range(1, 701)]
+
+    two_pages = api.get("/versions/v1/raw_lines", params=[("pdf_file_id", "p1"), ("page", 3), ("page", 1)]).json()
+    assert len(two_pages["lines"]) == 1400 and {r["page_no"] for r in two_pages["lines"]} == {1, 3}
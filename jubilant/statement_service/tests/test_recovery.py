@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from app import main
+from app.parser.banks import GenericBankParser
+from app.parser.engines import get_engine
+from app.parser.extract import ExtractionReport
+from app.parser.fingerprint import UNKNOWN_FINGERPRINT
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _tag_config() -> main.FinanceTagConfig:
+    cfg = main.FinanceTagConfig()
+    cfg["pvt_keywords"] = dict(main.DEFAULT_PVT_KEYWORDS)
+    cfg["bank_keywords"] = dict(main.DEFAULT_BANK_KEYWORDS)
+    cfg["false_patterns"] = set(main.DEFAULT_FALSE_POSITIVES)
+    cfg["pvt_entities"] = set()
+    cfg["bank_entities"] = set()
+    cfg["thresholds"] = dict(main.DEFAULT_TAG_THRESHOLDS)
+    return cfg
+
+
+def test_failing_page_is_reextracted_and_reconciles(tmp_path) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=3, layout="text")
+    good = get_engine("pdfium_text").extract(path)
+    # Page 2 comes out with unparseable dates, as a broken extraction would.
+    broken = [
+        replace(line, date_text="32/13/2025") if line.page_no == 2 and line.date_text else line for line in good
+    ]
+    pdf = {"id": "pdf-1"}
+    raw_lines_all = [(pdf, broken, main._raw_insert_rows("v1", "pdf-1", broken))]
+    parsers = {"pdf-1": GenericBankParser(UNKNOWN_FINGERPRINT)}
+    cfg = _tag_config()
+
+    build = main._build_transactions("v1", "s1", raw_lines_all, parsers, cfg)
+    reasons, unmapped, suspect = main._strict_reconcile(build, raw_lines_all)
+    assert unmapped > 0 and any(r.startswith("TOTAL_MISMATCH") for r in reasons)
+    # The last broken row on page 2 also absorbed page 3's leading lines.
+    assert suspect == {"pdf-1": {2, 3}}
+
+    recovered = main._recover_pages(
+        "v1", "s1", raw_lines_all, parsers, {"pdf-1": ExtractionReport(engine="pdfium_text")}, {"pdf-1": path}, suspect, cfg
+    )
+
+    assert recovered is not None
+    lines_all, build, details = recovered
+    assert details == {"pdf-1": {"engine": "pdfplumber", "pages": [2, 3]}}
+    assert [line.raw_row_text for line in lines_all[0][1]] == [line.raw_row_text for line in good]
+    assert main._strict_reconcile(build, lines_all)[0] == []
+
+
+def test_recovery_uses_each_pdfs_parser_and_stops_when_its_engines_run_out(monkeypatch) -> None:
+    from app.parser.banks import TmbParser
+    from app.parser.fingerprint import Fingerprint
+
+    calls = []
+
+    def fake_run(task, source, parser, engine, pages, options, control=None):
+        calls.append((source, type(parser).__name__, engine))
+        raise RuntimeError("engine failed")
+
+    monkeypatch.setattr(main, "_run_extraction", fake_run)
+    pdfs = {pdf_id: {"id": pdf_id} for pdf_id in ("lattice-pdf", "text-pdf", "tmb-pdf")}
+    parsers = {
+        "lattice-pdf": GenericBankParser(UNKNOWN_FINGERPRINT),
+        "text-pdf": GenericBankParser(UNKNOWN_FINGERPRINT),
+        "tmb-pdf": TmbParser(Fingerprint(bank="TMB", layout="jasperreports_optransactionhistory")),
+    }
+    reports = {
+        "lattice-pdf": ExtractionReport(engine="lattice"),
+        "text-pdf": ExtractionReport(engine="pdfium_text"),
+        "tmb-pdf": ExtractionReport(engine="tmb_positional"),
+    }
+    raw_lines_all = [(pdf, [], []) for pdf in pdfs.values()]
+    suspect = {pdf_id: {1} for pdf_id in pdfs}
+
+    recovered = main._recover_pages(
+        "v1", "s1", raw_lines_all, parsers, reports, {k: k for k in pdfs}, suspect, _tag_config()
+    )
+
+    assert recovered is None
+    # Two rounds: lattice has two alternates, pdfium_text one (not re-run), TMB none.
+    assert calls == [
+        ("lattice-pdf", "GenericBankParser", "pdfplumber"),
+        ("text-pdf", "GenericBankParser", "pdfplumber"),
+        ("lattice-pdf", "GenericBankParser", "pdfium_text"),
+    ]
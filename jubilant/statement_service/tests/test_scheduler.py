@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.jobs import JobCancelled, JobControl
+from app.scheduler import LARGE, SMALL, LaneScheduler, estimate_cost
+
+
+def _queue(scheduler, admitted, version_id, cost, lead_id=None):
+    def run():
+        ticket = scheduler.acquire(version_id, cost, lead_id=lead_id, poll_s=0.01)
+        admitted.append(ticket)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while scheduler.status(version_id) is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return thread
+
+
+def _wait_for(admitted, count):
+    deadline = time.monotonic() + 2
+    while len(admitted) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return [ticket.version_id for ticket in admitted]
+
+
+def test_estimate_cost_uses_pages_or_size() -> None:
+    assert estimate_cost([10, 900], [100_000, 5_000_000]) == 910.0
+    # Unknown page count, or a scan much heavier than its page count: priced by size.
+    assert estimate_cost([None, 2], [1_000_000, 2_500_000]) == 14.0
+    assert estimate_cost([], []) == 1.0
+
+
+def test_small_job_overtakes_queued_large_job() -> None:
+    scheduler = LaneScheduler(1, aging_s=0)
+    busy = scheduler.acquire("busy", 5)
+    admitted = []
+    _queue(scheduler, admitted, "large", 900)
+    _queue(scheduler, admitted, "small", 10)
+    assert scheduler.status("small")["queue_position"] == 1
+    assert scheduler.status("large")["lane"] == LARGE
+
+    scheduler.release(busy)
+    assert _wait_for(admitted, 1) == ["small"]
+    scheduler.release(admitted[0])
+    assert _wait_for(admitted, 2) == ["small", "large"]
+
+
+def test_large_lane_cap_keeps_a_slot_for_small_jobs() -> None:
+    scheduler = LaneScheduler(2, large_slots=1)
+    scheduler.acquire("large-1", 900)
+    admitted = []
+    _queue(scheduler, admitted, "large-2", 800)
+    _queue(scheduler, admitted, "small", 10)
+    assert _wait_for(admitted, 1) == ["small"]
+    assert scheduler.status("large-2")["state"] == "queued"
+    assert scheduler.snapshot()["running"] == {SMALL: 1, LARGE: 1}
+
+
+def test_per_lead_limit() -> None:
+    scheduler = LaneScheduler(3, per_lead=1)
+    scheduler.acquire("a-1", 5, lead_id="a")
+    admitted = []
+    _queue(scheduler, admitted, "a-2", 5, lead_id="a")
+    _queue(scheduler, admitted, "b-1", 5, lead_id="b")
+    assert _wait_for(admitted, 1) == ["b-1"]
+    assert scheduler.status("a-2")["state"] == "queued"
+
+
+def test_aging_lets_a_waiting_large_job_run() -> None:
+    scheduler = LaneScheduler(1, aging_s=0.01)
+    busy = scheduler.acquire("busy", 5)
+    admitted = []
+    _queue(scheduler, admitted, "large", 900)
+    time.sleep(0.5)
+    _queue(scheduler, admitted, "small", 10)
+    scheduler.release(busy)
+    assert _wait_for(admitted, 1) == ["large"]
+
+
+def test_cancelled_job_leaves_the_queue() -> None:
+    scheduler = LaneScheduler(1)
+    scheduler.acquire("busy", 5)
+    control = JobControl("queued")
+    threading.Timer(0.05, control.cancel, ("stop",)).start()
+    with pytest.raises(JobCancelled):
+        scheduler.acquire("queued", 5, control=control, poll_s=0.01)
+    assert scheduler.status("queued") is None
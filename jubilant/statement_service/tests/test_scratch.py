@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import mmap
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.local_backend import seed_statement
+from app.main import app
+from app.parser.engines import extract_with_engine, pdf_page_count
+from app.scratch import ScratchSpace, scratch_usage, sweep_orphans
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+@pytest.fixture
+def scratch_root(tmp_path, monkeypatch):
+    root = tmp_path / "scratch"
+    monkeypatch.setenv("STATEMENT_SCRATCH_DIR", str(root))
+    return root
+
+
+def test_scratch_space_always_cleans_up(scratch_root) -> None:
+    with pytest.raises(RuntimeError):
+        with ScratchSpace("job") as scratch:
+            scratch.write("a.pdf", b"x" * 1000)
+            assert scratch_usage()["bytes_in_use"] >= 1000
+            raise RuntimeError("boom")
+    assert os.listdir(scratch_root) == []
+    assert scratch.usage()["bytes_written"] == 1000
+
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    orphan = scratch_root / f"stmt-scratch-{int(dead.stdout)}-job-abc"
+    orphan.mkdir()
+    (orphan / "source.pdf").write_bytes(b"x")
+    assert sweep_orphans() == 1
+    assert not orphan.exists()
+
+
+@pytest.mark.parametrize("engine", ["pdfplumber", "pdfium_text"])
+def test_engines_read_bytes_and_mmap(tmp_path, engine) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="ruled" if engine == "pdfplumber" else "text")
+    expected = extract_with_engine(pdf_path, engine_name=engine)
+    with open(pdf_path, "rb") as handle:
+        data = handle.read()
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        assert extract_with_engine(data, engine_name=engine) == expected
+        assert extract_with_engine(mapped, engine_name=engine) == expected
+        assert pdf_page_count(mapped) == 2
+    finally:
+        mapped.close()
+
+
+def test_parse_job_leaves_no_scratch(tmp_path, scratch_root, local_client, monkeypatch) -> None:
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_statement_pdf(pdf_path, pages=2, layout="text")
+    version_id = seed_statement(local_client, [pdf_path])
+    # Spill every PDF so the job does write scratch.
+    monkeypatch.setenv("STATEMENT_PDF_SPILL_MB", "0.0001")
+
+    result = TestClient(app).post(f"/jobs/parse_statement/{version_id}").json()
+
+    assert result["status"] == "READY"
+    assert result["stage_metrics"]["scratch"]["bytes_written"] == os.path.getsize(pdf_path)
+    assert os.listdir(scratch_root) == []
+    assert TestClient(app).get("/health").json()["scratch"]["active_spaces"] == 0
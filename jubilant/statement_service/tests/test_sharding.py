@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import copy
+import random
+
+import pytest
+
+from app.parser.engines import extract_sharded, get_engine
+from app.parser.extract import RawLine, merge_multiline_transactions, merge_shard, stitch_shard_merges
+from scripts.synthetic_corpus import write_statement_pdf
+
+
+def _random_lines(rng: random.Random, count: int):
+    lines = []
+    for row_no in range(count):
+        kind = rng.random()
+        if kind < 0.45:
+            lines.append(RawLine(1, row_no, f"01/01/2025 txn {row_no}", "01/01/2025", None, None, "10.00", "20.00", "TRANSACTION", "t"))
+        elif kind < 0.55:
+            lines.append(RawLine(1, row_no, "", None, None, None, None, None, "NON_TXN_LINE", "t"))
+        elif kind < 0.6:
+            lines.append(RawLine(1, row_no, f"undated {row_no}", None, None, "1.00", None, None, "TRANSACTION", "t"))
+        else:
+            lines.append(RawLine(1, row_no, f" cont {row_no} ", None, None, None, None, None, "NON_TXN_LINE", "t"))
+    return lines
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_stitched_shards_match_serial_merge(seed: int) -> None:
+    rng = random.Random(seed)
+    lines = _random_lines(rng, rng.randint(0, 80))
+    cuts = sorted(rng.sample(range(len(lines) + 1), k=min(len(lines) + 1, rng.randint(0, 8))))
+    shards = [lines[a:b] for a, b in zip([0] + cuts, cuts + [len(lines)])]
+
+    stitched = stitch_shard_merges(merge_shard(shard) for shard in shards)
+
+    assert stitched == merge_multiline_transactions(copy.deepcopy(lines))
+
+
+@pytest.mark.parametrize("engine_name, workers", [("pdfium_text", 1), ("pdfplumber", 2)])
+def test_sharded_extraction_matches_serial(tmp_path, engine_name: str, workers: int) -> None:
+    path = str(tmp_path / "text.pdf")
+    write_statement_pdf(path, pages=5, layout="text")
+
+    serial = get_engine(engine_name).extract(path)
+    lines, merged = extract_sharded(path, engine_name, shard_pages=2, workers=workers)
+
+    assert lines == serial
+    assert merged == merge_multiline_transactions(serial)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+
+from app.snapshot import encode_snapshot, load_snapshot, snapshot_path
+
+
+def _txn(row_index: int, tag: str) -> dict:
+    return {
+        "row_index": row_index,
+        "transaction_uid": f"uid-{row_index}",
+        "pdf_file_id": "pdf-1",
+        "txn_date": dt.date(2025, 8, row_index),
+        "month_key": "2025-08",
+        "narration": f"NEFT ACME {row_index}",
+        "dr": 100.0 * row_index,
+        "cr": 0.0,
+        "amount": 100.0 * row_index,
+        "balance": None if row_index == 2 else 1000.0,
+        "txn_type": "DEBIT",
+        "category": "TRANSFER",
+        "counterparty_norm": "ACME",
+        "finance_tag": tag,
+        "tag_confidence": 0.9,
+        "tag_reason_codes": ["KW:NEFT"],
+    }
+
+
+def test_snapshot_round_trips_through_memory_mapped_cache(tmp_path) -> None:
+    blob = encode_snapshot([_txn(1, "PVT_FIN"), _txn(2, None)], {"parse_hash": "h1"})
+    downloads = []
+
+    def download(path: str) -> bytes:
+        downloads.append(path)
+        return blob
+
+    table = load_snapshot("v1", "h1", download=download, cache_dir=str(tmp_path))
+    again = load_snapshot("v1", "h1", download=download, cache_dir=str(tmp_path))
+
+    assert downloads == [snapshot_path("v1", "h1")]
+    assert table.schema.metadata[b"parse_hash"] == b"h1"
+    assert again.column("finance_tag").to_pylist() == ["PVT_FIN", None]
+    assert table.column("txn_date").to_pylist() == [dt.date(2025, 8, 1), dt.date(2025, 8, 2)]
+    assert table.column("balance").to_pylist() == [1000.0, None]
+    assert table.column("tag_reason_codes").to_pylist() == [["KW:NEFT"], ["KW:NEFT"]]
+
+
+def test_forced_reparse_revision_replaces_local_copy(tmp_path) -> None:
+    blobs = [encode_snapshot([_txn(1, "PVT_FIN")]), encode_snapshot([_txn(1, "BANK_FIN")])]
+
+    def download(path: str) -> bytes:
+        return blobs.pop(0)
+
+    first = load_snapshot("v1", "h1", download=download, cache_dir=str(tmp_path), revision="2025-08-01T10:00:00")
+    # Same parse_hash, new parse_completed_at: the old local copy must not be served.
+    second = load_snapshot("v1", "h1", download=download, cache_dir=str(tmp_path), revision="2025-08-01T11:00:00")
+
+    assert first.column("finance_tag").to_pylist() == ["PVT_FIN"]
+    assert second.column("finance_tag").to_pylist() == ["BANK_FIN"]
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".arrow")]) == 1
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+STARTUP_BUDGET_S = float(os.environ.get("STATEMENT_STARTUP_BUDGET_S", "2.0"))
+HEAVY_MODULES = ("pdfplumber", "pypdfium2", "openpyxl", "dateutil", "supabase", "httpx")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _import_app_in_fresh_interpreter() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=SERVICE_ROOT,
+        env=dict(os.environ),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_defers_heavy_dependencies() -> None:
+    probe = _import_app_in_fresh_interpreter()
+    assert probe["loaded"] == []
+
+
+def test_app_import_within_startup_budget() -> None:
+    # Best of three so one noisy run on a shared CI box does not fail the gate.
+    elapsed = min(_import_app_in_fresh_interpreter()["elapsed"] for _ in range(3))
+    assert elapsed < STARTUP_BUDGET_S, f"cold import took {elapsed:.2f}s (budget {STARTUP_BUDGET_S:.2f}s)"
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app import main
+from app.data_errors import TransientDataError
+
+
+def test_tag_config_reloads_per_job_by_default_and_survives_outages(monkeypatch) -> None:
+    loads = []
+
+    def load():
+        loads.append(len(loads))
+        if len(loads) == 3:
+            raise TransientDataError("finance_tag_config", ConnectionError("refused"))
+        return f"cfg-{len(loads)}"
+
+    monkeypatch.setattr(main, "_load_finance_tag_config", load)
+    monkeypatch.setattr(main, "_tag_config_cache", {"config": None, "loaded_at": 0.0})
+    monkeypatch.delenv("STATEMENT_TAG_CONFIG_TTL_S", raising=False)
+
+    assert main._cached_finance_tag_config() == "cfg-1"
+    assert main._cached_finance_tag_config() == "cfg-2"
+    assert main._cached_finance_tag_config() == "cfg-2"  # load failed: last copy
+    monkeypatch.setenv("STATEMENT_TAG_CONFIG_TTL_S", "60")
+    assert main._cached_finance_tag_config() == "cfg-2"  # loaded moments ago: reused
+    assert len(loads) == 3
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from app import main
+from app.excel.inputs import decode_workbook_inputs, encode_workbook_inputs
+from app.local_backend import LocalBackendError
+
+
+def test_workbook_inputs_round_trip_keeps_cell_types() -> None:
+    context = {
+        "accounts": [{"txns": [{"date": dt.date(2025, 8, 1), "dr": 10.5, "narration": "NEFT"}], "pivots": []}],
+        "analysis_rows": [["Total Debits", 10.5], ["Risk Score", Decimal("42.50")]],
+        "final_rows": [["Risk Band", "LOW"]],
+    }
+
+    decoded = decode_workbook_inputs(encode_workbook_inputs({"parse_hash": "abc", "context": context}))
+
+    assert decoded["parse_hash"] == "abc"
+    assert decoded["context"] == context
+    assert isinstance(decoded["context"]["accounts"][0]["txns"][0]["date"], dt.date)
+
+
+def test_recording_inputs_drops_the_cached_workbook(local_client) -> None:
+    bucket = local_client.storage.from_(main.settings.bucket)
+    cache_path = main._workbook_cache_path("v1", "h1")
+    bucket.upload(cache_path, b"stale workbook")
+
+    main._record_workbook_inputs("v1", "h1", b"inputs")
+
+    with pytest.raises(LocalBackendError):
+        bucket.download(cache_path)
+    assert bucket.download(main._workbook_inputs_path("v1", "h1")) == b"inputs"
+    assert main._workbook_build_lock("v1") is main._workbook_build_lock("v1")